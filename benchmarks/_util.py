@@ -0,0 +1,13 @@
+"""性能基准共用的工具函数"""
+
+import time
+
+
+def best_of(func, repeat):
+    """多次运行取最短耗时（秒）"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
@@ -0,0 +1,73 @@
+"""
+批量剂量计算性能基准
+
+比较 calculate_insulin_doses（numpy实现和纯Python实现）与逐行调用 calculate_insulin_dose 的耗时，
+行数从1e3到1e7；每行的RSI不同（模拟多位患者），ISF为广播的单个值
+
+用法: python benchmarks/bench_dose_engine.py [--max-rows 10000000] [--loop-max 1000000]
+"""
+
+import argparse
+import os
+import random
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from _util import best_of
+from modules.insulin_calculation import calculate_insulin_dose, calculate_insulin_doses, get_numpy
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量剂量计算性能基准")
+    parser.add_argument('--max-rows', type=int, default=10 ** 7, help="最大行数")
+    parser.add_argument('--loop-max', type=int, default=10 ** 6,
+                        help="逐行循环和纯Python实现只测到这个行数（更大时太慢、占用内存太多）")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    np = get_numpy()
+    rng = random.Random(0)
+    # 食物表中的1000种食物，每行引用其中一种
+    foods = [{"name": f"食物{i}", "carb_100g": rng.uniform(0, 100)} for i in range(1000)]
+    isf = 2.5
+
+    print(f"{'行数':>10} {'逐行循环':>12} {'纯Python批量':>12} {'numpy批量':>12} {'加速比':>8}")
+    rows = 1000
+    while rows <= args.max_rows:
+        food_index = [rng.randrange(len(foods)) for _ in range(rows)] if rows <= args.loop_max else None
+        if np is not None:
+            gen = np.random.default_rng(rows)
+            carb_table = np.array([food["carb_100g"] for food in foods])
+            carb = carb_table[gen.integers(0, len(foods), rows)]
+            weights = gen.uniform(1, 500, rows)
+            rsi = gen.uniform(0.05, 0.5, rows)
+            numpy_time = best_of(lambda: calculate_insulin_doses(carb, weights, rsi, isf), args.repeat)
+        else:
+            numpy_time = None
+
+        loop_time = python_time = None
+        if food_index is not None:
+            weight_list = [rng.uniform(1, 500) for _ in range(rows)]
+            rsi_list = [rng.uniform(0.05, 0.5) for _ in range(rows)]
+            carb_list = [foods[i]["carb_100g"] for i in food_index]
+
+            def loop():
+                return [calculate_insulin_dose(foods[i], w, r, isf)
+                        for i, w, r in zip(food_index, weight_list, rsi_list)]
+
+            loop_time = best_of(loop, args.repeat)
+            python_time = best_of(lambda: calculate_insulin_doses(carb_list, weight_list, rsi_list, isf,
+                                                                  use_numpy=False), args.repeat)
+
+        def fmt(seconds):
+            return f"{seconds * 1000:10.2f}ms" if seconds is not None else f"{'-':>12}"
+
+        speedup = f"{loop_time / numpy_time:7.0f}x" if loop_time and numpy_time else f"{'-':>8}"
+        print(f"{rows:>10} {fmt(loop_time)} {fmt(python_time)} {fmt(numpy_time)} {speedup}")
+        rows *= 10
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+食物批量导入性能基准
+
+在临时数据目录中生成含少量非法行和重复行的CSV/JSON文件，测量import_foods的吞吐量（行/秒），
+不会读写项目data目录中的真实数据
+
+用法: python benchmarks/bench_food_import.py [--rows 100000] [--sqlite]
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+
+def generate_rows(count, seed=0):
+    """生成测试数据：约1%营养成分非法，约1%名称重复"""
+    rng = random.Random(seed)
+    for i in range(count):
+        roll = rng.random()
+        if roll < 0.01:
+            yield [f"非法食物{i}", "120", "1", "1"]
+        elif roll < 0.02 and i > 0:
+            yield [f"测试食物{rng.randrange(i)}".upper(), "10", "", ""]
+        else:
+            carb = round(rng.uniform(0, 80), 1)
+            protein = round(rng.uniform(0, 100 - carb) / 2, 1)
+            yield [f"测试食物{i}", str(carb), str(protein), str(round(rng.uniform(0, 10), 1))]
+
+
+def write_csv(path, count):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['名称', '碳水化合物', '蛋白质', '脂肪'])
+        writer.writerows(generate_rows(count))
+
+
+def write_json(path, count):
+    foods = [
+        {"name": name, "carb_100g": float(carb),
+         **({"protein_100g": float(protein)} if protein else {}),
+         **({"fat_100g": float(fat)} if fat else {})}
+        for name, carb, protein, fat in generate_rows(count)
+    ]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(foods, f, ensure_ascii=False)
+
+
+def run(fmt, rows, use_sqlite):
+    """在新的临时数据目录中导入一次，返回 (耗时秒数, 导入报告)"""
+    data_dir = tempfile.mkdtemp(prefix='bench_import_')
+    os.environ['INSULIN_DATA_DIR'] = data_dir
+    os.environ['INSULIN_FOOD_STORAGE'] = 'sqlite' if use_sqlite else 'json'
+    source = os.path.join(data_dir, f'import.{fmt}')
+    (write_csv if fmt == 'csv' else write_json)(source, rows)
+
+    from utils import food_db
+    from modules import food_input
+    food_db.close_connection()
+    food_input.clear_food_table_cache()
+    if use_sqlite:
+        food_db.save_food_data([])
+
+    start = time.perf_counter()
+    report = food_input.import_foods(source)
+    elapsed = time.perf_counter() - start
+    food_db.close_connection()
+    return elapsed, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="食物批量导入性能基准")
+    parser.add_argument('--rows', type=int, default=100000, help="导入文件行数")
+    parser.add_argument('--sqlite', action='store_true', help="导入到SQLite食物数据库")
+    args = parser.parse_args()
+
+    # 不访问GitHub，只测本地提交
+    os.environ.setdefault('INSULIN_STORAGE_BACKEND', 'local')
+    for fmt in ('csv', 'json'):
+        elapsed, report = run(fmt, args.rows, args.sqlite)
+        print(f"{fmt:>4}: {args.rows} 行, {elapsed:.2f}s, {args.rows / elapsed:,.0f} 行/秒 "
+              f"(导入 {report['imported']}, 重复 {report['duplicates']}, "
+              f"拒绝 {len(report['rejected']) - report['duplicates']})")
+
+
+if __name__ == "__main__":
+    main()
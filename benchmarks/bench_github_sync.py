@@ -0,0 +1,108 @@
+"""
+GitHub同步性能基准
+
+在本地模拟的GitHub API服务器（fake_github.py）上测量utils/github_storage.py的
+读取/保存吞吐量和延迟分布（p50/p99），可以注入网络延迟和失败；
+使用临时数据目录，不会读写项目data目录中的真实数据，也不访问真正的GitHub
+
+用法: python benchmarks/bench_github_sync.py [--ops 200] [--latency 0.02] [--failure-rate 0.0] [--workers 1]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def measure(name, operation, ops, workers):
+    """并发执行ops次操作，打印吞吐量、延迟分布和失败次数"""
+    latencies = []
+    failures = 0
+
+    def timed(i):
+        start = time.perf_counter()
+        ok = operation(i)
+        return time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for elapsed, ok in pool.map(timed, range(ops)):
+            latencies.append(elapsed)
+            failures += not ok
+    total = time.perf_counter() - start
+    print(f"{name:>12}: {ops / total:8.1f} 次/秒  p50 {percentile(latencies, 50) * 1000:7.1f}ms  "
+          f"p99 {percentile(latencies, 99) * 1000:7.1f}ms  失败 {failures}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GitHub同步性能基准（本地模拟服务器）")
+    parser.add_argument('--ops', type=int, default=200, help="每项测试的操作次数")
+    parser.add_argument('--latency', type=float, default=0.02, help="模拟的每个请求延迟（秒）")
+    parser.add_argument('--jitter', type=float, default=0.01, help="额外随机延迟上限（秒）")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="模拟服务器返回500的比例")
+    parser.add_argument('--workers', type=int, default=1, help="并发线程数")
+    parser.add_argument('--throttle', action='store_true', help="保留客户端的默认主动限速")
+    args = parser.parse_args()
+
+    os.environ['INSULIN_DATA_DIR'] = tempfile.mkdtemp(prefix='bench_github_')
+
+    from fake_github import FakeGitHubServer
+    from utils import github_storage
+
+    server = FakeGitHubServer(latency=args.latency, jitter=args.jitter, failure_rate=args.failure_rate,
+                              rate_limit=10 ** 9).start()
+    # 默认的令牌桶会把请求限制在约每秒1.3次，基准测试默认关闭以测量请求路径本身
+    limiter = None if args.throttle else github_storage.RateLimiter(rate=1e9, burst=1e9)
+    client = github_storage.GitHubClient('token', 'owner/repo', api_url=server.url, rate_limiter=limiter)
+    github_storage.set_github_client(client)
+
+    record = {"rsi_value": 5.0, "timestamp": "2024-01-01 08:00:00"}
+    files = [f"bench_{i}.json" for i in range(10)]
+    for filename in files:
+        server.put_file(f"data/{filename}", record)
+
+    print(f"模拟延迟 {args.latency * 1000:.0f}ms（+0~{args.jitter * 1000:.0f}ms），失败率 {args.failure_rate:.0%}，"
+          f"{args.workers} 个线程，每项 {args.ops} 次")
+
+    measure("读取", lambda i: github_storage.load_from_github(files[i % len(files)]) is not None,
+            args.ops, args.workers)
+    # 条件读取：与refresh_from_remote一样，取到新内容后记录版本，之后的请求得到304
+    def conditional_read(i):
+        status, _, version = github_storage.fetch_if_modified(files[i % len(files)])
+        if status == "updated":
+            github_storage.remember_remote_version(files[i % len(files)], version)
+        return status != "error"
+
+    measure("条件读取", conditional_read, args.ops, args.workers)
+    # 相邻的操作写不同的文件，避免同一文件的sha冲突成为测量的主要部分
+    measure("保存", lambda i: github_storage.save_to_github(dict(record, rsi_value=i), files[i % len(files)]),
+            args.ops, args.workers)
+    # 重复保存相同内容：每个文件只有第一次需要上传
+    measure("重复保存", lambda i: github_storage.save_to_github(dict(record, rsi_value=-1), files[i % len(files)]),
+            args.ops, args.workers)
+    measure("批量提交", lambda i: github_storage.save_batch_to_github(
+        {filename: dict(record, rsi_value=i, n=j) for j, filename in enumerate(files[:3])}),
+        max(1, args.ops // 4), 1)
+
+    stats = client.connection_stats()
+    print(f"请求 {stats['requests']} 次，新建连接 {stats['connections_opened']} 个，"
+          f"跳过上传 {stats['skipped_uploads']} 次，服务器收到 {len(server.requests)} 个请求")
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
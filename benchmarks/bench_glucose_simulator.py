@@ -0,0 +1,59 @@
+"""
+血糖预测性能基准
+
+同一餐的多个候选剂量方案，比较一次批量模拟（FFT卷积）与纯Python实现的耗时，并检查结果一致
+
+用法: python benchmarks/bench_glucose_simulator.py [--scenarios 1,10,100] [--hours 8] [--step 1]
+"""
+
+import argparse
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from _util import best_of
+from modules import insulin_calculation
+from modules.glucose_simulator import simulate_glucose, dose_scenarios
+
+CARBS = [(0, 60, 'fast'), (0, 25, 'slow'), (-40, 15, 'medium')]
+PAST_DOSES = [(-40, 1.5), (-180, 4.0)]
+RSI, ISF = 0.2, 2.5
+
+
+def main():
+    parser = argparse.ArgumentParser(description="血糖预测性能基准")
+    parser.add_argument('--scenarios', default="1,10,100", help="方案数（逗号分隔）")
+    parser.add_argument('--hours', type=float, default=8)
+    parser.add_argument('--step', type=float, default=1, help="网格间隔（分钟）")
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'方案数':>6} {'批量(numpy)':>12} {'纯Python':>12} {'最大误差':>10}")
+    for count in [int(value) for value in args.scenarios.split(",")]:
+        scenarios = dose_scenarios(CARBS, [i * 0.1 for i in range(count)], PAST_DOSES)
+
+        def run():
+            return simulate_glucose(scenarios, 6.0, RSI, ISF, args.hours, args.step)
+
+        numpy_time = None
+        if insulin_calculation.get_numpy() is not None:
+            run()  # 预先生成曲线缓存
+            numpy_time = best_of(run, args.repeat)
+        _, fast = run()
+
+        insulin_calculation.set_numpy_enabled(False)
+        try:
+            python_time = best_of(run, max(1, args.repeat // 10))
+            _, reference = run()
+        finally:
+            insulin_calculation.set_numpy_enabled(True)
+        error = max(abs(a - b) for row, expected in zip(fast, reference) for a, b in zip(row, expected))
+
+        numpy_text = f"{numpy_time * 1000:10.3f}ms" if numpy_time is not None else f"{'-':>12}"
+        print(f"{count:>6} {numpy_text} {python_time * 1000:10.3f}ms {error:10.2e}")
+
+
+if __name__ == "__main__":
+    main()
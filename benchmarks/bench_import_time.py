@@ -0,0 +1,89 @@
+"""
+各入口的导入耗时基准
+
+在新的Python进程中用 python -X importtime 导入每个入口模块，报告不含解释器启动（site等）的导入耗时、
+耗时最多的几个模块，以及是否导入了streamlit/requests/pandas等重量级依赖；
+每个入口重复多次取中位数（第一次运行包含字节码编译，不计入）
+
+用法: python benchmarks/bench_import_time.py [--repeat 5] [--top 5]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (名称, 导入语句)；Streamlit应用的文件名不是合法的模块名，只导入它依赖的模块
+ENTRY_POINTS = [
+    ("命令行 main.py", "import main"),
+    ("Tk界面 gui_window.py", "import gui_window"),
+    ("Streamlit应用", "import streamlit, utils.file_utils, modules.food_input"),
+    ("胰岛素计算页面", "import pages.Page_insulin_calculation"),
+]
+HEAVY_MODULES = ("streamlit", "requests", "pandas", "numpy")
+
+
+def import_profile(statement, startup_modules=frozenset()):
+    """
+    在新进程中执行导入语句
+
+    参数:
+        startup_modules: 解释器启动时已导入的模块，不计入总耗时
+
+    返回:
+        tuple: (总耗时微秒, {模块名: 累计耗时微秒}, 已导入的重量级模块列表)
+    """
+    code = (f"{statement}\nimport sys\n"
+            f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=PROJECT_ROOT,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "导入失败")
+    cumulative = {}
+    total = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split("|")
+        name = name.rstrip()[1:]
+        cumulative[name.strip()] = int(cumulative_us)
+        # 顶层导入（没有缩进）的累计耗时之和就是总耗时
+        if not name.startswith(" ") and name.strip() not in startup_modules:
+            total += int(cumulative_us)
+    heavy = [m for m in result.stdout.strip().split(",") if m]
+    return total, cumulative, heavy
+
+
+def main():
+    parser = argparse.ArgumentParser(description="各入口的导入耗时基准")
+    parser.add_argument('--repeat', type=int, default=5, help="每个入口重复次数")
+    parser.add_argument('--top', type=int, default=5, help="列出耗时最多的模块数")
+    args = parser.parse_args()
+
+    # 解释器启动时（site、.pth文件）导入的模块不属于任何入口
+    _, startup, _ = import_profile("pass")
+    startup_modules = frozenset(startup)
+
+    for name, statement in ENTRY_POINTS:
+        try:
+            import_profile(statement)  # 预热（编译字节码、填充文件系统缓存）
+            runs = [import_profile(statement, startup_modules) for _ in range(args.repeat)]
+        except RuntimeError as e:
+            print(f"{name}: 无法导入（{e}）")
+            continue
+        totals = [total for total, _, _ in runs]
+        _, cumulative, heavy = runs[-1]
+        print(f"{name}: 中位数 {statistics.median(totals) / 1000:.1f}ms "
+              f"(最小 {min(totals) / 1000:.1f}ms)，重量级依赖: {', '.join(heavy) or '无'}")
+        slowest = sorted(((module, micros) for module, micros in cumulative.items()
+                          if module not in startup_modules),
+                         key=lambda item: item[1], reverse=True)[:args.top]
+        for module, micros in slowest:
+            print(f"    {micros / 1000:8.1f}ms  {module}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+活性胰岛素(IOB)计算性能基准
+
+在24小时、1分钟间隔的时间网格上计算所有注射的IOB曲线，比较卷积实现（iob_timeline）、
+纯Python实现和逐个时间点调用insulin_on_board的耗时，并检查结果一致
+
+用法: python benchmarks/bench_iob.py [--doses 100,300,1000] [--curve exponential]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from _util import best_of
+from modules import insulin_calculation
+from modules.insulin_on_board import iob_timeline, insulin_on_board, get_iob_kernel, CURVES
+
+TIMELINE_MINUTES = 24 * 60
+DIA_HOURS = 4.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="IOB计算性能基准")
+    parser.add_argument('--doses', default="10,100,300,1000", help="注射次数（逗号分隔）")
+    parser.add_argument('--curve', default='exponential', choices=CURVES)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    numpy = insulin_calculation.get_numpy()
+    get_iob_kernel(DIA_HOURS * 60, curve=args.curve)  # 预先生成曲线缓存
+
+    print(f"{'注射次数':>8} {'卷积(numpy)':>12} {'纯Python':>12} {'逐点计算':>12} {'最大误差':>10}")
+    for count in [int(value) for value in args.doses.split(",")]:
+        rng = random.Random(count)
+        # 时间网格开始前一个作用时间内的注射也会计入
+        dose_minutes = [round(rng.uniform(-DIA_HOURS * 60, TIMELINE_MINUTES)) for _ in range(count)]
+        dose_units = [rng.uniform(0.5, 10) for _ in range(count)]
+
+        def run():
+            return iob_timeline(dose_minutes, dose_units, 0, TIMELINE_MINUTES - 1,
+                                dia_hours=DIA_HOURS, curve=args.curve)
+
+        numpy_time = best_of(run, args.repeat) if numpy is not None else None
+        _, fast = run()
+
+        insulin_calculation.set_numpy_enabled(False)
+        try:
+            python_time = best_of(run, max(1, args.repeat // 10))
+        finally:
+            insulin_calculation.set_numpy_enabled(True)
+
+        start = time.perf_counter()
+        reference = [insulin_on_board(dose_minutes, dose_units, minute, DIA_HOURS, curve=args.curve)
+                     for minute in range(TIMELINE_MINUTES)]
+        pointwise_time = time.perf_counter() - start
+        error = max(abs(a - b) for a, b in zip(fast, reference))
+
+        def fmt(seconds):
+            return f"{seconds * 1000:10.3f}ms" if seconds is not None else f"{'-':>12}"
+
+        print(f"{count:>8} {fmt(numpy_time)} {fmt(python_time)} {fmt(pointwise_time)} {error:10.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+JSON缓存性能基准
+
+在临时数据目录中生成食物数据，比较load_json缓存命中（返回共享的只读数据）与重新解析文件的耗时，
+缓存命中必须比重新解析快 --min-speedup 倍以上，否则以非0状态退出；
+同时给出mutable=True（由marshal快照还原副本）的耗时作为参考
+
+用法: python benchmarks/bench_json_cache.py [--rows 20000] [--min-speedup 100]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from _util import best_of
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON缓存性能基准")
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--min-speedup', type=float, default=100.0, help="缓存命中至少比重新解析快这么多倍")
+    args = parser.parse_args()
+
+    os.environ['INSULIN_DATA_DIR'] = tempfile.mkdtemp(prefix='bench_cache_')
+    os.environ['INSULIN_STORAGE_BACKEND'] = 'local'
+    from utils.file_utils import save_json, load_json, clear_json_cache
+    from utils.path_utils import get_data_path
+
+    rng = random.Random(0)
+    foods = [{"name": f"测试食物{i}", "carb_100g": round(rng.uniform(0, 80), 1),
+              "protein_100g": round(rng.uniform(0, 20), 1), "fat_100g": round(rng.uniform(0, 10), 1)}
+             for i in range(args.rows)]
+    save_json(foods, 'foods_data.json')
+    path = get_data_path('foods_data.json')
+
+    def parse():
+        with open(path, 'rb') as f:
+            return json.loads(f.read().decode('utf-8'))
+
+    parse_time = best_of(parse, args.repeat)
+    clear_json_cache()
+    load_json('foods_data.json')  # 填充缓存
+    hit_time = best_of(lambda: load_json('foods_data.json'), args.repeat)
+    copy_time = best_of(lambda: load_json('foods_data.json', mutable=True), args.repeat)
+
+    # 命中返回同一份共享数据；mutable=True返回独立副本，修改不会影响缓存
+    assert load_json('foods_data.json') is load_json('foods_data.json')
+    copy = load_json('foods_data.json', mutable=True)
+    copy[0]["name"] = "已修改"
+    assert load_json('foods_data.json')[0]["name"] == "测试食物0"
+
+    speedup = parse_time / hit_time
+    print(f"{args.rows}行: 重新解析 {parse_time * 1000:.2f}ms，缓存命中 {hit_time * 1000:.3f}ms，"
+          f"可修改副本 {copy_time * 1000:.2f}ms，快 {speedup:.1f}倍")
+    if speedup < args.min_speedup:
+        print(f"缓存命中没有比重新解析快{args.min_speedup:g}倍以上")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
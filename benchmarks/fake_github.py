@@ -0,0 +1,311 @@
+"""
+本地模拟的GitHub API服务器（只用标准库），用于离线测试和基准测试utils/github_storage.py
+
+支持github_storage用到的接口：
+- Contents API: GET（ETag / If-None-Match、目录列表）、PUT（sha校验，过期返回409，缺少返回422）
+- Git Data API: GET commits/{branch}、POST git/trees、POST git/commits、PATCH git/refs/heads/{branch}
+- X-RateLimit-* 请求头（额度用完返回403）
+- 可注入的延迟、失败（500）和二级限速（403 + Retry-After）
+
+用法:
+    python benchmarks/fake_github.py [--port 8765] [--latency 0.05] [--failure-rate 0.1]
+    然后设置环境变量 INSULIN_GITHUB_API_URL=http://127.0.0.1:8765 运行应用
+
+在代码中使用:
+    server = FakeGitHubServer(latency=0.02).start()
+    client = GitHubClient('token', 'owner/repo', api_url=server.url)
+    ...
+    server.stop()
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+
+def blob_sha(content):
+    """git blob SHA-1（与GitHub返回的文件sha相同）"""
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+
+class FakeGitHubServer:
+    """
+    模拟的GitHub仓库（单分支，所有仓库路径共用同一份数据）
+
+    参数:
+        latency: 每个请求的固定延迟（秒）
+        jitter: 在固定延迟上额外增加的随机延迟上限（秒）
+        failure_rate: 返回500错误的请求比例
+        throttle_rate: 返回403 + Retry-After（二级限速）的请求比例
+        rate_limit: 每小时请求额度（X-RateLimit-Limit）
+        retry_after: 二级限速时返回的Retry-After秒数
+        seed: 随机数种子（失败注入可复现）
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, failure_rate=0.0, throttle_rate=0.0,
+                 rate_limit=5000, retry_after=1, branch="main", seed=0, host="127.0.0.1", port=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.throttle_rate = throttle_rate
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.branch = branch
+        self.host = host
+        self.port = port
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = None
+        self.reset()
+
+    def reset(self):
+        """清空仓库、请求日志和额度"""
+        with self._lock:
+            # 当前分支上的文件 {路径: 内容bytes}
+            self.files = {}
+            # {提交sha: {"tree": 树sha, "parents": [...]}}，{树sha: {路径: 内容bytes}}
+            self.commits = {}
+            self.trees = {}
+            self.head = None
+            self.requests = []
+            self.remaining = self.rate_limit
+            self.reset_at = int(time.time()) + 3600
+            self._ids = 0
+
+    # ---------- 启动与停止 ----------
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self._httpd.server_address[1]}"
+
+    def start(self):
+        """在后台线程中启动服务器，返回self"""
+        self._httpd = ThreadingHTTPServer((self.host, self.port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.fake = self
+        threading.Thread(target=self._httpd.serve_forever, name='fake-github', daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    # ---------- 仓库操作 ----------
+
+    def put_file(self, path, data):
+        """直接在仓库中写入文件（data为bytes、str或可序列化为JSON的对象），模拟其他设备的提交"""
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        elif not isinstance(data, bytes):
+            data = json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+        with self._lock:
+            files = dict(self.files)
+            files[path] = data
+            self._commit(files, "external update")
+
+    def _new_id(self, prefix):
+        self._ids += 1
+        return hashlib.sha1(f"{prefix}{self._ids}".encode()).hexdigest()
+
+    def _commit(self, files, message, parents=None):
+        """创建提交并移动分支（调用方持有锁）"""
+        tree = self._new_id("tree")
+        self.trees[tree] = files
+        commit = self._new_id("commit")
+        self.commits[commit] = {"tree": tree, "parents": parents if parents is not None else
+                                ([self.head] if self.head else []), "message": message}
+        self.head = commit
+        self.files = files
+        return commit
+
+    # ---------- 请求处理 ----------
+
+    def handle(self, method, path, query, headers, body):
+        """处理一个请求，返回 (状态码, JSON对象或None, 额外响应头)"""
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay:
+            time.sleep(delay)
+        with self._lock:
+            self.requests.append((method, path))
+            if self.remaining <= 0:
+                return 403, {"message": "API rate limit exceeded"}, {}
+            roll = self._random.random()
+            if roll < self.failure_rate:
+                self.remaining -= 1
+                return 500, {"message": "Injected failure"}, {}
+            if roll < self.failure_rate + self.throttle_rate:
+                return 403, {"message": "You have exceeded a secondary rate limit"}, \
+                    {"Retry-After": str(self.retry_after)}
+
+            parts = path.strip('/').split('/')
+            if len(parts) < 4 or parts[0] != "repos":
+                return 404, {"message": "Not Found"}, {}
+            resource, rest = parts[3], '/'.join(parts[4:])
+            if resource == "contents" and method == "GET":
+                status, payload, extra = self._get_contents(rest, headers)
+            elif resource == "contents" and method == "PUT":
+                status, payload, extra = self._put_contents(rest, body)
+            elif resource == "commits" and method == "GET":
+                status, payload, extra = self._get_commit(rest)
+            elif resource == "git" and method == "POST" and rest == "trees":
+                status, payload, extra = self._create_tree(body)
+            elif resource == "git" and method == "POST" and rest == "commits":
+                status, payload, extra = self._create_commit(body)
+            elif resource == "git" and method == "PATCH" and rest.startswith("refs/heads/"):
+                status, payload, extra = self._update_ref(body)
+            else:
+                status, payload, extra = 404, {"message": "Not Found"}, {}
+            # 304不计入额度（与GitHub相同）
+            if status != 304:
+                self.remaining -= 1
+            return status, payload, extra
+
+    def _get_contents(self, path, headers):
+        if path in self.files:
+            content = self.files[path]
+            sha = blob_sha(content)
+            etag = f'"{sha}"'
+            if headers.get("If-None-Match") == etag:
+                return 304, None, {"ETag": etag}
+            return 200, {
+                "type": "file", "name": path.rsplit('/', 1)[-1], "path": path, "sha": sha,
+                "encoding": "base64", "content": base64.b64encode(content).decode('ascii'),
+            }, {"ETag": etag}
+        prefix = path.rstrip('/') + '/'
+        entries = [{"type": "file", "name": name[len(prefix):], "path": name, "sha": blob_sha(content)}
+                   for name, content in sorted(self.files.items())
+                   if name.startswith(prefix) and '/' not in name[len(prefix):]]
+        if entries:
+            return 200, entries, {}
+        return 404, {"message": "Not Found"}, {}
+
+    def _put_contents(self, path, body):
+        try:
+            content = base64.b64decode(body["content"])
+        except (KeyError, TypeError, ValueError):
+            return 422, {"message": "Invalid request"}, {}
+        current = self.files.get(path)
+        if current is not None and not body.get("sha"):
+            return 422, {"message": "\"sha\" wasn't supplied."}, {}
+        if (current is None and body.get("sha")) or (current is not None and body["sha"] != blob_sha(current)):
+            return 409, {"message": "does not match"}, {}
+        files = dict(self.files)
+        files[path] = content
+        commit = self._commit(files, body.get("message", ""))
+        sha = blob_sha(content)
+        return (201 if current is None else 200), {
+            "content": {"name": path.rsplit('/', 1)[-1], "path": path, "sha": sha},
+            "commit": {"sha": commit},
+        }, {}
+
+    def _get_commit(self, ref):
+        if self.head is None:
+            return 409, {"message": "Git Repository is empty."}, {}
+        if ref not in (self.branch, self.head):
+            return 422, {"message": "No commit found"}, {}
+        return 200, {"sha": self.head, "commit": {"tree": {"sha": self.commits[self.head]["tree"]}}}, {}
+
+    def _create_tree(self, body):
+        base = self.trees.get(body.get("base_tree"), {}) if body.get("base_tree") else {}
+        files = dict(base)
+        for entry in body.get("tree", []):
+            if entry.get("content") is None:
+                return 422, {"message": "Only inline content is supported"}, {}
+            files[entry["path"]] = entry["content"].encode('utf-8')
+        tree = self._new_id("tree")
+        self.trees[tree] = files
+        return 201, {"sha": tree}, {}
+
+    def _create_commit(self, body):
+        if body.get("tree") not in self.trees:
+            return 422, {"message": "Tree not found"}, {}
+        commit = self._new_id("commit")
+        self.commits[commit] = {"tree": body["tree"], "parents": body.get("parents", []),
+                                "message": body.get("message", "")}
+        return 201, {"sha": commit}, {}
+
+    def _update_ref(self, body):
+        commit = self.commits.get(body.get("sha"))
+        if commit is None:
+            return 422, {"message": "Object does not exist"}, {}
+        if not body.get("force") and self.head is not None and self.head not in commit["parents"]:
+            return 422, {"message": "Update is not a fast forward"}, {}
+        self.head = body["sha"]
+        self.files = self.trees[commit["tree"]]
+        return 200, {"object": {"sha": body["sha"]}}, {}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # 响应头和响应体分两次写出，不关闭Nagle算法时客户端的延迟确认会给每个请求额外增加约40ms
+    disable_nagle_algorithm = True
+
+    def _dispatch(self, method):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = {}
+        if length:
+            try:
+                body = json.loads(self.rfile.read(length))
+            except ValueError:
+                body = {}
+        parsed = urlsplit(self.path)
+        fake = self.server.fake
+        status, payload, extra = fake.handle(method, parsed.path, parsed.query, self.headers, body)
+
+        data = b"" if payload is None else json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("X-RateLimit-Limit", str(fake.rate_limit))
+        self.send_header("X-RateLimit-Remaining", str(max(fake.remaining, 0)))
+        self.send_header("X-RateLimit-Reset", str(fake.reset_at))
+        for name, value in extra.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PATCH(self):
+        self._dispatch("PATCH")
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地模拟的GitHub API服务器")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help="每个请求的延迟（秒）")
+    parser.add_argument('--jitter', type=float, default=0.0, help="额外随机延迟上限（秒）")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="返回500的请求比例")
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help="返回403 + Retry-After的请求比例")
+    args = parser.parse_args()
+
+    server = FakeGitHubServer(latency=args.latency, jitter=args.jitter, failure_rate=args.failure_rate,
+                              throttle_rate=args.throttle_rate, port=args.port).start()
+    print(f"模拟GitHub API运行在 {server.url}（Ctrl+C退出）")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
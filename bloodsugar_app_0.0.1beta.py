@@ -31,13 +31,57 @@ def main():
     - 显示应用标题
     - 调用状态显示函数展示当前系统状态
     """
+    # 新容器首次运行时在后台并发下载所有数据文件，不阻塞页面渲染
+    from utils.file_utils import start_bootstrap
+    start_bootstrap()
+
     # 应用主标题
     st.header("水晶能量计算器 Beta 0.0.1")  # 显示带图标的标题
 
+    # 配置了GitHub时提供手动同步按钮（多设备使用时拉取其他设备的修改）
+    show_remote_refresh()
+
     # 显示当前系统状态
     show_current_status()
 
 
+def show_remote_refresh():
+    """在侧边栏显示"从GitHub同步"按钮，只下载远端有变化的文件"""
+    from utils.file_utils import is_github_configured, refresh_from_remote
+
+    if not is_github_configured():
+        return
+    if st.sidebar.button("从GitHub同步最新数据"):
+        results = refresh_from_remote()
+        updated = [name for name, status in results.items() if status == 'updated']
+        if updated:
+            st.sidebar.success(f"已更新: {', '.join(updated)}")
+        else:
+            st.sidebar.info("本地数据已是最新")
+        failed = [name for name, status in results.items() if status == 'error']
+        if failed:
+            st.sidebar.warning(f"同步失败: {', '.join(failed)}")
+
+    # 后台同步队列中尚未推送到GitHub的文件
+    from utils.sync_queue import get_sync_stats
+    sync_stats = get_sync_stats()
+    if sync_stats["depth"]:
+        st.sidebar.caption(f"待同步到GitHub: {sync_stats['depth']} 个文件"
+                           f"（已等待 {sync_stats['lag_seconds']:.0f} 秒）")
+
+    # GitHub API请求限额（本次运行中收到过GitHub响应后才显示）
+    import time
+    from utils.github_storage import get_rate_limit_status
+    rate_status = get_rate_limit_status()
+    if rate_status["blocked_until"]:
+        st.sidebar.warning(f"GitHub请求限额已用完，"
+                           f"{time.strftime('%H:%M:%S', time.localtime(rate_status['blocked_until']))} 后恢复同步")
+    if rate_status["remaining"] is not None:
+        reset = time.strftime('%H:%M', time.localtime(rate_status['reset_at'])) if rate_status['reset_at'] else '-'
+        st.sidebar.caption(f"GitHub API剩余 {rate_status['remaining']}/{rate_status['limit']} 次"
+                           f"（{reset} 重置，限速等待 {rate_status['throttled']} 次）")
+
+
 def show_current_status():
     """
     显示当前系统状态信息
@@ -56,7 +100,18 @@ def show_current_status():
 
     try:
         # 从utils模块导入JSON文件加载功能
-        from utils.file_utils import load_json
+        from utils.file_utils import load_json_batch, bootstrap_done, wait_for_bootstrap
+        from modules.food_input import count_foods, tail_foods
+
+        # 冷启动下载尚未完成时先显示占位内容
+        if not bootstrap_done():
+            placeholder = st.empty()
+            placeholder.info("正在从GitHub加载数据…")
+            wait_for_bootstrap()
+            placeholder.empty()
+
+        # 一次批量读取两个校准文件（存储后端支持时只需一次查询/请求）
+        status_data = load_json_batch(['rsi_data.json', 'isf_data.json'])
 
         # 创建子标题
         st.subheader("当前系统状态")
@@ -66,8 +121,8 @@ def show_current_status():
 
         # 第一列：显示RSI（胰岛素敏感系数）状态
         with col1:
-            # 从rsi_data.json文件加载RSI数据
-            rsi_data = load_json('rsi_data.json')
+            # rsi_data.json中的RSI数据
+            rsi_data = status_data['rsi_data.json']
 
             # 检查RSI数据是否成功加载
             if rsi_data:
@@ -84,8 +139,8 @@ def show_current_status():
 
         # 第二列：显示ISF（胰岛素敏感因子）状态
         with col2:
-            # 从isf_data.json文件加载ISF数据
-            isf_data = load_json('isf_data.json')
+            # isf_data.json中的ISF数据
+            isf_data = status_data['isf_data.json']
 
             # 检查ISF数据是否成功加载
             if isf_data:
@@ -102,16 +157,16 @@ def show_current_status():
 
         # 第三列：显示食物数据库状态
         with col3:
-            # 从foods_data.json文件加载食物数据
-            food_data = load_json('foods_data.json')
+            # 只统计食物数量（不加载整个食物表）
+            food_count = count_foods()
 
-            # 检查食物数据是否成功加载
-            if food_data:
+            # 检查是否已有食物数据
+            if food_count:
                 # 显示成功的状态信息和食物种类数量
-                st.success(f"**食物数据**: {len(food_data)} 种")
+                st.success(f"**食物数据**: {food_count} 种")
 
-                # 获取最近录入的3种食物
-                recent_foods = food_data[-3:]
+                # 流式获取最近录入的3种食物
+                recent_foods = tail_foods(3)
                 # 格式化显示最近录入的食物列表
                 food_list = "\n".join([f"• {food['name']}" for food in recent_foods])
                 st.caption(f"最近录入:\n{food_list}")
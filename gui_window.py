@@ -2,12 +2,14 @@
 import tkinter as tk  # 导入tkinter库，用于创建GUI界面
 from tkinter import ttk, messagebox  # 导入ttk模块（主题控件）和messagebox模块（消息框）
 from utils.file_utils import load_json  # 从自定义工具模块导入JSON文件加载函数
-from modules.food_input import load_food_data, save_food_data  # 从食物输入模块导入数据加载和保存函数
+from modules.food_input import load_food_data, add_food, update_food_data, delete_food_data  # 从食物输入模块导入数据加载和增删改函数
 
 # 导入重构后的计算函数
 from modules.rsi_calibration import calculate_rsi, save_rsi_data  # 从RSI校准模块导入计算和保存函数
 from modules.isf_calibration import calculate_isf, save_isf_data, load_rsi_data  # 从ISF校准模块导入相关函数
-from modules.insulin_calculation import calculate_insulin_dose, load_isf_data  # 从胰岛素计算模块导入剂量计算和数据加载函数
+from modules.insulin_calculation import load_isf_data  # 从胰岛素计算模块导入数据加载函数
+from modules.meal import Meal, format_meal_result  # 从餐食模块导入多食物餐食及结果格式化函数
+from modules.insulin_on_board import record_dose  # 从IOB模块导入注射记录函数
 
 
 class RsiCalibrationWindow:
@@ -267,8 +269,8 @@ class FoodInputWindow:
         self.window.transient(parent)
         self.window.grab_set()
 
-        # 加载食物数据，如果为空则使用空列表
-        self.foods_list = load_food_data() or []
+        # 加载食物数据（列式食物表）
+        self.foods_list = load_food_data()
         self.setup_ui()  # 设置界面
         self.refresh_food_list()  # 刷新食物列表显示
 
@@ -364,25 +366,27 @@ class FoodInputWindow:
             messagebox.showerror("输入错误", "请输入有效的碳水率数字")
             return
 
-        # 检查食物是否已存在
-        for food in self.foods_list:
-            if food['name'].lower() == name.lower():  # 不区分大小写比较
-                # 食物已存在，询问是否覆盖
-                if messagebox.askyesno("确认", f"食物 '{name}' 已存在，是否覆盖?"):
-                    food['carb_100g'] = carb_rate  # 更新现有食物的碳水率
-                    break
-                else:
-                    return  # 用户取消覆盖
+        # 检查食物是否已存在（按名称索引查找，不区分大小写）
+        index = self.foods_list.find_index(name)
+        if index is not None:
+            # 食物已存在，询问是否覆盖
+            if messagebox.askyesno("确认", f"食物 '{name}' 已存在，是否覆盖?"):
+                # 更新现有食物的碳水率（只记录这一条修改）
+                food_data = self.foods_list[index].to_dict()
+                food_data['carb_100g'] = carb_rate
+                success = update_food_data(self.foods_list, index, food_data)
+            else:
+                return  # 用户取消覆盖
         else:
-            # 添加新食物（仅在循环正常结束时执行）
+            # 添加新食物（只追加一条记录，不重写整个食物列表）
             food_data = {
                 "name": name,
                 "carb_100g": carb_rate
             }
-            self.foods_list.append(food_data)
+            success = add_food(food_data)
 
-        # 保存数据
-        if save_food_data(self.foods_list):
+        # 保存结果
+        if success:
             # 保存成功，刷新界面
             self.refresh_food_list()  # 刷新列表显示
             self.clear_entries()  # 清空输入框
@@ -396,11 +400,11 @@ class FoodInputWindow:
         # 清空当前列表
         self.tree.delete(*self.tree.get_children())
         # 重新加载数据
-        self.foods_list = load_food_data() or []
+        self.foods_list = load_food_data()
 
-        # 将每个食物添加到树形视图
-        for food in self.foods_list:
-            self.tree.insert("", "end", values=(food['name'], food['carb_100g']))
+        # 将每个食物添加到树形视图（直接按列读取，不创建行对象）
+        for name, carb in zip(self.foods_list.names, self.foods_list.column('carb_100g')):
+            self.tree.insert("", "end", values=(name, carb))
 
     def delete_selected(self):
         """删除选中的食物"""
@@ -412,14 +416,17 @@ class FoodInputWindow:
 
         # 确认删除
         if messagebox.askyesno("确认", "确定要删除选中的食物吗?"):
+            success = True
             for item in selected:
-                # 获取选中食物的名称
-                food_name = self.tree.item(item)['values'][0]
-                # 从列表中移除该食物
-                self.foods_list = [food for food in self.foods_list if food['name'] != food_name]
-
-            # 保存更新后的列表
-            if save_food_data(self.foods_list):
+                # 获取选中食物的名称（Treeview会把纯数字名称转换为数字）
+                food_name = str(self.tree.item(item)['values'][0])
+                # 逐条删除，每条只记录一次删除操作
+                index = self.foods_list.find_index(food_name)
+                if index is not None:
+                    success = delete_food_data(self.foods_list, index) and success
+
+            # 刷新删除后的列表
+            if success:
                 self.refresh_food_list()  # 刷新显示
                 messagebox.showinfo("成功", "食物已删除")
             else:
@@ -438,12 +445,14 @@ class InsulinCalculationWindow:
         """
         self.window = tk.Toplevel(parent)
         self.window.title("胰岛素剂量计算")
-        self.window.geometry("550x500")
+        self.window.geometry("550x680")
         self.window.transient(parent)
         self.window.grab_set()
 
-        # 加载食物数据
-        self.foods_data = load_food_data() or []
+        # 加载食物数据（列式食物表）
+        self.foods_data = load_food_data()
+        # 本餐已添加的食物
+        self.meal = Meal()
         self.setup_ui()  # 设置界面
 
     def setup_ui(self):
@@ -463,7 +472,7 @@ class InsulinCalculationWindow:
         # 食物下拉框
         self.food_var = tk.StringVar()  # 创建字符串变量
         # 获取食物名称列表，如果没有数据则显示提示
-        food_names = [food['name'] for food in self.foods_data] if self.foods_data else ["无食物数据"]
+        food_names = list(self.foods_data.names) if self.foods_data else ["无食物数据"]
         self.food_combo = ttk.Combobox(selection_frame, textvariable=self.food_var, values=food_names, state="readonly")
         self.food_combo.grid(row=0, column=1, sticky="w", pady=8, padx=10)
 
@@ -476,6 +485,12 @@ class InsulinCalculationWindow:
         self.weight_entry = ttk.Entry(selection_frame, width=15)
         self.weight_entry.grid(row=1, column=1, sticky="w", pady=8, padx=10)
 
+        # 本餐食物列表（一餐多种食物时逐个加入，合并计算）
+        ttk.Button(selection_frame, text="加入本餐", command=self.add_to_meal).grid(row=1, column=2, padx=5)
+        self.meal_listbox = tk.Listbox(selection_frame, height=4, width=40)
+        self.meal_listbox.grid(row=2, column=0, columnspan=2, sticky="we", pady=5)
+        ttk.Button(selection_frame, text="移除所选", command=self.remove_from_meal).grid(row=2, column=2, padx=5)
+
         # 当前参数显示框架
         param_frame = ttk.LabelFrame(self.window, text="当前参数", padding=10)
         param_frame.pack(fill="x", padx=20, pady=10)
@@ -517,6 +532,54 @@ class InsulinCalculationWindow:
         self.result_text.insert("1.0", "请选择食物并输入重量后点击计算")
         self.result_text.config(state="disabled")  # 设置为只读模式
 
+    def read_selection(self):
+        """
+        读取当前选择的食物和重量
+
+        返回:
+            tuple: (食物, 重量)，输入无效时提示错误并返回None
+        """
+        selected_food_name = self.food_var.get()
+        weight_str = self.weight_entry.get().strip()
+
+        # 验证食物选择
+        if not selected_food_name or selected_food_name == "无食物数据":
+            messagebox.showerror("错误", "请先选择食物")
+            return None
+
+        # 验证重量输入
+        try:
+            weight = float(weight_str)
+            if weight <= 0:
+                messagebox.showerror("输入错误", "重量必须大于0")
+                return None
+        except ValueError:
+            messagebox.showerror("输入错误", "请输入有效的重量数字")
+            return None
+
+        # 按名称索引查找选中的食物数据
+        selected_food = self.foods_data.find(selected_food_name)
+        if not selected_food:
+            messagebox.showerror("错误", "未找到选中的食物数据")
+            return None
+        return selected_food.to_dict(), weight
+
+    def add_to_meal(self):
+        """把当前选择的食物和重量加入本餐"""
+        selection = self.read_selection()
+        if selection is None:
+            return
+        food, weight = selection
+        self.meal.add(food, weight)
+        self.meal_listbox.insert(tk.END, f"{food['name']}  {weight:g}g")
+        self.weight_entry.delete(0, tk.END)
+
+    def remove_from_meal(self):
+        """从本餐中移除选中的食物"""
+        for index in reversed(self.meal_listbox.curselection()):
+            self.meal.remove(index)
+            self.meal_listbox.delete(index)
+
     def load_parameters(self):
         """加载并显示RSI和ISF参数"""
         # 加载RSI数据
@@ -540,75 +603,38 @@ class InsulinCalculationWindow:
     def clear_calculation(self):
         """清空计算结果和输入"""
         self.weight_entry.delete(0, tk.END)  # 清空重量输入框
+        self.meal.clear()  # 清空本餐食物
+        self.meal_listbox.delete(0, tk.END)
         self.result_text.config(state="normal")  # 设置为可编辑模式
         self.result_text.delete("1.0", tk.END)  # 清空结果文本
         self.result_text.insert("1.0", "请选择食物并输入重量后点击计算")  # 插入默认文本
         self.result_text.config(state="disabled")  # 重新设置为只读模式
 
     def calculate_insulin(self):
-        """计算胰岛素剂量"""
-        # 获取选中的食物名称和输入重量
-        selected_food_name = self.food_var.get()
-        weight_str = self.weight_entry.get().strip()
-
-        # 验证食物选择
-        if not selected_food_name or selected_food_name == "无食物数据":
-            messagebox.showerror("错误", "请先选择食物")
-            return
-
-        # 验证重量输入
-        try:
-            weight = float(weight_str)
-            if weight <= 0:
-                messagebox.showerror("输入错误", "重量必须大于0")
+        """计算胰岛素剂量（本餐有食物时计算整餐，否则只计算当前选择的食物）"""
+        if self.meal:
+            meal = self.meal
+        else:
+            selection = self.read_selection()
+            if selection is None:
                 return
-        except ValueError:
-            messagebox.showerror("输入错误", "请输入有效的重量数字")
-            return
-
-        # 查找选中的食物数据
-        selected_food = None
-        for food in self.foods_data:
-            if food['name'] == selected_food_name:
-                selected_food = food
-                break
-
-        # 验证食物数据是否存在
-        if not selected_food:
-            messagebox.showerror("错误", "未找到选中的食物数据")
-            return
+            meal = Meal([selection])
 
-        # 检查RSI数据是否存在
-        rsi_data = load_rsi_data()  # 直接调用模块函数
-        if not rsi_data:
-            messagebox.showerror("错误", "未找到RSI校准数据，请先进行RSI校准")
-            return
-
-        # 检查ISF数据是否存在
-        isf_data = load_isf_data()  # 直接调用模块函数
-        if not isf_data:
-            messagebox.showerror("错误", "未找到ISF校准数据，请先进行ISF校准")
+        # 一次加载RSI/ISF校准数据，计算整餐剂量和每种食物的明细
+        result = meal.calculate(foods=self.foods_data)
+        if not result["success"]:
+            messagebox.showerror("错误", result["error"])
             return
 
-        # 获取RSI和ISF值
-        rsi_value = rsi_data['rsi_value']
-        isf_value = isf_data['isf_value']
-
-        # 直接调用模块中的计算函数计算胰岛素剂量
-        total_carb, blood_sugar_rise, insulin_dose = calculate_insulin_dose(
-            selected_food, weight, rsi_value, isf_value
-        )
-
-        # 构建结果显示文本
-        result_text = f"食物: {selected_food['name']}\n"
-        result_text += f"重量: {weight}g\n"
-        result_text += f"碳水含量: {total_carb:.2f}g\n\n"
-        result_text += f"预计血糖升高值: {blood_sugar_rise:.2f} mmol/L\n"
-        result_text += f"胰岛素注射剂量: {insulin_dose:.2f} U\n\n"
-        result_text += f"(基于RSI值: {rsi_value}, ISF值: {isf_value} mmol/L/U)"
-
         # 更新结果文本显示
         self.result_text.config(state="normal")
         self.result_text.delete("1.0", tk.END)
-        self.result_text.insert("1.0", result_text)
-        self.result_text.config(state="disabled")
\ No newline at end of file
+        self.result_text.insert("1.0", format_meal_result(result))
+        self.result_text.config(state="disabled")
+
+        # 记录注射后，之后的计算会扣除这次注射的IOB
+        if result["net_dose"] > 0 and messagebox.askyesno(
+                "记录注射", f"是否记录本次注射 {result['net_dose']:.2f} U？"):
+            note = "、".join(item["name"] for item in result["items"])
+            if not record_dose(result["net_dose"], note=note):
+                messagebox.showerror("错误", "保存注射记录失败")
\ No newline at end of file
@@ -14,8 +14,8 @@ sys.path.append(os.path.join(os.path.dirname(__file__), 'utils'))
 from modules.rsi_calibration import calibrate_rsi
 # 从isf_calibration模块导入calibrate_isf函数，用于ISF值校准
 from modules.isf_calibration import calibrate_isf
-# 从food_input模块导入input_food_data函数，用于食物信息录入
-from modules.food_input import input_food_data
+# 从food_input模块导入input_food_data函数，用于食物信息录入；import_food_file函数用于批量导入食物
+from modules.food_input import input_food_data, import_food_file
 # 从insulin_calculation模块导入calculate_insulin函数，用于胰岛素剂量计算
 from modules.insulin_calculation import calculate_insulin
 
@@ -36,11 +36,12 @@ def main():
         print("2. 校准ISF值（胰岛素敏感系数）")  # 选项2：ISF校准功能
         print("3. 录入食物信息")  # 选项3：食物信息录入功能
         print("4. 计算胰岛素注射剂量")  # 选项4：胰岛素剂量计算功能
-        print("5. 退出程序")  # 选项5：退出程序
+        print("5. 批量导入食物数据（CSV/JSON/XLSX）")  # 选项5：批量导入食物功能
+        print("6. 退出程序")  # 选项6：退出程序
         print("=" * 50)  # 打印分隔线
 
         # 获取用户输入的选择，strip()用于去除首尾空白字符
-        choice = input("请选择功能 (1-5): ").strip()
+        choice = input("请选择功能 (1-6): ").strip()
 
         # 根据用户选择执行相应的功能
         if choice == '1':
@@ -56,12 +57,15 @@ def main():
             # 如果选择4，调用胰岛素剂量计算函数
             calculate_insulin()
         elif choice == '5':
-            # 如果选择5，打印退出信息并跳出循环
+            # 如果选择5，调用批量导入食物函数
+            import_food_file()
+        elif choice == '6':
+            # 如果选择6，打印退出信息并跳出循环
             print("感谢使用血糖控制程序，再见！")
             break  # 跳出while循环，结束程序
         else:
-            # 如果输入无效（不是1-5），提示用户重新输入
-            print("无效选择，请输入1-5之间的数字")
+            # 如果输入无效（不是1-6），提示用户重新输入
+            print("无效选择，请输入1-6之间的数字")
 
         # 在每个功能执行完毕后暂停，等待用户按回车键继续
         # 这样可以让用户有时间查看上一个操作的输出结果
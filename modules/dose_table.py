@@ -0,0 +1,182 @@
+"""
+剂量速查表模块
+按 (食物, RSI, ISF) 预先计算一张重量网格（默认1-1000g，每1g）上的剂量表并缓存，
+界面拖动重量滑块或显示剂量表时直接查表，不必每次修改重量都重新加载数据和计算
+"""
+
+import math
+import threading
+from collections import OrderedDict
+from utils.file_utils import stat_key, is_local_storage
+from utils.path_utils import get_data_path
+from modules.food_input import find_food
+from modules.insulin_calculation import load_calibration_data, calculate_insulin_dose, calculate_insulin_doses
+
+
+# 重量网格（克）
+DOSE_TABLE_MIN_WEIGHT = 1
+DOSE_TABLE_MAX_WEIGHT = 1000
+DOSE_TABLE_STEP = 1
+# 最多缓存这么多张表（最近最少使用的先淘汰）
+DOSE_TABLE_CACHE_SIZE = 64
+
+CALIBRATION_FILES = ('rsi_data.json', 'isf_data.json')
+
+# {(食物名称小写, 每100g碳水, RSI, ISF): DoseTable}
+_table_cache = OrderedDict()
+_table_cache_lock = threading.Lock()
+# 缓存表对应的校准文件stat签名，文件变化时清空缓存
+_calibration_key = None
+
+
+class DoseTable:
+    """
+    一种食物在固定RSI/ISF下的剂量表
+
+    weights、total_carb、blood_sugar_rise、insulin_dose 为等长的只读数组（安装了numpy时为numpy数组，否则为list），
+    与对每个重量调用calculate_insulin_dose的结果相同
+    """
+
+    def __init__(self, name, carb_100g, rsi_value, isf_value,
+                 min_weight=DOSE_TABLE_MIN_WEIGHT, max_weight=DOSE_TABLE_MAX_WEIGHT, step=DOSE_TABLE_STEP):
+        self.name = name
+        self.carb_100g = carb_100g
+        self.rsi_value = rsi_value
+        self.isf_value = isf_value
+        self.min_weight = min_weight
+        self.max_weight = max_weight
+        self.step = step
+
+        count = int((max_weight - min_weight) // step) + 1
+        self.weights = [min_weight + i * step for i in range(count)]
+        self.total_carb, self.blood_sugar_rise, self.insulin_dose = calculate_insulin_doses(
+            carb_100g, self.weights, rsi_value, isf_value)
+        for column in (self.total_carb, self.blood_sugar_rise, self.insulin_dose):
+            if hasattr(column, 'setflags'):
+                # 缓存的表在多个会话之间共享，禁止修改
+                column.setflags(write=False)
+
+    def __len__(self):
+        return len(self.weights)
+
+    def __repr__(self):
+        return (f"DoseTable({self.name!r}, {self.min_weight}-{self.max_weight}g, "
+                f"RSI={self.rsi_value}, ISF={self.isf_value})")
+
+    def _index(self, weight):
+        """重量正好落在网格上时返回行号，否则返回None"""
+        offset = (weight - self.min_weight) / self.step
+        if 0 <= offset < len(self.weights) and offset == int(offset):
+            return int(offset)
+        return None
+
+    def lookup(self, weight):
+        """
+        查询某个重量的剂量（网格上的重量直接查表，其他重量单独计算）
+
+        返回:
+            tuple: (total_carb, estimated_blood_sugar_rise, insulin_dose)
+        """
+        index = self._index(weight)
+        if index is None:
+            return calculate_insulin_dose({'carb_100g': self.carb_100g}, weight, self.rsi_value, self.isf_value)
+        return (float(self.total_carb[index]), float(self.blood_sugar_rise[index]),
+                float(self.insulin_dose[index]))
+
+    def rows(self, step=None, max_weight=None):
+        """
+        按更粗的间隔取出表中的行（界面显示用）
+
+        参数:
+            step: 行间隔（克），默认为网格间隔
+            max_weight: 只取不超过这个重量的行
+
+        返回:
+            list: [{"weight", "total_carb", "blood_sugar_rise", "insulin_dose"}]
+        """
+        stride = max(1, int(round((step or self.step) / self.step)))
+        result = []
+        for index in range(0, len(self.weights), stride):
+            weight = self.weights[index]
+            if max_weight is not None and weight > max_weight:
+                break
+            result.append({
+                "weight": weight,
+                "total_carb": float(self.total_carb[index]),
+                "blood_sugar_rise": float(self.blood_sugar_rise[index]),
+                "insulin_dose": float(self.insulin_dose[index]),
+            })
+        return result
+
+
+def _calibration_signature():
+    """校准文件的stat签名；数据不在本地文件中时返回None（只按数值作为缓存键）"""
+    if not is_local_storage():
+        return None
+    return tuple(stat_key(get_data_path(filename)) for filename in CALIBRATION_FILES)
+
+
+def clear_dose_tables():
+    """清空剂量表缓存"""
+    with _table_cache_lock:
+        _table_cache.clear()
+
+
+def get_dose_table(food, rsi_value=None, isf_value=None):
+    """
+    获取一种食物的剂量表（缓存命中时直接返回）
+
+    缓存键包含食物名称、每100g碳水、RSI和ISF的值，因此修改食物数据或重新校准后自动使用新表；
+    校准文件发生变化时同时清空旧表，释放内存
+
+    参数:
+        food: 食物名称（不区分大小写）或包含 name 和 carb_100g 的食物字典
+        rsi_value, isf_value: 指定时不读取校准数据
+
+    返回:
+        DoseTable: 剂量表；食物不存在、碳水含量缺失或未校准时返回None
+    """
+    global _calibration_key
+
+    if isinstance(food, str):
+        name = food
+        food = find_food(food)
+        if food is None:
+            print(f"未找到食物: {name}")
+            return None
+    # FoodTable中缺少碳水含量的行访问food['carb_100g']会抛出KeyError
+    carb_100g = food.get('carb_100g')
+    if carb_100g is None or math.isnan(carb_100g):
+        print(f"食物 {food['name']} 缺少碳水含量")
+        return None
+
+    if rsi_value is None or isf_value is None:
+        signature = _calibration_signature()
+        if signature is not None and signature != _calibration_key:
+            clear_dose_tables()
+            _calibration_key = signature
+        rsi_data, isf_data = load_calibration_data()
+        if rsi_value is None:
+            if not rsi_data:
+                print("未找到RSI校准数据，请先进行RSI校准")
+                return None
+            rsi_value = rsi_data['rsi_value']
+        if isf_value is None:
+            if not isf_data:
+                print("未找到ISF校准数据，请先进行ISF校准")
+                return None
+            isf_value = isf_data['isf_value']
+
+    key = (food['name'].lower(), float(carb_100g), float(rsi_value), float(isf_value))
+    with _table_cache_lock:
+        table = _table_cache.get(key)
+        if table is not None:
+            _table_cache.move_to_end(key)
+            return table
+
+    table = DoseTable(food['name'], float(carb_100g), float(rsi_value), float(isf_value))
+    with _table_cache_lock:
+        _table_cache[key] = table
+        while len(_table_cache) > DOSE_TABLE_CACHE_SIZE:
+            _table_cache.popitem(last=False)
+    return table
@@ -1,29 +1,448 @@
-from utils.file_utils import load_json, save_json
+import csv
+import json
+import os
+import sys
+import threading
+from collections import deque
+from itertools import islice
+from utils.file_utils import (
+    load_json, save_json, load_json_versioned, save_json_if_match, is_github_configured,
+    is_local_storage, has_pending_write, iter_json_array, written_signature, stat_key
+)
+from utils.path_utils import get_data_path
+from utils import food_db
+from utils import journal
+from modules.food_table import FoodTable, NUMERIC_FIELDS, to_food_records
+from modules.food_snapshot import load_food_snapshot, write_food_snapshot, read_snapshot_count
+
+
+FOODS_FILENAME = 'foods_data.json'
+
+# 日志超过以下任一阈值时在后台合并进foods_data.json快照
+JOURNAL_MAX_OPS = 200
+JOURNAL_MAX_BYTES = 256 * 1024
+# 配置了GitHub时，停止修改这么多秒后也合并一次，让远端数据及时更新
+JOURNAL_IDLE_SECONDS = 5.0
+
+_compact_timer = None
+_compact_timer_lock = threading.Lock()
+
+# 非本地文件后端（内存、GitHub等）的写入锁，这些后端不在data目录中创建日志和锁文件
+_backend_write_lock = threading.Lock()
+
+# 批量导入时每处理这么多行报告一次进度
+IMPORT_CHUNK_SIZE = 10000
+
+# 导入文件表头的别名（不区分大小写） -> 字段名
+IMPORT_COLUMN_ALIASES = {
+    'name': 'name', 'food': 'name', '名称': 'name', '食物': 'name', '食物名称': 'name',
+    'carb_100g': 'carb_100g', 'carb': 'carb_100g', 'carbs': 'carb_100g',
+    'carbohydrate': 'carb_100g', '碳水': 'carb_100g', '碳水化合物': 'carb_100g',
+    'protein_100g': 'protein_100g', 'protein': 'protein_100g', '蛋白质': 'protein_100g',
+    'fat_100g': 'fat_100g', 'fat': 'fat_100g', '脂肪': 'fat_100g',
+}
+
+# 食物表缓存：(快照stat签名, 日志stat签名, FoodTable)
+_table_cache = None
+_table_cache_lock = threading.Lock()
+
+
+def _use_sqlite():
+    """配置项FOOD_STORAGE为sqlite时，食物数据改为从SQLite数据库读写（不同步到GitHub）"""
+    return food_db.is_enabled()
+
+
+def _replay_journal(table, ops):
+    """
+    在快照（FoodTable）上按顺序重放日志中的操作
+
+    操作格式:
+        {"op": "insert", "food": {...}}
+        {"op": "update", "name": 原名称, "food": {...}}
+        {"op": "delete", "name": 名称}
+    """
+    # 删除先记下行号，最后一次性删除，避免每次删除都移动整列数据
+    deleted = set()
+    for op in ops:
+        kind = op.get("op")
+        if kind == "insert":
+            row = table.find_index(op["food"]["name"])
+            if row is None or row in deleted:
+                table.append(op["food"])
+            else:
+                table[row] = op["food"]
+        elif kind == "update":
+            row = table.find_index(op["name"])
+            if row is not None and row not in deleted:
+                table[row] = op["food"]
+        elif kind == "delete":
+            row = table.find_index(op["name"])
+            if row is not None:
+                deleted.add(row)
+    table.delete_rows(deleted)
+    return table
+
+
+def _journal_names(ops):
+    """日志操作涉及的所有名称（小写）"""
+    names = set()
+    for op in ops:
+        if "name" in op:
+            names.add(op["name"].lower())
+        if "food" in op:
+            names.add(op["food"]["name"].lower())
+    return names
+
+
+def _journal_overlay(ops, snapshot_rows):
+    """
+    将日志操作归并为覆盖表，供流式读取时逐条应用
+
+    与_replay_journal在FoodTable上的重放逐步对应：按名称索引定位行，
+    更新只作用于当前能按名称找到且未删除的行，新增或改名到已有的名称时替换该名称当前对应的行
+    （被替换名称的原有行保留原内容）
+
+    参数:
+        snapshot_rows: {小写名称: 快照中的行号}，同名时为最后一行，只需包含日志涉及的名称
+
+    返回:
+        (replaced, deleted, appended): 快照行用 ("snapshot", 行号) 表示，新增的行用 ("insert", 序号) 表示；
+        replaced为 {行: 新内容}，deleted为被删除的行，appended为追加在末尾的行（按追加顺序）
+    """
+    index = {name: ("snapshot", row) for name, row in snapshot_rows.items()}
+    current = {row: name for name, row in index.items()}  # 行 -> 当前名称（小写）
+    replaced = {}
+    deleted = set()
+    appended = []
+    for op in ops:
+        kind = op.get("op")
+        if kind == "insert":
+            name = op["food"]["name"].lower()
+            row = index.get(name)
+            if row is None or row in deleted:
+                row = ("insert", len(appended))
+                appended.append(row)
+                index[name] = row
+                current[row] = name
+            replaced[row] = op["food"]
+        elif kind == "update":
+            row = index.get(op["name"].lower())
+            if row is None or row in deleted:
+                continue
+            replaced[row] = op["food"]
+            old_name, new_name = current[row], op["food"]["name"].lower()
+            if new_name != old_name:
+                if index.get(old_name) == row:
+                    del index[old_name]
+                index[new_name] = row
+                current[row] = new_name
+        elif kind == "delete":
+            row = index.get(op["name"].lower())
+            if row is not None:
+                deleted.add(row)
+    return replaced, deleted, appended
+
+
+def clear_food_table_cache():
+    """清空食物表缓存（主要用于测试，或切换数据目录/存储后端之后）"""
+    global _table_cache
+    with _table_cache_lock:
+        _table_cache = None
+
+
+def _cached_table():
+    """食物表缓存仍然有效时返回缓存的表（只读使用），否则返回None"""
+    if _table_cache is None or has_pending_write(FOODS_FILENAME) or not is_local_storage():
+        return None
+    key = (stat_key(get_data_path(FOODS_FILENAME)), stat_key(journal.get_journal_path(FOODS_FILENAME)))
+    with _table_cache_lock:
+        if _table_cache is not None and _table_cache[:2] == key:
+            return _table_cache[2]
+    return None
+
+
+def _load_food_table():
+    """读取快照并重放日志得到食物表（快照和日志都未变化时直接使用缓存）"""
+    global _table_cache
+    if has_pending_write(FOODS_FILENAME) or not is_local_storage():
+        # 合并写入窗口内的数据还没有落盘，或数据不在本地文件中，不能按stat签名缓存
+        data = load_json(FOODS_FILENAME, use_cache=False)
+        return _replay_journal(FoodTable(data or []), journal.read_ops(FOODS_FILENAME))
+
+    source_path = get_data_path(FOODS_FILENAME)
+    key = (stat_key(source_path), stat_key(journal.get_journal_path(FOODS_FILENAME)))
+    with _table_cache_lock:
+        if _table_cache is not None and _table_cache[:2] == key:
+            return _table_cache[2]
+
+    # 优先mmap加载二进制快照；快照缺失或过期时解析JSON并重新生成快照。
+    # 快照的校验和生成都使用读取之前的签名：读取期间JSON被替换（如refresh_from_remote、冷启动下载，
+    # 它们不持有日志锁）时，旧数据的快照带着旧签名，下次加载会发现过期并重新生成
+    table = load_food_snapshot(source_path, key[0])
+    if table is None:
+        data = load_json(FOODS_FILENAME, use_cache=False)
+        table = FoodTable(data or [])
+        if data is not None:
+            write_food_snapshot(table, key[0])
+    table = _replay_journal(table, journal.read_ops(FOODS_FILENAME))
+    with _table_cache_lock:
+        _table_cache = key + (table,)
+    return table
 
 
 def load_food_data():
-    """加载食物数据"""
-    data = load_json('foods_data.json')
-    return data if data is not None else []
+    """
+    加载食物数据（快照 + 修改日志）
+
+    返回:
+        FoodTable: 列式食物表，可以像字典列表一样使用，调用方可以自由修改
+    """
+    if _use_sqlite():
+        return FoodTable(food_db.load_food_data())
+    return _load_food_table().copy()
+
+
+def iter_foods():
+    """
+    逐个返回食物字典（生成器，按录入顺序）
+
+    增量解析foods_data.json并在读取过程中应用修改日志，不构建完整的食物表，
+    适合只需要扫描一遍的场景（计数、查找单个食物、取最近录入等）
+    """
+    if _use_sqlite():
+        yield from food_db.iter_foods()
+        return
+    table = _cached_table()
+    if table is not None:
+        for food in table:
+            yield food.to_dict()
+        return
+
+    ops = journal.read_ops(FOODS_FILENAME)
+    if not ops:
+        yield from iter_json_array(FOODS_FILENAME)
+        return
+    # 先扫描一遍，找到日志涉及的名称在快照中对应的行（同名时为最后一行，与名称索引一致）
+    names = _journal_names(ops)
+    snapshot_rows = {}
+    for row, food in enumerate(iter_json_array(FOODS_FILENAME)):
+        key = food["name"].lower()
+        if key in names:
+            snapshot_rows[key] = row
+    replaced, deleted, appended = _journal_overlay(ops, snapshot_rows)
+    for row, food in enumerate(iter_json_array(FOODS_FILENAME)):
+        key = ("snapshot", row)
+        if key not in deleted:
+            yield replaced.get(key, food)
+    for key in appended:
+        if key not in deleted:
+            yield replaced[key]
+
+
+def count_foods():
+    """
+    食物总数
+
+    没有未合并的修改日志时直接读取二进制快照头部，否则流式计数
+    """
+    if _use_sqlite():
+        return food_db.count_foods()
+    table = _cached_table()
+    if table is not None:
+        return len(table)
+    if is_local_storage() and not has_pending_write(FOODS_FILENAME) \
+            and not journal.read_ops(FOODS_FILENAME):
+        count = read_snapshot_count(get_data_path(FOODS_FILENAME))
+        if count is not None:
+            return count
+    return sum(1 for _ in iter_foods())
+
+
+def tail_foods(n):
+    """最近录入的n个食物（按录入顺序）"""
+    if n <= 0:
+        return []
+    if _use_sqlite():
+        return food_db.tail_foods(n)
+    return list(deque(iter_foods(), maxlen=n))
+
+
+def find_food(name):
+    """按名称（不区分大小写）查找单个食物，未找到返回None（流式扫描，不加载整个食物表）"""
+    if _use_sqlite():
+        return food_db.get_food(name)
+    table = _cached_table()
+    if table is not None:
+        food = table.find(name)
+        return food.to_dict() if food is not None else None
+    name = name.lower()
+    found = None
+    # 同名时以后出现的为准，与FoodTable.find一致
+    for food in iter_foods():
+        if food["name"].lower() == name:
+            found = food
+    return found
+
+
+def find_foods(names):
+    """
+    按名称（不区分大小写）一次查找多个食物（只扫描一遍食物数据）
+
+    返回:
+        dict: {名称小写: 食物字典}，未找到的名称为None
+    """
+    wanted = {name.lower(): None for name in names}
+    if _use_sqlite():
+        for name in wanted:
+            wanted[name] = food_db.get_food(name)
+        return wanted
+    table = _cached_table()
+    if table is not None:
+        for name in wanted:
+            food = table.find(name)
+            wanted[name] = food.to_dict() if food is not None else None
+        return wanted
+    # 同名时以后出现的为准，与FoodTable.find一致
+    for food in iter_foods():
+        key = food["name"].lower()
+        if key in wanted:
+            wanted[key] = food
+    return wanted
 
 
 def check_duplicate_food(foods_list, new_name):
     """检查新食物名称是否与现有列表重复（不区分大小写）"""
+    if isinstance(foods_list, FoodTable):
+        return foods_list.has_name(new_name)
     existing_names = [food["name"].lower() for food in foods_list]
     return new_name.lower() in existing_names
 
+def _food_write_lock():
+    """修改食物数据时持有的锁：本地文件存储时为日志的跨进程文件锁，其他后端为进程内锁"""
+    if is_local_storage():
+        return journal.journal_lock(FOODS_FILENAME)
+    return _backend_write_lock
+
+
 def save_food_data(foods_data):
-    """保存食物数据"""
-    return save_json(foods_data, 'foods_data.json')
+    """保存食物数据（整体写入新快照并清空修改日志）"""
+    if _use_sqlite():
+        return food_db.save_food_data(foods_data)
+    with _food_write_lock():
+        return _write_food_snapshot(foods_data)
+
+
+def _write_food_snapshot(foods_data):
+    """写入完整快照并清空修改日志（调用方需持有日志锁）"""
+    success = save_json(to_food_records(foods_data), FOODS_FILENAME)
+    if success:
+        journal.clear_journal(FOODS_FILENAME)
+        _refresh_snapshot(foods_data)
+    return success
+
+
+def _refresh_snapshot(foods):
+    """JSON快照写入后同步生成二进制快照（合并写入尚未落盘或不使用本地文件时跳过）"""
+    if has_pending_write(FOODS_FILENAME) or not is_local_storage():
+        return
+    table = foods if isinstance(foods, FoodTable) else FoodTable(foods)
+    # 使用写入JSON时获取的签名，写入后JSON又被其他会话替换时快照自然过期
+    write_food_snapshot(table, written_signature(FOODS_FILENAME))
+
+
+def compact_food_journal():
+    """
+    将修改日志合并进foods_data.json快照
+
+    返回:
+        bool: 合并成功（或无需合并）返回True
+    """
+    with _food_write_lock():
+        ops = journal.read_ops(FOODS_FILENAME)
+        if not ops:
+            return True
+        snapshot, etag = load_json_versioned(FOODS_FILENAME)
+        if etag is None:
+            return False
+        foods = _replay_journal(FoodTable(snapshot or []), ops)
+        # 持有日志锁期间快照只会被本函数或save_food_data改写，条件保存用于防御外部修改
+        success, _ = save_json_if_match(foods.to_records(), FOODS_FILENAME, etag)
+        if success:
+            journal.clear_journal(FOODS_FILENAME)
+            _refresh_snapshot(foods)
+            print(f"已合并 {len(ops)} 条食物修改日志")
+        else:
+            print("合并食物修改日志失败：快照已被其他程序修改")
+        return success
+
+
+def _schedule_idle_compaction():
+    """（重新）启动空闲合并计时器"""
+    global _compact_timer
+    with _compact_timer_lock:
+        if _compact_timer is not None:
+            _compact_timer.cancel()
+        _compact_timer = threading.Timer(JOURNAL_IDLE_SECONDS, compact_food_journal)
+        _compact_timer.daemon = True
+        _compact_timer.start()
+
+
+def _append_food_ops(ops):
+    """
+    提交修改（调用方需持有_food_write_lock）
+
+    本地文件存储时只写入修改日志，并在日志过长时触发后台合并；
+    其他后端没有本地日志，在最新数据上应用修改后通过后端整体写入
+
+    返回:
+        bool: 保存成功返回True
+    """
+    if not is_local_storage():
+        return _write_food_snapshot(_replay_journal(_load_food_table(), ops))
+    journal.append_ops(FOODS_FILENAME, ops)
+    op_count, size = journal.journal_size(FOODS_FILENAME)
+    if op_count >= JOURNAL_MAX_OPS or size >= JOURNAL_MAX_BYTES:
+        threading.Thread(target=compact_food_journal, daemon=True).start()
+    elif is_github_configured():
+        _schedule_idle_compaction()
+    return True
+
+
+def add_food(food):
+    """
+    新增一条食物数据（本地文件存储时只向修改日志追加一行）
+
+    返回:
+        bool: 保存成功返回True，名称重复或保存失败返回False
+    """
+    if _use_sqlite():
+        return food_db.insert_food(food)
+    try:
+        # 持有日志锁时检查重复，其他会话同时新增的食物也能被检查到
+        with _food_write_lock():
+            if _load_food_table().has_name(food["name"]):
+                return False
+            return _append_food_ops([{"op": "insert", "food": dict(food)}])
+    except (IOError, OSError) as e:
+        print(f'写入食物修改日志失败: {e}')
+        return False
+
 
 def update_food_data(foods_data, index, updated_data):
     """
     更新指定索引的食物数据
     """
+    if _use_sqlite():
+        return food_db.update_food_data(foods_data, index, updated_data)
     if 0 <= index < len(foods_data): #要修改的食物索引
+        old_name = foods_data[index]["name"]
         foods_data[index] = updated_data #更新后的食物数据字典
-        save_food_data(foods_data) #所有食物数据列表
-        return True
+        # 只记录这一条修改，不再重写整个食物列表
+        try:
+            with _food_write_lock():
+                return _append_food_ops([{"op": "update", "name": old_name, "food": dict(updated_data)}])
+        except (IOError, OSError) as e:
+            print(f'写入食物修改日志失败: {e}')
     return False
 
 
@@ -38,13 +457,20 @@ def delete_food_data(foods_data, index):
     返回:
         bool: 若索引有效且删除成功则返回True，否则返回False
     """
+    # 已迁移到SQLite时只删除数据库中对应的一行
+    if _use_sqlite():
+        return food_db.delete_food_data(foods_data, index)
     # 校验索引合法性（确保在列表有效范围内）
     if 0 <= index < len(foods_data):
         # 移除指定索引的元素
-        foods_data.pop(index)
-        # 保存修改后的数据到文件
-        save_food_data(foods_data)
-        return True
+        food = foods_data.pop(index)
+        # 只向修改日志追加一条删除记录
+        try:
+            with _food_write_lock():
+                return _append_food_ops([{"op": "delete", "name": food["name"]}])
+        except (IOError, OSError) as e:
+            print(f'写入食物修改日志失败: {e}')
+            return False
     # 索引无效时返回False
     return False
 
@@ -165,4 +591,242 @@ def input_food_data():
 
     # 当用户退出录入循环后，保存所有已录入（包括新增和原有）的食物数据
     save_food_data(foods_list)
-    return foods_list
\ No newline at end of file
+    return foods_list
+
+
+def _import_header(header):
+    """将导入文件的表头映射为 [(列号, 字段名)]，缺少名称或碳水列时抛出ValueError"""
+    columns = []
+    for position, title in enumerate(header):
+        field = IMPORT_COLUMN_ALIASES.get(str(title or '').strip().lower())
+        if field is not None:
+            columns.append((position, field))
+    fields = {field for _, field in columns}
+    if 'name' not in fields or 'carb_100g' not in fields:
+        raise ValueError("导入文件缺少食物名称或碳水化合物列")
+    return columns
+
+
+def _iter_table_rows(rows):
+    """将 表头行 + 数据行 转换为 (行号, 字段字典)"""
+    columns = _import_header(next(rows, None) or [])
+    for line, row in enumerate(rows, start=2):
+        width = len(row)
+        yield line, {field: row[position] for position, field in columns if position < width}
+
+
+def _iter_import_records(path):
+    """
+    按文件扩展名逐行读取导入文件（生成器），返回 (行号, 字段字典)
+
+    支持CSV（UTF-8，可带BOM）、JSON数组和XLSX（需要安装openpyxl）
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            yield from _iter_table_rows(csv.reader(f))
+    elif extension == '.json':
+        # 整个文件一次读入，由json.loads（C实现）一次解析完，比逐个元素raw_decode快得多；
+        # 导入时所有食物本来就要进入内存中的食物表，一次解析不会增加峰值内存的数量级
+        with open(path, 'r', encoding='utf-8-sig') as f:
+            items = json.loads(f.read())
+        if not isinstance(items, list):
+            raise ValueError("JSON导入文件的顶层必须是数组")
+        # 各对象的键基本相同，记住每个键对应的字段名，避免逐行重复规范化
+        key_fields = {}
+        for line, item in enumerate(items, start=1):
+            if not isinstance(item, dict):
+                yield line, None
+                continue
+            record = {}
+            for key, value in item.items():
+                field = key_fields.get(key, '')
+                if field == '':
+                    field = key_fields[key] = IMPORT_COLUMN_ALIASES.get(key.strip().lower())
+                if field is not None:
+                    record[field] = value
+            yield line, record
+    elif extension == '.xlsx':
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise ValueError("导入XLSX文件需要安装openpyxl: pip install openpyxl")
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            yield from _iter_table_rows(workbook.active.iter_rows(values_only=True))
+        finally:
+            workbook.close()
+    else:
+        raise ValueError(f"不支持的导入文件格式: {extension}")
+
+
+def _parse_nutrient(value):
+    """解析营养成分，空值返回None，无法解析时抛出ValueError"""
+    if type(value) is str:
+        value = value.strip()
+        if value in ('', '-'):
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            # 兼容使用逗号作为小数点的成分表
+            return float(value.replace(',', '.'))
+    if value is None:
+        return None
+    if type(value) is bool:
+        raise ValueError(value)
+    return float(value)
+
+
+def _validate_import_food(record):
+    """
+    校验一行导入数据
+
+    返回:
+        tuple: (食物字典, None) 或 (None, 拒绝原因)
+    """
+    if record is None:
+        return None, "不是JSON对象"
+    name = record.get('name')
+    name = str(name).strip() if name is not None else ''
+    if not name:
+        return None, "缺少食物名称"
+    food = {"name": name}
+    total = 0.0
+    for field in NUMERIC_FIELDS:
+        value = record.get(field)
+        # JSON导入的数值通常已经是float，不必再解析
+        if type(value) is not float:
+            try:
+                value = _parse_nutrient(value)
+            except (TypeError, ValueError):
+                return None, f"{field} 不是有效的数字"
+        if value is None:
+            if field == 'carb_100g':
+                return None, "缺少碳水化合物含量"
+            continue
+        if not 0 <= value <= 100:
+            return None, f"{field} 超出范围(0-100): {value:g}"
+        food[field] = value
+        total += value
+    if total > 100:
+        return None, f"营养成分合计超过100g: {total:g}"
+    return food, None
+
+
+def _write_rejects(rejects_path, rejected):
+    """将被拒绝的行写入CSV报告"""
+    with open(rejects_path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['行号', '食物名称', '原因'])
+        writer.writerows(rejected)
+
+
+def import_foods(path, chunk_size=IMPORT_CHUNK_SIZE, rejects_path=None, progress=None):
+    """
+    从CSV/JSON/XLSX文件批量导入食物
+
+    文件按块校验（营养成分必须在0-100g之间且合计不超过100g；CSV/XLSX流式读取，JSON一次解析），
+    名称与现有食物及文件内已导入的食物按不区分大小写去重（以先出现的为准），
+    全部处理完后只提交一次（写入一次快照，或在SQLite中用一个事务插入）
+
+    参数:
+        path: 导入文件路径
+        chunk_size: 每处理多少行调用一次progress
+        rejects_path: 指定时把被拒绝的行（含重复）写入该CSV文件
+        progress: 可选的进度回调，参数为已处理的行数
+
+    返回:
+        dict: {"success": 是否提交成功, "imported": 导入条数, "duplicates": 重复条数,
+               "rejected": [(行号, 名称, 原因), ...]}（rejected包含重复的行）
+    """
+    report = {"success": False, "imported": 0, "duplicates": 0, "rejected": []}
+    rejected = report["rejected"]
+    new_foods = []
+    try:
+        with _food_write_lock():
+            if _use_sqlite():
+                table = None
+                existing = {food["name"].lower() for food in food_db.iter_foods()}
+            else:
+                table = _load_food_table().copy()
+                existing = {name.lower() for name in table.names}
+
+            records = _iter_import_records(path)
+            processed = 0
+            while True:
+                chunk = list(islice(records, chunk_size))
+                if not chunk:
+                    break
+                accepted = []
+                for line, record in chunk:
+                    food, reason = _validate_import_food(record)
+                    if reason is not None:
+                        rejected.append((line, (record or {}).get('name', ''), reason))
+                        continue
+                    key = food["name"].lower()
+                    if key in existing:
+                        report["duplicates"] += 1
+                        rejected.append((line, food["name"], "名称重复"))
+                        continue
+                    existing.add(key)
+                    accepted.append(food)
+                if table is None:
+                    new_foods.extend(accepted)
+                else:
+                    table.extend(accepted)
+                report["imported"] += len(accepted)
+                processed += len(chunk)
+                if progress is not None:
+                    progress(processed)
+
+            if not report["imported"]:
+                report["success"] = True
+            elif table is None:
+                report["success"] = food_db.insert_foods(new_foods)
+            else:
+                report["success"] = _write_food_snapshot(table)
+            if not report["success"]:
+                report["imported"] = 0
+    except (IOError, OSError, ValueError, UnicodeDecodeError) as e:
+        print(f'导入食物数据失败: {e}')
+        report["imported"] = 0
+        return report
+
+    if rejects_path and rejected:
+        _write_rejects(rejects_path, rejected)
+    return report
+
+
+def import_food_file():
+    """命令行批量导入食物：提示输入文件路径，导入后打印结果"""
+    print("\n=== 批量导入食物数据 ===")
+    path = input("请输入导入文件路径(CSV/JSON/XLSX): ").strip().strip('"')
+    if not os.path.isfile(path):
+        print(f"文件不存在: {path}")
+        return
+    rejects_path = os.path.splitext(path)[0] + '_rejects.csv'
+    report = import_foods(path, rejects_path=rejects_path,
+                          progress=lambda rows: print(f"已处理 {rows} 行"))
+    _print_import_report(report, rejects_path)
+    return report
+
+
+def _print_import_report(report, rejects_path):
+    """打印导入结果"""
+    if not report["success"]:
+        print("导入失败，食物数据未修改")
+        return
+    print(f"成功导入 {report['imported']} 种食物，重复 {report['duplicates']} 条，"
+          f"拒绝 {len(report['rejected']) - report['duplicates']} 条")
+    if report["rejected"]:
+        print(f"被拒绝的行已写入: {rejects_path}")
+
+
+if __name__ == "__main__":
+    # 用法: python -m modules.food_input import <文件路径>
+    if len(sys.argv) == 3 and sys.argv[1] == 'import':
+        target = os.path.splitext(sys.argv[2])[0] + '_rejects.csv'
+        _print_import_report(import_foods(sys.argv[2], rejects_path=target), target)
+    else:
+        print("用法: python -m modules.food_input import <文件路径>")
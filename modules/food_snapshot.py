@@ -0,0 +1,188 @@
+"""
+食物表二进制快照模块
+在保存foods_data.json时同时生成foods_data.bin，启动时通过mmap零拷贝加载
+（加载时在映射上校验一次CRC32，数据不会被复制为Python对象）
+
+文件格式（小端）:
+    头部56字节: 魔数b'FDSN' | 版本(u16) | 标志(u16) | 食物数量(u32) | 名称区字节数(u64) | 附加字段字节数(u64)
+               | 源JSON的mtime_ns(i64) | 源JSON的大小(i64) | 源JSON的inode(u64) | 数据区CRC32(u32)
+    数据区:     carb_100g[n] (f64) | protein_100g[n] (f64) | fat_100g[n] (f64)
+               | 名称偏移量[n+1] (u32) | 整数标记[n] (u8，标志含FLAG_INT_FLAGS时才有)
+               | UTF-8名称区 | 附加字段（JSON: [[行号, {字段: 值}], ...]）
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import zlib
+from array import array
+from utils.file_utils import stat_key
+from utils.path_utils import get_data_path
+from modules.food_table import FoodTable, NUMERIC_FIELDS, OFFSET_TYPE
+
+
+SNAPSHOT_FILENAME = 'foods_data.bin'
+SNAPSHOT_MAGIC = b'FDSN'
+SNAPSHOT_VERSION = 3
+
+# 标志位：数据区包含整数标记
+FLAG_INT_FLAGS = 1
+
+_HEADER = struct.Struct('<4sHHIQQqqQI')
+
+
+def get_snapshot_path():
+    """获取二进制快照文件路径"""
+    return get_data_path(SNAPSHOT_FILENAME)
+
+
+def source_signature(source_path):
+    """获取源JSON文件的 (mtime_ns, size, inode)，文件不存在时返回None"""
+    return stat_key(source_path)
+
+
+def _column_bytes(column, typecode='d'):
+    """将数值列（或偏移量）转换为小端字节串"""
+    if not isinstance(column, array):
+        column = array(typecode, column)
+    if sys.byteorder == 'big':
+        column = array(typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+def write_food_snapshot(table, signature):
+    """
+    为食物表生成二进制快照（原子替换旧快照）
+
+    参数:
+        table: FoodTable
+        signature: 生成table所用的foods_data.json版本的 (mtime_ns, size, inode)，写入头部用于判断快照是否过期；
+                   必须在读取JSON之前（或写入JSON时）获取，不能在生成快照时才获取，
+                   否则期间被替换的JSON会让旧数据的快照带上新文件的签名
+
+    返回:
+        bool: 生成成功返回True
+    """
+    if signature is None:
+        return False
+
+    blob, offsets, int_flags, extras = table.buffers()
+    try:
+        extras_json = json.dumps(sorted(extras.items()), ensure_ascii=False).encode('utf-8') if extras else b''
+    except (TypeError, ValueError) as e:
+        print(f'生成食物快照失败: {e}')
+        return False
+    flags = 0
+    parts = [_column_bytes(table.column(field)) for field in NUMERIC_FIELDS]
+    parts.append(_column_bytes(offsets, OFFSET_TYPE))
+    if int_flags is not None:
+        flags |= FLAG_INT_FLAGS
+        parts.append(int_flags)
+    parts += [blob, extras_json]
+    body = b''.join(parts)
+    header = _HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, flags, len(table), len(blob), len(extras_json),
+                          signature[0], signature[1], signature[2], zlib.crc32(body))
+
+    path = get_snapshot_path()
+    # 每次写入使用唯一的临时文件，多个会话同时生成快照时不会互相覆盖
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=f'.{SNAPSHOT_FILENAME}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(header)
+            f.write(body)
+        os.replace(tmp_path, path)
+        return True
+    except OSError as e:
+        # Windows上快照仍被mmap映射时无法替换，下次加载时会重新生成
+        print(f'生成食物快照失败: {e}')
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+
+
+def _read_header(buffer):
+    """解析头部，返回字段元组；格式不匹配时返回None"""
+    if len(buffer) < _HEADER.size:
+        return None
+    fields = _HEADER.unpack_from(buffer, 0)
+    if fields[0] != SNAPSHOT_MAGIC or fields[1] != SNAPSHOT_VERSION:
+        return None
+    return fields
+
+
+def read_snapshot_count(source_path, signature=None):
+    """
+    只读取快照头部得到食物数量；快照缺失或过期时返回None
+
+    signature为调用方已经获取的源文件签名，不传时现在获取
+    """
+    if signature is None:
+        signature = source_signature(source_path)
+    if signature is None:
+        return None
+    try:
+        with open(get_snapshot_path(), 'rb') as f:
+            fields = _read_header(f.read(_HEADER.size))
+    except OSError:
+        return None
+    if fields is None or fields[6:9] != tuple(signature[:3]):
+        return None
+    return fields[3]
+
+
+def load_food_snapshot(source_path, signature=None):
+    """
+    通过mmap零拷贝加载二进制快照
+
+    校验头部（魔数、版本、源文件签名和长度）和数据区的CRC32（直接在映射上计算，不复制数据），
+    快照损坏时视为缺失，由调用方解析JSON并重新生成；
+    signature为调用方已经获取的源文件签名（与调用方缓存键使用同一次stat），不传时现在获取
+
+    返回:
+        FoodTable: 快照有效时返回只读列（写入时自动复制）的食物表；快照缺失或过期时返回None
+    """
+    if sys.byteorder == 'big':
+        return None
+    path = get_snapshot_path()
+    if signature is None:
+        signature = source_signature(source_path)
+    if signature is None or not os.path.exists(path):
+        return None
+
+    try:
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    fields = _read_header(mapped)
+    if fields is None or fields[6:9] != tuple(signature[:3]):
+        mapped.close()
+        return None
+    flags, count, names_len, extras_len = fields[2:6]
+    column_size = 8 * count
+    offset_size = array(OFFSET_TYPE).itemsize
+    offsets_start = _HEADER.size + 3 * column_size
+    flags_start = offsets_start + offset_size * (count + 1)
+    blob_start = flags_start + (count if flags & FLAG_INT_FLAGS else 0)
+    extras_start = blob_start + names_len
+    view = memoryview(mapped)
+    if len(mapped) != extras_start + extras_len or zlib.crc32(view[_HEADER.size:]) != fields[9]:
+        view.release()
+        mapped.close()
+        return None
+
+    columns = {}
+    for i, field in enumerate(NUMERIC_FIELDS):
+        start = _HEADER.size + i * column_size
+        columns[field] = view[start:start + column_size].cast('d')
+    offsets = view[offsets_start:flags_start].cast(OFFSET_TYPE)
+    int_flags = view[flags_start:blob_start] if flags & FLAG_INT_FLAGS else None
+    # 附加字段只在少数行上出现，直接解析为字典
+    extras = {row: food for row, food in json.loads(str(view[extras_start:], 'utf-8'))} if extras_len else None
+    return FoodTable.from_buffers(view[blob_start:extras_start], offsets, columns, int_flags, extras, readonly=True)
+
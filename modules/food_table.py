@@ -0,0 +1,583 @@
+"""
+列式食物表模块
+用array('d')按列保存营养成分，名称以UTF-8编码连续保存在一个bytearray中（配合偏移量数组），
+名称索引是开放寻址的行号数组，不为每个名称单独保存字符串对象；
+替代"字典列表"形式的食物数据，同时保持与原有字典用法兼容（包括整数值和其他字段）
+"""
+
+from array import array
+from bisect import bisect_right
+from collections.abc import Mapping, Sequence
+
+
+# 数值列（每100g营养成分），缺失值用NaN表示
+NUMERIC_FIELDS = ('carb_100g', 'protein_100g', 'fat_100g')
+FIELDS = ('name',) + NUMERIC_FIELDS
+
+# 整数标记中各数值列对应的位
+FIELD_BITS = {field: 1 << i for i, field in enumerate(NUMERIC_FIELDS)}
+
+# 名称偏移量和名称索引槽的数组类型（名称区不超过4GB）
+OFFSET_TYPE = 'I'
+_SLOT_TYPE = 'i'
+
+_MISSING = float('nan')
+_ABSENT = object()
+# 可以用浮点数精确保存的整数范围
+_MAX_EXACT_INT = 2 ** 53
+
+
+def _encode_food(food):
+    """
+    拆分食物数据，返回 (UTF-8名称, 数值列的值, 整数标记, 附加字段)
+
+    int和float保存在数值列中（整数另外记录标记，读出时还原为int），
+    数值字段的其他值（None、字符串、布尔值、NaN等）和不认识的字段原样保存在附加字段中，
+    保证to_records()与原来的字典列表完全一致
+    """
+    values = []
+    int_bits = 0
+    extras = None
+    known = 1
+    for field in NUMERIC_FIELDS:
+        value = food.get(field, _ABSENT)
+        kind = type(value)
+        if kind is float and value == value:
+            values.append(value)
+        elif kind is int and -_MAX_EXACT_INT <= value <= _MAX_EXACT_INT:
+            values.append(float(value))
+            int_bits |= FIELD_BITS[field]
+        else:
+            values.append(_MISSING)
+            if value is _ABSENT:
+                continue
+            if extras is None:
+                extras = {}
+            extras[field] = value
+        known += 1
+    if len(food) > known:
+        if extras is None:
+            extras = {}
+        for key, value in food.items():
+            if key != 'name' and key not in FIELD_BITS:
+                extras[key] = value
+    return food['name'].encode('utf-8'), values, int_bits, extras
+
+
+def _writable_array(typecode, source):
+    """将只读的memoryview（或其他序列）复制为可写的array"""
+    column = array(typecode)
+    if isinstance(source, memoryview):
+        column.frombytes(source.cast('B'))
+    else:
+        column.extend(source)
+    return column
+
+
+class FoodRow(Mapping):
+    """
+    食物表中一行的只读视图（支持 food['name'] 等字典式访问）
+
+    视图只记录所在行号，表结构改变（删除行）后旧视图不再有效
+    """
+
+    __slots__ = ('_table', '_row')
+
+    def __init__(self, table, row):
+        self._table = table
+        self._row = row
+
+    def __getitem__(self, key):
+        table, row = self._table, self._row
+        if key == 'name':
+            return table._name(row)
+        bit = FIELD_BITS.get(key)
+        if bit is not None:
+            value = table._columns[key][row]
+            if value == value:
+                flags = table._int_flags
+                return int(value) if flags is not None and flags[row] & bit else value
+        extras = table._extras.get(row)
+        if extras is not None and key in extras:
+            return extras[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        """修改单个字段（直接写回表中）"""
+        food = self.to_dict()
+        food[key] = value
+        self._table[self._row] = food
+
+    def __iter__(self):
+        table, row = self._table, self._row
+        yield 'name'
+        for field in NUMERIC_FIELDS:
+            value = table._columns[field][row]
+            if value == value:
+                yield field
+        yield from table._extras.get(row, ())
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def to_dict(self):
+        """转换为普通字典（用于JSON序列化）"""
+        return dict(self.items())
+
+    def __repr__(self):
+        return f"FoodRow({self.to_dict()!r})"
+
+
+class FoodNames(Sequence):
+    """
+    食物表名称列的只读视图（下标访问、len、迭代时才解码单个名称）
+
+    与FoodRow一样只引用所在的表，表结构改变后旧视图不再有效
+    """
+
+    __slots__ = ('_table',)
+
+    def __init__(self, table):
+        self._table = table
+
+    def __len__(self):
+        return len(self._table)
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(len(self)))]
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError('食物表下标越界')
+        return self._table._name(row)
+
+    def __iter__(self):
+        blob, offsets = self._table._blob, self._table._offsets
+        text = str(blob, 'utf-8')
+        if len(text) == len(blob):
+            # 全部是ASCII时字节偏移量就是字符偏移量，一次解码后直接切片
+            for row in range(len(offsets) - 1):
+                yield text[offsets[row]:offsets[row + 1]]
+            return
+        for row in range(len(offsets) - 1):
+            yield str(blob[offsets[row]:offsets[row + 1]], 'utf-8')
+
+
+class FoodTable:
+    """
+    列式存储的食物表
+
+    行为类似原来的食物字典列表：支持len()、下标访问、迭代、append、pop、copy、index，
+    迭代得到的是FoodRow视图；另外提供按名称的O(1)查找和按列访问
+
+    内部结构:
+        _blob/_offsets: 名称的UTF-8编码及每行的起止偏移量（n+1个）
+        _columns: {数值字段: array('d')}，缺失值为NaN
+        _int_flags: 每行一个字节，记录哪些数值字段原本是整数（没有整数时为None）
+        _extras: {行号: {字段: 值}}，数值列无法表示的值和其他字段
+        _index: 小写名称的开放寻址散列表，槽中保存 行号+1（0为空槽），按需建立
+    """
+
+    __slots__ = ('_blob', '_offsets', '_columns', '_int_flags', '_extras',
+                 '_index', '_index_count', '_ascii_lower', '_readonly')
+
+    def __init__(self, foods=()):
+        self._blob = bytearray()
+        self._offsets = array(OFFSET_TYPE, [0])
+        self._columns = {field: array('d') for field in NUMERIC_FIELDS}
+        self._int_flags = None
+        self._extras = {}
+        self._index = None
+        self._index_count = 0
+        # 名称的小写是否只影响ASCII字符（此时可以直接在编码后的名称区上搜索），None表示未检查
+        self._ascii_lower = None
+        self._readonly = False
+        self.extend(foods)
+
+    @classmethod
+    def from_buffers(cls, blob, offsets, columns, int_flags=None, extras=None, readonly=False):
+        """
+        直接由名称区、偏移量、数值列（以及整数标记和附加字段）构造
+
+        readonly为True时直接引用传入的缓冲区（例如mmap上的memoryview），
+        不复制数据，第一次修改时才复制为可写的结构
+        """
+        table = cls()
+        if readonly:
+            table._blob = blob
+            table._offsets = offsets
+            table._columns = {field: columns[field] for field in NUMERIC_FIELDS}
+            table._int_flags = int_flags
+            table._readonly = True
+        else:
+            table._blob = bytearray(blob)
+            table._offsets = _writable_array(OFFSET_TYPE, offsets)
+            table._columns = {field: _writable_array('d', columns[field]) for field in NUMERIC_FIELDS}
+            table._int_flags = bytearray(int_flags) if int_flags is not None else None
+        table._extras = dict(extras or {})
+        return table
+
+    def _ensure_writable(self):
+        """只读（零拷贝）表在第一次修改前复制为可写的结构"""
+        if not self._readonly:
+            return
+        self._blob = bytearray(self._blob)
+        self._offsets = _writable_array(OFFSET_TYPE, self._offsets)
+        self._columns = {field: _writable_array('d', self._columns[field]) for field in NUMERIC_FIELDS}
+        if self._int_flags is not None:
+            self._int_flags = bytearray(self._int_flags)
+        self._extras = {row: dict(extras) for row, extras in self._extras.items()}
+        # 索引可能与其他副本共享，复制后再修改
+        if self._index is not None:
+            self._index = array(_SLOT_TYPE, self._index)
+        self._readonly = False
+
+    def _name(self, row):
+        """解码指定行的名称"""
+        offsets = self._offsets
+        return str(self._blob[offsets[row]:offsets[row + 1]], 'utf-8')
+
+    def _key(self, row):
+        """指定行的索引键（小写名称）"""
+        return self._name(row).lower()
+
+    # ---------- 列表兼容接口 ----------
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield FoodRow(self, row)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [FoodRow(self, row) for row in range(*item.indices(len(self)))]
+        if item < 0:
+            item += len(self)
+        if not 0 <= item < len(self):
+            raise IndexError('食物表下标越界')
+        return FoodRow(self, item)
+
+    def __setitem__(self, row, food):
+        """用新的食物数据替换指定行"""
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError('食物表下标越界')
+        self._ensure_writable()
+        name, values, int_bits, extras = _encode_food(food)
+        offsets = self._offsets
+        start, end = offsets[row], offsets[row + 1]
+        renamed = self._blob[start:end] != name
+        old_key = new_key = None
+        if renamed and self._index is not None:
+            old_key, new_key = self._key(row), food['name'].lower()
+            if old_key != new_key:
+                # 先按原名称删除索引项（探测时比较的是各行当前的名称）
+                self._index_discard(old_key, row)
+        if renamed:
+            self._blob[start:end] = name
+            delta = len(name) - (end - start)
+            if delta:
+                for i in range(row + 1, len(offsets)):
+                    offsets[i] += delta
+            self._ascii_lower = None
+        for field, value in zip(NUMERIC_FIELDS, values):
+            self._columns[field][row] = value
+        if self._int_flags is None and int_bits:
+            self._int_flags = bytearray(len(self))
+        if self._int_flags is not None:
+            self._int_flags[row] = int_bits
+        if extras:
+            self._extras[row] = extras
+        else:
+            self._extras.pop(row, None)
+        if old_key != new_key:
+            self._index_set(new_key, row)
+
+    def __contains__(self, food):
+        name = food['name'] if isinstance(food, Mapping) else food
+        return self.find_index(name) is not None
+
+    def __bool__(self):
+        return len(self._offsets) > 1
+
+    def __eq__(self, other):
+        if isinstance(other, FoodTable):
+            return self.to_records() == other.to_records()
+        if isinstance(other, list):
+            return self.to_records() == [dict(food) for food in other]
+        return NotImplemented
+
+    def append(self, food):
+        """在表尾追加一个食物（字典或FoodRow）"""
+        self.extend((food,))
+
+    def extend(self, foods):
+        """批量追加食物（比逐个append少做重复的检查和索引维护）"""
+        self._ensure_writable()
+        blob, offsets = self._blob, self._offsets
+        appends = [self._columns[field].append for field in NUMERIC_FIELDS]
+        flags, all_extras = self._int_flags, self._extras
+        start = row = len(self)
+        for food in foods:
+            name, values, int_bits, extras = _encode_food(food)
+            blob += name
+            offsets.append(len(blob))
+            for append, value in zip(appends, values):
+                append(value)
+            if flags is None and int_bits:
+                flags = self._int_flags = bytearray(row)
+            if flags is not None:
+                flags.append(int_bits)
+            if extras:
+                all_extras[row] = extras
+            row += 1
+        if row == start:
+            return
+        self._ascii_lower = None
+        if self._index is not None:
+            for new_row in range(start, row):
+                self._index_set(self._key(new_row), new_row)
+
+    def pop(self, row=-1):
+        """删除并返回指定行（返回普通字典）"""
+        food = self[row].to_dict()
+        self.delete_rows([row % len(self)])
+        return food
+
+    def delete_rows(self, rows):
+        """一次删除多行（只重建一次列数据）"""
+        rows = set(rows)
+        if not rows:
+            return
+        keep = [row for row in range(len(self)) if row not in rows]
+        blob, offsets = self._blob, self._offsets
+        self._blob = bytearray(b''.join([blob[offsets[row]:offsets[row + 1]] for row in keep]))
+        new_offsets = array(OFFSET_TYPE, [0])
+        total = 0
+        for row in keep:
+            total += offsets[row + 1] - offsets[row]
+            new_offsets.append(total)
+        self._offsets = new_offsets
+        for field in NUMERIC_FIELDS:
+            column = self._columns[field]
+            self._columns[field] = array('d', (column[row] for row in keep))
+        if self._int_flags is not None:
+            flags = self._int_flags
+            self._int_flags = bytearray(flags[row] for row in keep)
+        if self._extras:
+            extras = self._extras
+            self._extras = {new: dict(extras[old]) for new, old in enumerate(keep) if old in extras}
+        self._index = None
+        self._ascii_lower = None
+        self._readonly = False
+
+    def copy(self):
+        """复制整个表（数组按内存块复制，开销很小；只读表直接共享数据）"""
+        table = FoodTable()
+        table._ascii_lower = self._ascii_lower
+        table._index_count = self._index_count
+        if self._readonly:
+            # 只读数据和索引在第一次修改前都可以共享
+            table._blob = self._blob
+            table._offsets = self._offsets
+            table._columns = dict(self._columns)
+            table._int_flags = self._int_flags
+            table._extras = self._extras
+            table._index = self._index
+            table._readonly = True
+            return table
+        table._blob = bytearray(self._blob)
+        table._offsets = array(OFFSET_TYPE, self._offsets)
+        table._columns = {field: array('d', column) for field, column in self._columns.items()}
+        table._int_flags = bytearray(self._int_flags) if self._int_flags is not None else None
+        table._extras = {row: dict(extras) for row, extras in self._extras.items()}
+        table._index = array(_SLOT_TYPE, self._index) if self._index is not None else None
+        return table
+
+    def index(self, food):
+        """返回食物所在行号（按名称匹配），不存在时抛出ValueError"""
+        row = self.find_index(food['name'] if isinstance(food, Mapping) else food)
+        if row is None:
+            raise ValueError(f"食物不在表中: {food}")
+        return row
+
+    # ---------- 名称索引（线性探测的开放寻址散列表） ----------
+
+    def _build_index(self):
+        """按需建立 小写名称 -> 行号 的索引（同名时以后出现的为准）"""
+        size = 8
+        while size < 2 * len(self):
+            size *= 2
+        slots = array(_SLOT_TYPE, [0]) * size
+        mask = size - 1
+        count = 0
+        # 建立期间临时保留小写名称，冲突时不必重新解码
+        keys = [name.lower() for name in self.names]
+        for row, key in enumerate(keys, 1):
+            i = hash(key) & mask
+            while True:
+                other = slots[i]
+                if not other:
+                    count += 1
+                    break
+                if keys[other - 1] == key:
+                    break
+                i = (i + 1) & mask
+            slots[i] = row
+        self._index = slots
+        self._index_count = count
+
+    def _probe(self, key):
+        """返回key所在的槽，不存在时返回探测到的第一个空槽"""
+        slots = self._index
+        mask = len(slots) - 1
+        i = hash(key) & mask
+        while True:
+            other = slots[i]
+            if not other or self._key(other - 1) == key:
+                return i
+            i = (i + 1) & mask
+
+    def _index_set(self, key, row):
+        """把key指向row（已存在时替换原来的行号）"""
+        i = self._probe(key)
+        if not self._index[i]:
+            self._index_count += 1
+        self._index[i] = row + 1
+        if self._index_count * 2 > len(self._index):
+            self._resize_index()
+
+    def _resize_index(self):
+        """散列表扩大一倍，重新放入原有的项（保持每个名称当前指向的行号）"""
+        rows = [slot - 1 for slot in self._index if slot]
+        self._index = array(_SLOT_TYPE, [0]) * (len(self._index) * 2)
+        for row in rows:
+            self._index[self._probe(self._key(row))] = row + 1
+
+    def _index_discard(self, key, row):
+        """删除 key -> row 的索引项（key指向其他行时保留）"""
+        slots = self._index
+        mask = len(slots) - 1
+        i = self._probe(key)
+        if slots[i] != row + 1:
+            return
+        # 向后移位删除：把后面探测链上的项前移填补空槽，保证它们仍然能被找到
+        self._index_count -= 1
+        j = i
+        while True:
+            slots[i] = 0
+            while True:
+                j = (j + 1) & mask
+                other = slots[j]
+                if not other:
+                    return
+                home = hash(self._key(other - 1)) & mask
+                # home在循环区间(i, j]内时该项留在原处
+                if (i < home <= j) if i <= j else (home > i or home <= j):
+                    continue
+                slots[i] = other
+                i = j
+                break
+
+    # ---------- 按名称查找 ----------
+
+    def find_index(self, name):
+        """按名称（不区分大小写）查找行号，未找到返回None"""
+        if self._index is None:
+            self._build_index()
+        slot = self._index[self._probe(name.lower())]
+        return slot - 1 if slot else None
+
+    def find(self, name):
+        """按名称（不区分大小写）查找食物，未找到返回None"""
+        row = self.find_index(name)
+        return FoodRow(self, row) if row is not None else None
+
+    def has_name(self, name):
+        """检查名称是否存在（不区分大小写）"""
+        return self.find_index(name) is not None
+
+    def search(self, query):
+        """返回名称包含query（不区分大小写）的所有食物"""
+        query = query.lower()
+        if not query:
+            return list(self)
+        if self._ascii_lower is None:
+            text = str(self._blob, 'utf-8')
+            self._ascii_lower = text.lower().encode('utf-8') == bytes(self._blob).lower()
+        if not self._ascii_lower:
+            return [FoodRow(self, row) for row, name in enumerate(self.names) if query in name.lower()]
+
+        # 名称的小写只影响ASCII字符时，直接在小写的名称区上查找，再按偏移量换算成行号
+        haystack = bytes(self._blob).lower()
+        needle = query.encode('utf-8')
+        offsets = self._offsets
+        rows = []
+        pos = haystack.find(needle)
+        while pos != -1:
+            row = bisect_right(offsets, pos) - 1
+            end = offsets[row + 1]
+            if pos + len(needle) <= end:
+                rows.append(FoodRow(self, row))
+                pos = haystack.find(needle, end)
+            else:
+                pos = haystack.find(needle, pos + 1)
+        return rows
+
+    # ---------- 按列访问 ----------
+
+    @property
+    def names(self):
+        """名称列（只读视图）"""
+        return FoodNames(self)
+
+    def column(self, field):
+        """获取数值列（array('d')或只读memoryview，缺失值为NaN）"""
+        return self._columns[field]
+
+    def buffers(self):
+        """
+        返回底层数据 (名称区, 偏移量, 整数标记, 附加字段)，用于生成二进制快照
+
+        返回的对象与表共享，只能读取
+        """
+        return self._blob, self._offsets, self._int_flags, self._extras
+
+    def to_records(self):
+        """转换为字典列表（用于JSON序列化，按列一次性生成，不经过FoodRow）"""
+        records = []
+        append = records.append
+        columns = [self._columns[field] for field in NUMERIC_FIELDS]
+        for name, carb, protein, fat in zip(self.names, *columns):
+            food = {'name': name}
+            # NaN表示缺失（NaN != NaN）
+            if carb == carb:
+                food['carb_100g'] = carb
+            if protein == protein:
+                food['protein_100g'] = protein
+            if fat == fat:
+                food['fat_100g'] = fat
+            append(food)
+        if self._int_flags is not None:
+            for food, bits in zip(records, self._int_flags):
+                if bits:
+                    for field, bit in FIELD_BITS.items():
+                        if bits & bit:
+                            food[field] = int(food[field])
+        for row, extras in self._extras.items():
+            records[row].update(extras)
+        return records
+
+    def __repr__(self):
+        return f"FoodTable({len(self)} foods)"
+
+
+def to_food_records(foods):
+    """将FoodTable、FoodRow列表或字典列表统一转换为字典列表"""
+    if isinstance(foods, FoodTable):
+        return foods.to_records()
+    return [food if type(food) is dict else dict(food) for food in foods]
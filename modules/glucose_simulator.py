@@ -0,0 +1,233 @@
+"""
+血糖预测模块
+把碳水吸收曲线（按食物分为快/中/慢）、RSI/ISF和胰岛素作用曲线组合起来，
+在固定时间网格上预测血糖变化；多个方案（不同剂量、注射时间）在一次调用中批量计算
+
+模型：血糖(t) = 当前血糖 + RSI × 到t为止吸收的碳水 - ISF × 到t为止起作用的胰岛素，
+每个网格间隔内的吸收量/作用量由事件脉冲序列与缓存的曲线做卷积得到，再累加得到血糖曲线
+"""
+
+import datetime
+import functools
+import math
+from modules.insulin_calculation import get_numpy
+from modules.insulin_on_board import (
+    iob_fraction, get_iob_kernel, load_dose_log, to_minutes, recent_doses,
+    DEFAULT_DIA_HOURS, DEFAULT_PEAK_MINUTES, DEFAULT_CURVE
+)
+
+
+# 碳水完全吸收所需的小时数
+ABSORPTION_HOURS = {'fast': 2.0, 'medium': 3.0, 'slow': 4.0}
+DEFAULT_ABSORPTION = 'medium'
+# 每克碳水对应的蛋白质+脂肪超过这些比例时，按中速/慢速吸收
+MEDIUM_ABSORPTION_RATIO = 0.2
+SLOW_ABSORPTION_RATIO = 0.6
+
+# 低于这个值（mmol/L）视为低血糖
+HYPO_THRESHOLD = 3.9
+
+
+def food_absorption(food):
+    """
+    按食物成分判断碳水吸收速度
+
+    食物中有 absorption 字段（fast/medium/slow）时直接使用，
+    否则按每克碳水对应的蛋白质和脂肪含量估计（蛋白质和脂肪延缓吸收）
+
+    返回:
+        str: 'fast'、'medium' 或 'slow'
+    """
+    absorption = food.get('absorption')
+    if absorption in ABSORPTION_HOURS:
+        return absorption
+    carb = food.get('carb_100g')
+    if carb is None or math.isnan(carb) or carb <= 0:
+        return DEFAULT_ABSORPTION
+    others = sum(value for value in (food.get('protein_100g'), food.get('fat_100g'))
+                 if value is not None and not math.isnan(value))
+    ratio = others / carb
+    if ratio >= SLOW_ABSORPTION_RATIO:
+        return 'slow'
+    if ratio >= MEDIUM_ABSORPTION_RATIO:
+        return 'medium'
+    return 'fast'
+
+
+def absorbed_fraction(minutes, absorption_hours):
+    """进食后minutes分钟时已吸收的碳水比例（抛物线吸收曲线，吸收速度在一半时间时最快）"""
+    duration = absorption_hours * 60
+    if minutes <= 0:
+        return 0.0
+    if minutes >= duration:
+        return 1.0
+    return 1 - iob_fraction(minutes, duration, duration / 2, 'bilinear')
+
+
+def _steps(values):
+    """把累计比例曲线转换为每个网格间隔内的增量（第0项为0，之后的增量都为0）"""
+    return [0.0] + [values[j] - values[j - 1] for j in range(1, len(values))]
+
+
+@functools.lru_cache(maxsize=32)
+def get_absorption_kernel(absorption_hours, step_minutes):
+    """每个网格间隔内吸收的碳水比例（按参数缓存，安装了numpy时为只读数组，否则为tuple）"""
+    count = int(math.ceil(absorption_hours * 60 / step_minutes)) + 1
+    return _freeze(_steps([absorbed_fraction(j * step_minutes, absorption_hours) for j in range(count)]))
+
+
+@functools.lru_cache(maxsize=32)
+def get_action_kernel(dia_hours, peak_minutes, curve, step_minutes):
+    """每个网格间隔内起作用的胰岛素比例（由缓存的IOB曲线得到）"""
+    iob = list(get_iob_kernel(dia_hours * 60, peak_minutes, curve, step_minutes)) + [0.0]
+    return _freeze(_steps([1 - value for value in iob]))
+
+
+def _freeze(kernel):
+    np = get_numpy()
+    if np is None:
+        return tuple(kernel)
+    kernel = np.array(kernel)
+    kernel.setflags(write=False)
+    return kernel
+
+
+def _simulate_python(events, kernels, scenario_count, pad, count):
+    """simulate_glucose的纯Python实现（没有numpy时使用），返回每个方案的累计效应"""
+    effects = [[0.0] * (count + pad) for _ in range(scenario_count)]
+    for scenario, position, amount, kernel_key in events:
+        kernel = kernels[kernel_key]
+        effect = effects[scenario]
+        for i in range(max(position, 0), min(position + len(kernel), count + pad)):
+            effect[i] += amount * kernel[i - position]
+    for effect in effects:
+        total = 0.0
+        for i, value in enumerate(effect):
+            total += value
+            effect[i] = total
+    return effects
+
+
+def simulate_glucose(scenarios, start_glucose, rsi_value, isf_value, hours=6, step_minutes=5,
+                     dia_hours=DEFAULT_DIA_HOURS, peak_minutes=DEFAULT_PEAK_MINUTES, curve=DEFAULT_CURVE):
+    """
+    批量预测多个方案的血糖曲线
+
+    时间以分钟表示，0为当前时刻；之前的进食和注射（负数时间）只计入从现在开始的剩余效应
+
+    参数:
+        scenarios: 方案列表，每个方案为字典：
+            carbs: [(时间, 碳水克数, 吸收速度)]，吸收速度为 fast/medium/slow 或吸收所需小时数
+            doses: [(时间, 剂量U)]
+        start_glucose: 当前血糖(mmol/L)
+        rsi_value, isf_value: 校准得到的RSI和ISF
+        hours: 预测时长（小时）
+        step_minutes: 网格间隔（分钟）
+
+    返回:
+        tuple: (时间点, 血糖)，血糖每行对应一个方案；安装了numpy时为numpy数组，否则为list
+
+    异常:
+        ValueError: 吸收速度或曲线参数无效
+    """
+    count = int(math.floor(hours * 60 / step_minutes)) + 1
+    action_kernel = get_action_kernel(dia_hours, peak_minutes, curve, step_minutes)
+    kernels = {'insulin': action_kernel}
+
+    # (方案, 网格位置, 血糖效应系数, 曲线)
+    events = []
+    for index, scenario in enumerate(scenarios):
+        for minutes, grams, absorption in scenario.get('carbs', ()):
+            absorption_hours = ABSORPTION_HOURS.get(absorption, absorption)
+            if not isinstance(absorption_hours, (int, float)) or not absorption_hours > 0:
+                raise ValueError(f"无效的吸收速度: {absorption}")
+            key = float(absorption_hours)
+            if key not in kernels:
+                kernels[key] = get_absorption_kernel(key, step_minutes)
+            events.append((index, minutes, grams * rsi_value, key))
+        for minutes, units in scenario.get('doses', ()):
+            events.append((index, minutes, -units * isf_value, 'insulin'))
+
+    # 在网格前面补上最长曲线的长度，让之前的事件也能计入
+    pad = max(len(kernel) for kernel in kernels.values())
+    events = [(index, round(minutes / step_minutes) + pad, amount, key)
+              for index, minutes, amount, key in events]
+    events = [event for event in events if event[1] < count + pad]
+
+    np = get_numpy()
+    if np is None:
+        effects = _simulate_python(events, kernels, len(scenarios), pad, count)
+        times = [i * step_minutes for i in range(count)]
+        glucose = [[start_glucose + value - effect[pad] for value in effect[pad:]] for effect in effects]
+        return times, glucose
+
+    # 所有方案、所有曲线的卷积在频域中累加，最后只做一次逆变换
+    length = count + pad
+    size = 1 << (length + pad - 2).bit_length()
+    spectrum = None
+    for key, kernel in kernels.items():
+        selected = [event for event in events if event[3] == key and event[1] >= 0]
+        if not selected:
+            continue
+        impulses = np.zeros((len(scenarios), length))
+        rows, positions, amounts, _ = zip(*selected)
+        np.add.at(impulses, (np.array(rows), np.array(positions)), np.array(amounts))
+        product = np.fft.rfft(impulses, size, axis=1) * np.fft.rfft(kernel, size)
+        spectrum = product if spectrum is None else spectrum + product
+    if spectrum is None:
+        rates = np.zeros((len(scenarios), length))
+    else:
+        rates = np.fft.irfft(spectrum, size, axis=1)[:, :length]
+    effects = np.cumsum(rates, axis=1)[:, pad:]
+    glucose = start_glucose + effects - effects[:, :1]
+    return np.arange(count) * step_minutes, glucose
+
+
+def meal_carb_entries(items, foods=None):
+    """
+    把calculate_meal结果中的食物明细转换为simulate_glucose的碳水事件（现在进食）
+
+    参数:
+        items: [{"name", "total_carb"}]
+        foods: 已加载的FoodTable（可选，否则按名称查找）
+
+    返回:
+        list: [(0, 碳水克数, 吸收速度)]
+    """
+    if foods is None:
+        from modules.food_input import find_foods
+        found = find_foods([item["name"] for item in items])
+        rows = [found.get(item["name"].lower()) for item in items]
+    else:
+        rows = [foods.find(item["name"]) for item in items]
+    return [(0, item["total_carb"], food_absorption(row) if row is not None else DEFAULT_ABSORPTION)
+            for item, row in zip(items, rows)]
+
+
+def dose_scenarios(carbs, doses, past_doses=()):
+    """
+    为同一餐的多个候选剂量生成方案（现在注射）
+
+    参数:
+        carbs: 碳水事件列表（见meal_carb_entries）
+        doses: 候选剂量列表(U)
+        past_doses: 之前的注射 [(时间, 剂量)]，每个方案都计入
+
+    返回:
+        list: simulate_glucose的方案列表
+    """
+    past_doses = list(past_doses)
+    return [{"carbs": carbs, "doses": past_doses + ([(0, dose)] if dose > 0 else [])} for dose in doses]
+
+
+def logged_dose_entries(now=None, log=None, dia_hours=DEFAULT_DIA_HOURS):
+    """
+    注射记录中仍在起作用的注射，转换为simulate_glucose的注射事件
+
+    返回:
+        list: [(时间, 剂量)]，时间为相对now的分钟数（负数）
+    """
+    now_minutes = to_minutes(now or datetime.datetime.now())
+    log = load_dose_log() if log is None else log
+    dose_minutes, dose_units = recent_doses(log, now_minutes, dia_hours * 60)
+    return [(minutes - now_minutes, units) for minutes, units in zip(dose_minutes, dose_units)]
@@ -3,32 +3,33 @@
 提供食物数据加载、ISF数据加载和胰岛素剂量计算功能
 """
 
-from utils.file_utils import load_json
+import math
+from utils.file_utils import load_json, load_json_batch
 from modules.isf_calibration import load_rsi_data
+# 食物数据统一由food_input模块加载（自动选择JSON或SQLite存储）
+from modules.food_input import load_food_data
 
 
-def load_food_data():
+def load_isf_data():
     """
-    加载食物数据从JSON文件
+    加载胰岛素敏感因子(ISF)数据从JSON文件
 
     返回:
-        list: 包含食物信息的字典列表，如果文件不存在或读取失败则返回空列表
+        dict: 包含ISF值的字典，如果文件不存在则返回None
     """
-    # 从foods_data.json文件加载食物数据
-    data = load_json('foods_data.json')
-    # 如果数据加载成功则返回数据，否则返回空列表
-    return data if data is not None else []
+    # 从isf_data.json文件加载ISF数据
+    return load_json('isf_data.json')
 
 
-def load_isf_data():
+def load_calibration_data():
     """
-    加载胰岛素敏感因子(ISF)数据从JSON文件
+    一次批量加载RSI和ISF校准数据
 
     返回:
-        dict: 包含ISF值的字典，如果文件不存在则返回None
+        tuple: (rsi_data, isf_data)，未校准的为None
     """
-    # 从isf_data.json文件加载ISF数据
-    return load_json('isf_data.json')
+    data = load_json_batch(['rsi_data.json', 'isf_data.json'])
+    return data['rsi_data.json'], data['isf_data.json']
 
 
 def calculate_insulin_dose(food, weight, rsi_value, isf_value):
@@ -61,81 +62,168 @@ def calculate_insulin_dose(food, weight, rsi_value, isf_value):
     return total_carb, estimated_blood_sugar_rise, insulin_dose
 
 
+_numpy = None
+
+
+def get_numpy():
+    """按需导入numpy（命令行和Tk界面启动时不导入），未安装时返回None"""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = False
+    return _numpy or None
+
+
+def set_numpy_enabled(enabled):
+    """enabled为False时不再使用numpy（强制纯Python实现，用于基准测试对比），为True时恢复按需导入"""
+    global _numpy
+    _numpy = None if enabled else False
+
+
+def _as_column(values):
+    """把批量计算的参数整理为列表，单个数值返回None（表示广播到所有行）"""
+    if not hasattr(values, '__iter__'):
+        return None
+    return [float(value) for value in values]
+
+
+def _divide(numerator, denominator):
+    """与numpy相同的除法：除数为0时得到±inf（0/0为nan），不抛出异常"""
+    if denominator:
+        return numerator / denominator
+    if numerator != numerator or not numerator:
+        return float('nan')
+    return math.copysign(float('inf'), numerator) * math.copysign(1.0, denominator)
+
+
+def _calculate_doses_python(carb_100g, weights, rsi_values, isf_values):
+    """calculate_insulin_doses的纯Python实现（没有numpy时使用）"""
+    arguments = (carb_100g, weights, rsi_values, isf_values)
+    columns = [_as_column(values) for values in arguments]
+    lengths = {len(column) for column in columns if column is not None}
+    if len(lengths) > 1:
+        raise ValueError(f"批量计算的参数长度不一致: {sorted(lengths)}")
+    count = lengths.pop() if lengths else 1
+    carb, weight, rsi, isf = [column if column is not None else [float(value)] * count
+                              for column, value in zip(columns, arguments)]
+
+    # 与calculate_insulin_dose相同的运算顺序，结果完全一致
+    total_carb = [c / 100 * w for c, w in zip(carb, weight)]
+    blood_sugar_rise = [t * r for t, r in zip(total_carb, rsi)]
+    insulin_dose = [_divide(b, i) for b, i in zip(blood_sugar_rise, isf)]
+    return total_carb, blood_sugar_rise, insulin_dose
+
+
+def calculate_insulin_doses(carb_100g, weights, rsi_values, isf_values, use_numpy=True):
+    """
+    批量计算胰岛素注射剂量（整份菜单、多位患者的报表等）
+
+    与逐行调用calculate_insulin_dose的结果相同，但一次完成所有行的计算；
+    每个参数可以是序列（list、numpy数组、FoodTable.column()返回的array等，长度必须相同）
+    或单个数值（所有行使用同一个值，例如同一位患者的RSI/ISF）
+
+    参数:
+        carb_100g: 每100g碳水含量
+        weights: 摄入重量(克)
+        rsi_values: 碳水化合物敏感系数(RSI)
+        isf_values: 胰岛素敏感因子(ISF)；为0的行剂量为inf（0/0为nan）
+        use_numpy: 为False时强制使用纯Python实现
+
+    返回:
+        tuple: (total_carb, estimated_blood_sugar_rise, insulin_dose)，
+               安装了numpy时为numpy数组，否则为list
+
+    异常:
+        ValueError: 序列参数的长度不一致
+    """
+    np = get_numpy() if use_numpy else None
+    if np is None:
+        return _calculate_doses_python(carb_100g, weights, rsi_values, isf_values)
+
+    carb, weight, rsi, isf = [np.asarray(values, dtype=np.float64)
+                              for values in (carb_100g, weights, rsi_values, isf_values)]
+    if carb.ndim == weight.ndim == rsi.ndim == isf.ndim == 0:
+        carb = carb.reshape(1)
+    try:
+        total_carb = carb / 100 * weight
+        blood_sugar_rise = total_carb * rsi
+        with np.errstate(divide='ignore', invalid='ignore'):
+            insulin_dose = blood_sugar_rise / isf
+    except ValueError as e:
+        # numpy广播失败（长度不一致）
+        raise ValueError(f"批量计算的参数长度不一致: {e}")
+    return total_carb, blood_sugar_rise, insulin_dose
+
+
 def calculate_insulin():
     """
     命令行界面的胰岛素计算主函数
 
     功能流程:
-    1. 加载食物数据
-    2. 用户输入食物名称和重量
-    3. 加载RSI和ISF校准数据
-    4. 计算胰岛素剂量
-    5. 显示计算结果
+    1. 加载食物表（只加载一次）
+    2. 用户依次输入一餐中的食物名称和重量（直接回车结束）
+    3. 一次加载RSI和ISF校准数据并计算整餐剂量，扣除仍在起作用的胰岛素(IOB)
+    4. 显示每种食物的明细和整餐结果，并可记录本次注射
 
     异常处理:
-        - 处理食物数据加载失败情况
+        - 处理食物数据为空的情况
         - 处理食物未找到情况
         - 处理用户输入无效数字情况
         - 处理校准数据缺失情况
     """
-    print("\n=== 计算胰岛素注射剂量 ===")
+    from modules.meal import Meal, format_meal_result
+    from modules.insulin_on_board import record_dose
 
-    # 加载食物数据
-    foods_data = load_food_data()
+    print("\n=== 计算胰岛素注射剂量 ===")
 
-    # 检查食物数据是否加载成功
-    if not foods_data:
+    # 整个计算过程只加载一次食物表，之后每种食物都在它的名称索引中查找
+    foods = load_food_data()
+    if not foods:
         print("没有找到食物数据，请先录入食物信息")
         return
 
-    # 获取用户输入的食物名称
-    food_name = input("请输入食物名称: ").strip()
-
-    # 在食物数据中搜索匹配的食物
-    selected_food = None
-    for food in foods_data:
-        # 不区分大小写比较食物名称
-        if food['name'].lower() == food_name.lower():
-            selected_food = food
-            break
-
-    # 如果未找到指定食物，提示用户并退出
-    if not selected_food:
-        print(f"未找到食物: {food_name}")
-        return
-
-    try:
-        # 获取用户输入的食物重量并转换为浮点数
-        weight = float(input(f"请输入摄入{selected_food['name']}的重量(克): ").strip())
-    except ValueError:
-        # 处理输入非数字的情况
-        print("请输入有效的数字")
+    meal = Meal()
+    while True:
+        # 获取用户输入的食物名称，第二种食物起可以直接回车结束输入
+        prompt = "请输入食物名称: " if not meal else "请输入下一种食物名称（直接回车开始计算）: "
+        food_name = input(prompt).strip()
+        if not food_name:
+            if meal:
+                break
+            continue
+
+        # 按名称查找匹配的食物（不区分大小写）
+        selected_food = foods.find(food_name)
+
+        # 如果未找到指定食物，提示用户重新输入
+        if not selected_food:
+            print(f"未找到食物: {food_name}")
+            continue
+
+        try:
+            # 获取用户输入的食物重量并加入本餐
+            meal.add(selected_food, input(f"请输入摄入{selected_food['name']}的重量(克): ").strip())
+        except ValueError:
+            # 处理输入非数字或不大于0的情况
+            print("请输入有效的数字")
+
+    # 一次加载校准数据，计算整餐剂量和每种食物的明细
+    result = meal.calculate()
+    if not result["success"]:
+        print(result["error"])
         return
 
-    # 加载RSI(碳水化合物敏感系数)校准数据
-    rsi_data = load_rsi_data()
-    if rsi_data is None:
-        print("未找到RSI校准数据,请先进行RSI校准")
-        return
-
-    # 加载ISF(胰岛素敏感因子)校准数据
-    isf_data = load_isf_data()
-    if isf_data is None:
-        print("未找到ISF校准数据,请先进行ISF校准")
-        return
-
-    # 从校准数据中提取RSI和ISF值
-    rsi_value = rsi_data['rsi_value']
-    isf_value = isf_data['isf_value']
-
-    # 调用计算函数获取结果
-    total_carb, blood_sugar_rise, insulin_dose = calculate_insulin_dose(
-        selected_food, weight, rsi_value, isf_value
-    )
-
     # 格式化输出计算结果
     print(f"\n计算结果:")
-    print(f"{weight}g {selected_food['name']}的碳水含量: {total_carb:.2f}g")
-    print(f"预计血糖升高值: {blood_sugar_rise:.2f} mmol/L")
-    print(f"胰岛素注射剂量: {insulin_dose:.2f} U")
-    print(f"(基于RSI值: {rsi_value})")
\ No newline at end of file
+    print(format_meal_result(result))
+
+    # 记录注射后，之后的计算会扣除这次注射的IOB
+    if result["net_dose"] > 0:
+        answer = input(f"是否记录本次注射 {result['net_dose']:.2f} U？(y/n): ").strip().lower()
+        if answer == 'y':
+            note = "、".join(item["name"] for item in result["items"])
+            if record_dose(result["net_dose"], note=note):
+                print("注射记录已保存")
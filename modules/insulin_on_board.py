@@ -0,0 +1,229 @@
+"""
+活性胰岛素(IOB)模块
+记录每次注射的剂量，按胰岛素作用曲线计算仍在起作用的胰岛素量，
+计算剂量时从本餐所需剂量中扣除，避免叠加注射
+
+支持两种作用曲线（IOB为注射后t分钟时剩余的比例）：
+- exponential: 指数曲线（Loop/OpenAPS使用的模型，由作用时间DIA和峰值时间决定）
+- bilinear: 双线性曲线（作用强度呈三角形，在峰值时间最强，DIA时降为0）
+"""
+
+import bisect
+import datetime
+import functools
+import math
+from utils.file_utils import load_json, append_json_items
+from utils.settings import get_setting, get_float_setting
+from modules.insulin_calculation import get_numpy
+
+
+DOSE_LOG_FILENAME = 'dose_log.json'
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# 作用时间(小时)、峰值时间(分钟)和曲线类型，可通过配置项 INSULIN_DIA_HOURS 等修改
+DEFAULT_DIA_HOURS = get_float_setting('DIA_HOURS', 4.0)
+DEFAULT_PEAK_MINUTES = get_float_setting('PEAK_MINUTES', 75.0)
+DEFAULT_CURVE = get_setting('IOB_CURVE', 'exponential')
+CURVES = ('exponential', 'bilinear')
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+
+def _check_curve(curve, dia_minutes, peak_minutes):
+    """检查曲线参数，参数无效时抛出ValueError"""
+    if curve not in CURVES:
+        raise ValueError(f"未知的作用曲线: {curve}（可选: {', '.join(CURVES)}）")
+    if not dia_minutes > 0:
+        raise ValueError("作用时间必须大于0")
+    if not 0 < peak_minutes < dia_minutes:
+        raise ValueError("峰值时间必须大于0且小于作用时间")
+    if curve == 'exponential' and not peak_minutes < dia_minutes / 2:
+        raise ValueError("指数曲线的峰值时间必须小于作用时间的一半")
+
+
+def iob_fraction(minutes, dia_minutes, peak_minutes=DEFAULT_PEAK_MINUTES, curve=DEFAULT_CURVE):
+    """
+    注射后minutes分钟时仍然起作用的胰岛素比例（注射前为0，注射时为1，DIA之后为0）
+
+    异常:
+        ValueError: 曲线类型或参数无效
+    """
+    _check_curve(curve, dia_minutes, peak_minutes)
+    if minutes < 0 or minutes >= dia_minutes:
+        return 0.0
+    t, td, tp = minutes, dia_minutes, peak_minutes
+    if curve == 'bilinear':
+        # 三角形作用强度曲线下已作用部分的面积
+        if t <= tp:
+            return 1 - t * t / (td * tp)
+        return (td - t) ** 2 / (td * (td - tp))
+    tau = tp * (1 - tp / td) / (1 - 2 * tp / td)
+    a = 2 * tau / td
+    s = 1 / (1 - a + (1 + a) * math.exp(-td / tau))
+    return 1 - s * (1 - a) * ((t * t / (tau * td * (1 - a)) - t / tau - 1) * math.exp(-t / tau) + 1)
+
+
+@functools.lru_cache(maxsize=32)
+def get_iob_kernel(dia_minutes, peak_minutes=DEFAULT_PEAK_MINUTES, curve=DEFAULT_CURVE, step_minutes=1.0):
+    """
+    预先计算作用曲线在时间网格上的取值（按参数缓存）
+
+    返回:
+        numpy数组（未安装numpy时为tuple），第j个元素为注射后j*step_minutes分钟时的IOB比例，
+        最后一个元素之后均为0
+    """
+    _check_curve(curve, dia_minutes, peak_minutes)
+    count = int(math.ceil(dia_minutes / step_minutes))
+    kernel = [iob_fraction(j * step_minutes, dia_minutes, peak_minutes, curve) for j in range(count)]
+    np = get_numpy()
+    if np is None:
+        return tuple(kernel)
+    kernel = np.array(kernel)
+    # 缓存的数组被所有调用方共享，禁止修改
+    kernel.setflags(write=False)
+    return kernel
+
+
+def iob_timeline(dose_minutes, dose_units, start, end, step_minutes=1.0,
+                 dia_hours=DEFAULT_DIA_HOURS, peak_minutes=DEFAULT_PEAK_MINUTES, curve=DEFAULT_CURVE):
+    """
+    计算一段时间内每个时间点的IOB（所有注射一次完成）
+
+    注射时间对齐到最近的网格点；所有注射先累加成网格上的脉冲序列，
+    再与缓存的作用曲线做一次卷积，耗时与注射次数基本无关
+
+    参数:
+        dose_minutes: 每次注射的时间（分钟，与start/end使用相同的起点）
+        dose_units: 每次注射的剂量(U)
+        start, end: 时间范围（分钟，包含两端）
+        step_minutes: 网格间隔（分钟）
+
+    返回:
+        tuple: (时间点, IOB)，安装了numpy时为numpy数组，否则为list
+
+    异常:
+        ValueError: 参数长度不一致或曲线参数无效
+    """
+    dia_minutes = dia_hours * 60
+    kernel = get_iob_kernel(dia_minutes, peak_minutes, curve, step_minutes)
+    count = int(math.floor((end - start) / step_minutes)) + 1
+    span = len(kernel) - 1
+    np = get_numpy()
+
+    if np is None:
+        times = [start + i * step_minutes for i in range(count)]
+        units = [float(value) for value in dose_units]
+        positions = [round((t - start) / step_minutes) for t in dose_minutes]
+        if len(units) != len(positions):
+            raise ValueError("注射时间和剂量的数量不一致")
+        iob = [0.0] * count
+        for position, value in zip(positions, units):
+            for i in range(max(position, 0), min(position + span + 1, count)):
+                iob[i] += value * kernel[i - position]
+        return times, iob
+
+    dose_minutes = np.asarray(dose_minutes, dtype=np.float64)
+    dose_units = np.asarray(dose_units, dtype=np.float64)
+    if dose_minutes.shape != dose_units.shape:
+        raise ValueError("注射时间和剂量的数量不一致")
+    times = start + np.arange(count) * step_minutes
+    # 在网格前面补上一个作用时间的长度，让开始之前的注射也能计入
+    positions = np.rint((dose_minutes - start) / step_minutes).astype(np.int64) + span
+    inside = (positions >= 0) & (positions < count + span)
+    impulses = np.bincount(positions[inside], weights=dose_units[inside], minlength=count + span)
+    iob = np.convolve(impulses, kernel, mode='valid')
+    return times, iob
+
+
+def insulin_on_board(dose_minutes, dose_units, at, dia_hours=DEFAULT_DIA_HOURS,
+                     peak_minutes=DEFAULT_PEAK_MINUTES, curve=DEFAULT_CURVE):
+    """计算某一时刻的IOB（单个时间点，直接按曲线公式计算）"""
+    dia_minutes = dia_hours * 60
+    return sum(units * iob_fraction(at - minutes, dia_minutes, peak_minutes, curve)
+               for minutes, units in zip(dose_minutes, dose_units))
+
+
+def to_minutes(timestamp):
+    """把时间戳字符串或datetime转换为分钟数（本地时间，从1970-01-01起算）"""
+    if isinstance(timestamp, str):
+        timestamp = datetime.datetime.strptime(timestamp, TIMESTAMP_FORMAT)
+    return (timestamp - _EPOCH).total_seconds() / 60
+
+
+def load_dose_log():
+    """
+    加载注射记录
+
+    返回:
+        list: [{"timestamp": "年-月-日 时:分:秒", "units": 剂量, "note": 备注}]，按时间排序；没有记录时为空列表
+    """
+    log = load_json(DOSE_LOG_FILENAME) or []
+    return sorted(log, key=lambda entry: entry['timestamp'])
+
+
+def record_dose(units, timestamp=None, note=""):
+    """
+    记录一次注射
+
+    参数:
+        units: 剂量(U)，必须大于0
+        timestamp: 注射时间（datetime或时间戳字符串），默认为当前时间
+        note: 备注（例如食物名称）
+
+    返回:
+        bool: 保存成功返回True
+    """
+    units = float(units)
+    if not units > 0:
+        print("注射剂量必须大于0")
+        return False
+    if timestamp is None:
+        timestamp = datetime.datetime.now()
+    if not isinstance(timestamp, str):
+        timestamp = timestamp.strftime(TIMESTAMP_FORMAT)
+    entry = {"timestamp": timestamp, "units": round(units, 2), "note": note}
+    return append_json_items(DOSE_LOG_FILENAME, [entry]) is not None
+
+
+def recent_doses(log, now_minutes, dia_minutes):
+    """取出作用时间内的注射（log已按时间排序），返回 (时间列表, 剂量列表)"""
+    earliest = (_EPOCH + datetime.timedelta(minutes=now_minutes - dia_minutes)).strftime(TIMESTAMP_FORMAT)
+    recent = log[bisect.bisect_left([entry['timestamp'] for entry in log], earliest):]
+    return [to_minutes(entry['timestamp']) for entry in recent], [entry['units'] for entry in recent]
+
+
+def get_insulin_on_board(now=None, log=None, dia_hours=DEFAULT_DIA_HOURS,
+                         peak_minutes=DEFAULT_PEAK_MINUTES, curve=DEFAULT_CURVE):
+    """
+    根据注射记录计算当前的IOB
+
+    参数:
+        now: 计算的时刻（datetime），默认为当前时间
+        log: 已加载的注射记录，默认读取dose_log.json
+
+    返回:
+        float: 仍在起作用的胰岛素(U)
+    """
+    now_minutes = to_minutes(now or datetime.datetime.now())
+    log = load_dose_log() if log is None else log
+    dose_minutes, dose_units = recent_doses(log, now_minutes, dia_hours * 60)
+    return insulin_on_board(dose_minutes, dose_units, now_minutes, dia_hours, peak_minutes, curve)
+
+
+def get_iob_timeline(hours_before=24, hours_after=None, now=None, log=None, step_minutes=1.0,
+                     dia_hours=DEFAULT_DIA_HOURS, peak_minutes=DEFAULT_PEAK_MINUTES, curve=DEFAULT_CURVE):
+    """
+    根据注射记录计算从hours_before小时前到hours_after小时后（默认为一个作用时间）的IOB曲线
+
+    返回:
+        tuple: (时间点datetime列表, IOB)
+    """
+    now_minutes = to_minutes(now or datetime.datetime.now())
+    if hours_after is None:
+        hours_after = dia_hours
+    start = now_minutes - hours_before * 60
+    log = load_dose_log() if log is None else log
+    dose_minutes, dose_units = recent_doses(log, start, dia_hours * 60)
+    times, iob = iob_timeline(dose_minutes, dose_units, start, now_minutes + hours_after * 60,
+                              step_minutes, dia_hours, peak_minutes, curve)
+    return [_EPOCH + datetime.timedelta(minutes=float(t)) for t in times], iob
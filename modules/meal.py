@@ -0,0 +1,191 @@
+"""
+多食物餐食计算模块
+一餐包含多种食物及其重量，校准数据和食物数据只加载一次，
+通过批量剂量计算同时得到整餐的剂量和每种食物的明细，
+并扣除仍在起作用的胰岛素(IOB)得到实际注射剂量
+"""
+
+import math
+from modules.food_input import find_foods
+from modules.insulin_calculation import load_calibration_data, calculate_insulin_doses
+from modules.insulin_on_board import get_insulin_on_board
+
+
+class Meal:
+    """
+    一餐：食物和摄入重量的列表
+
+    食物可以是名称（计算时在食物数据中查找，不区分大小写）
+    或包含 name 和 carb_100g 的食物字典（例如FoodTable.find返回的行）
+    """
+
+    def __init__(self, items=()):
+        self.items = []
+        for food, weight in items:
+            self.add(food, weight)
+
+    def add(self, food, weight):
+        """
+        添加一种食物
+
+        异常:
+            ValueError: 重量不是大于0的数字
+        """
+        weight = float(weight)
+        if not weight > 0:
+            raise ValueError("重量必须大于0")
+        self.items.append((food, weight))
+
+    def remove(self, index):
+        """删除第index种食物"""
+        del self.items[index]
+
+    def clear(self):
+        self.items.clear()
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __bool__(self):
+        return bool(self.items)
+
+    def __repr__(self):
+        return f"Meal({self.items!r})"
+
+    def calculate(self, foods=None, rsi_value=None, isf_value=None, iob=None):
+        """计算整餐剂量，参数和返回值见calculate_meal"""
+        return calculate_meal(self, foods, rsi_value, isf_value, iob)
+
+
+def _food_name(food):
+    return food if isinstance(food, str) else food['name']
+
+
+def _positive_value(value):
+    """校准值转换为float，不是大于0的有限数字时返回None"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if 0 < value < math.inf else None
+
+
+def calculate_meal(meal, foods=None, rsi_value=None, isf_value=None, iob=None):
+    """
+    计算一餐的胰岛素剂量
+
+    所有食物一次查找（传入foods时使用已加载的食物表，否则只扫描一遍食物数据），
+    RSI/ISF只加载一次，所有食物在同一次批量计算中得到明细
+
+    参数:
+        meal: Meal对象或 (食物, 重量) 列表
+        foods: 已加载的FoodTable（可选）
+        rsi_value, isf_value: 指定时不读取校准数据
+        iob: 仍在起作用的胰岛素(U)，默认根据注射记录计算，传入0表示不扣除
+
+    返回:
+        dict: success为是否计算成功，失败时error为错误信息；成功时包含
+              items（每种食物的 name、weight、carb_100g、total_carb、blood_sugar_rise、insulin_dose）、
+              整餐的 total_weight、total_carb、blood_sugar_rise、insulin_dose（本餐所需剂量），
+              insulin_on_board（IOB）、net_dose（扣除IOB后的注射剂量，不小于0），以及使用的 rsi_value、isf_value
+    """
+    if not isinstance(meal, Meal):
+        meal = Meal(meal)
+    if not meal:
+        return {"success": False, "error": "请至少添加一种食物"}
+
+    # 查找所有按名称引用的食物
+    names = [food for food, _ in meal if isinstance(food, str)]
+    if foods is not None:
+        found = {}
+        for name in names:
+            food = foods.find(name)
+            found[name.lower()] = food.to_dict() if hasattr(food, 'to_dict') else food
+    else:
+        found = find_foods(names) if names else {}
+    resolved = [found.get(food.lower()) if isinstance(food, str) else food for food, _ in meal]
+    missing = [_food_name(food) for (food, _), row in zip(meal, resolved) if row is None]
+    if missing:
+        return {"success": False, "error": f"未找到食物: {', '.join(missing)}"}
+    no_carb = [row['name'] for row in resolved
+               if row.get('carb_100g') is None or math.isnan(row.get('carb_100g'))]
+    if no_carb:
+        return {"success": False, "error": f"食物缺少碳水含量: {', '.join(no_carb)}"}
+
+    # 校准数据只加载一次
+    if rsi_value is None or isf_value is None:
+        rsi_data, isf_data = load_calibration_data()
+        if rsi_value is None:
+            if not rsi_data:
+                return {"success": False, "error": "未找到RSI校准数据，请先进行RSI校准"}
+            rsi_value = rsi_data['rsi_value']
+        if isf_value is None:
+            if not isf_data:
+                return {"success": False, "error": "未找到ISF校准数据，请先进行ISF校准"}
+            isf_value = isf_data['isf_value']
+    # ISF为0或负数时剂量没有意义（除以0得到inf），不能作为结果显示给用户
+    rsi_value = _positive_value(rsi_value)
+    if rsi_value is None:
+        return {"success": False, "error": "RSI值无效（必须是大于0的数字），请重新进行RSI校准"}
+    isf_value = _positive_value(isf_value)
+    if isf_value is None:
+        return {"success": False, "error": "ISF值无效（必须是大于0的数字），请重新进行ISF校准"}
+
+    weights = [weight for _, weight in meal]
+    carbs = [row['carb_100g'] for row in resolved]
+    # 一餐只有几种食物，纯Python实现比导入numpy更快
+    total_carb, blood_sugar_rise, insulin_dose = calculate_insulin_doses(carbs, weights, rsi_value, isf_value,
+                                                                         use_numpy=False)
+
+    items = [
+        {
+            "name": row['name'],
+            "weight": weight,
+            "carb_100g": float(carb),
+            "total_carb": float(item_carb),
+            "blood_sugar_rise": float(item_rise),
+            "insulin_dose": float(item_dose),
+        }
+        for row, weight, carb, item_carb, item_rise, item_dose
+        in zip(resolved, weights, carbs, total_carb, blood_sugar_rise, insulin_dose)
+    ]
+    if iob is None:
+        iob = get_insulin_on_board()
+    insulin_total = sum(item["insulin_dose"] for item in items)
+    return {
+        "success": True,
+        "error": None,
+        "items": items,
+        "total_weight": sum(weights),
+        "total_carb": sum(item["total_carb"] for item in items),
+        "blood_sugar_rise": sum(item["blood_sugar_rise"] for item in items),
+        "insulin_dose": insulin_total,
+        "insulin_on_board": iob,
+        "net_dose": max(insulin_total - iob, 0.0),
+        "rsi_value": rsi_value,
+        "isf_value": isf_value,
+    }
+
+
+def format_meal_result(result):
+    """把calculate_meal的结果格式化为多行文本（命令行和Tk界面使用）"""
+    if not result["success"]:
+        return result["error"]
+    lines = []
+    for item in result["items"]:
+        lines.append(f"{item['name']} {item['weight']:g}g: 碳水 {item['total_carb']:.2f}g，"
+                     f"升糖 {item['blood_sugar_rise']:.2f} mmol/L，剂量 {item['insulin_dose']:.2f} U")
+    if len(result["items"]) > 1:
+        lines.append("")
+        lines.append(f"合计 {len(result['items'])} 种食物 {result['total_weight']:g}g")
+    lines.append(f"碳水含量: {result['total_carb']:.2f}g")
+    lines.append(f"预计血糖升高值: {result['blood_sugar_rise']:.2f} mmol/L")
+    if result["insulin_on_board"] > 0:
+        lines.append(f"本餐所需剂量: {result['insulin_dose']:.2f} U")
+        lines.append(f"活性胰岛素(IOB): {result['insulin_on_board']:.2f} U")
+    lines.append(f"胰岛素注射剂量: {result['net_dose']:.2f} U")
+    lines.append(f"(基于RSI值: {result['rsi_value']}, ISF值: {result['isf_value']} mmol/L/U)")
+    return "\n".join(lines)
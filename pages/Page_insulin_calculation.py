@@ -3,11 +3,14 @@ import os
 import pandas as pd
 import streamlit as st
 from modules.food_input import load_food_data
-from modules.insulin_calculation import (
-    load_rsi_data,
-    load_isf_data,
-    calculate_insulin_dose
+from utils.file_utils import start_bootstrap, bootstrap_done, wait_for_bootstrap
+from modules.insulin_calculation import load_calibration_data
+from modules.meal import calculate_meal
+from modules.insulin_on_board import record_dose, load_dose_log, get_insulin_on_board, get_iob_timeline
+from modules.glucose_simulator import (
+    simulate_glucose, meal_carb_entries, dose_scenarios, logged_dose_entries, HYPO_THRESHOLD
 )
+from modules.dose_table import get_dose_table, DOSE_TABLE_MIN_WEIGHT, DOSE_TABLE_MAX_WEIGHT
 
 # 确保模块路径正确
 sys.path.append(os.path.join(os.path.dirname(__file__), '../modules'))
@@ -23,6 +26,14 @@ if 'selected_food' not in st.session_state:
     st.session_state.selected_food = "未选择食物"
 if 'calculation_result' not in st.session_state:
     st.session_state.calculation_result = None
+# 本餐已添加的食物 [{"name": 名称, "weight": 重量}] 和整餐计算的明细
+if 'meal_items' not in st.session_state:
+    st.session_state.meal_items = []
+if 'meal_breakdown' not in st.session_state:
+    st.session_state.meal_breakdown = None
+# 注射记录每个会话只加载一次，记录注射后重新加载
+if 'dose_log' not in st.session_state:
+    st.session_state.dose_log = load_dose_log()
 if 'page_initialized' not in st.session_state:
     st.session_state.page_initialized = True
 
@@ -44,8 +55,7 @@ def update_metrics():
 
     # 加载校准数据 - 使用更具体的异常处理
     try:
-        local_rsi_data = load_rsi_data()
-        local_isf_data = load_isf_data()
+        local_rsi_data, local_isf_data = load_calibration_data()
 
         if local_isf_data:
             isf_display = f"ISF {local_isf_data['isf_value']:.2f}"
@@ -68,6 +78,14 @@ def update_metrics():
     metric_col2.metric("预计升糖指数", display_blood_sugar_rise, rsi_display)
     metric_col3.metric("碳水化合物总量", total_carbs, weight_display)
 
+# 新容器首次运行时后台并发下载数据文件，下载完成前先显示占位内容
+start_bootstrap()
+if not bootstrap_done():
+    loading_placeholder = st.empty()
+    loading_placeholder.info("正在从GitHub加载数据…")
+    wait_for_bootstrap()
+    loading_placeholder.empty()
+
 # 调用函数显示metric
 update_metrics()
 
@@ -97,6 +115,7 @@ with st.form("insulin_calculation_form", clear_on_submit=True):
 
     with top_col3:
         calculate_btn = st.form_submit_button("计算胰岛素剂量", use_container_width=True)
+        add_to_meal_btn = st.form_submit_button("加入本餐", use_container_width=True)
 
 # 加载所有食物数据
 all_foods = load_food_data()
@@ -116,10 +135,7 @@ if search_query.strip():
     if not all_foods:
         st.warning("未找到食物数据，请先录入食物信息")
     else:
-        matched_foods = [
-            food for food in all_foods
-            if search_query.lower() in food["name"].lower()
-        ]
+        matched_foods = all_foods.search(search_query)
 
 with search_col1:
     if matched_foods:
@@ -157,59 +173,194 @@ if matched_foods:
 elif search_query.strip():
     st.warning(f"未找到包含「{search_query}」的食物，请检查名称是否正确或录入食物信息。")
 
-# 计算胰岛素剂量的核心逻辑
+# 剂量速查：所选食物的剂量表按(食物, RSI, ISF)缓存，拖动滑块时直接查表
+if matched_foods:
+    selected_row = all_foods.find(st.session_state.selected_food)
+    dose_table = get_dose_table(selected_row) if selected_row is not None else None
+    if dose_table is not None:
+        with st.expander("剂量速查", expanded=False):
+            preview_weight = st.slider(
+                "重量(克)",
+                min_value=DOSE_TABLE_MIN_WEIGHT,
+                max_value=DOSE_TABLE_MAX_WEIGHT,
+                value=100,
+                key="dose_preview_weight"
+            )
+            preview_carb, preview_rise, preview_dose = dose_table.lookup(preview_weight)
+            preview_col1, preview_col2, preview_col3 = st.columns(3)
+            preview_col1.metric("胰岛素剂量", f"{preview_dose:.2f} U")
+            preview_col2.metric("预计升糖", f"{preview_rise:.2f} mmol")
+            preview_col3.metric("碳水化合物", f"{preview_carb:.1f} g")
+
+            dose_rows = dose_table.rows(step=10)
+            st.line_chart(pd.DataFrame(dose_rows), x="weight", y="insulin_dose",
+                          x_label="重量(g)", y_label="剂量(U)")
+            st.dataframe(
+                pd.DataFrame(dose_rows),
+                column_config={
+                    "weight": "重量(g)",
+                    "total_carb": st.column_config.NumberColumn("碳水(g)", format="%.1f"),
+                    "blood_sugar_rise": st.column_config.NumberColumn("升糖(mmol/L)", format="%.2f"),
+                    "insulin_dose": st.column_config.NumberColumn("剂量(U)", format="%.2f")
+                },
+                hide_index=True,
+                use_container_width=True,
+                height=250
+            )
+
+
+
+def store_result(result):
+    """保存计算结果到session_state（顶部metric显示整餐合计，剂量已扣除IOB）"""
+    st.session_state.calculation_result = {
+        "food": "、".join(item["name"] for item in result["items"]),
+        "weight": result["total_weight"],
+        "total_carb": result["total_carb"],
+        "blood_sugar_rise": result["blood_sugar_rise"],
+        "insulin_dose": result["net_dose"],
+        "insulin_on_board": result["insulin_on_board"],
+        "recorded": False,
+        # 血糖预测使用的食物明细和校准值
+        "items": [{"name": item["name"], "total_carb": item["total_carb"]} for item in result["items"]],
+        "rsi_value": result["rsi_value"],
+        "isf_value": result["isf_value"]
+    }
+    st.session_state.meal_breakdown = result["items"] if len(result["items"]) > 1 else None
+
+
+# 加入本餐：只记录食物和重量，计算时一次完成
+if add_to_meal_btn:
+    if st.session_state.selected_food in ["未选择食物", "请先搜索食物"]:
+        st.error("请先选择食物")
+    elif not food_weight or food_weight <= 0:
+        st.error("请输入有效的食物重量")
+    else:
+        st.session_state.meal_items.append({"name": st.session_state.selected_food, "weight": food_weight})
+        st.rerun()
+
+# 本餐食物列表和整餐计算
+if st.session_state.meal_items:
+    st.subheader("本餐食物")
+    st.dataframe(
+        pd.DataFrame(st.session_state.meal_items),
+        column_config={"name": "食物名称", "weight": "重量(g)"},
+        use_container_width=True
+    )
+    meal_col1, meal_col2 = st.columns(2)
+    with meal_col1:
+        calculate_meal_btn = st.button("计算本餐剂量", use_container_width=True)
+    with meal_col2:
+        if st.button("清空本餐", use_container_width=True):
+            st.session_state.meal_items = []
+            st.session_state.meal_breakdown = None
+            st.rerun()
+
+    if calculate_meal_btn:
+        # 食物表已加载，校准数据只加载一次，所有食物一起计算
+        meal_result = calculate_meal(
+            [(item["name"], item["weight"]) for item in st.session_state.meal_items],
+            foods=all_foods,
+            iob=get_insulin_on_board(log=st.session_state.dose_log)
+        )
+        if not meal_result["success"]:
+            st.error(meal_result["error"])
+        else:
+            store_result(meal_result)
+            st.rerun()
+
+# 上一次整餐计算的每种食物明细
+if st.session_state.meal_breakdown:
+    with st.expander("本餐剂量明细", expanded=True):
+        st.dataframe(
+            pd.DataFrame(st.session_state.meal_breakdown),
+            column_config={
+                "name": "食物名称",
+                "weight": "重量(g)",
+                "carb_100g": "每100g碳水(g)",
+                "total_carb": st.column_config.NumberColumn("碳水(g)", format="%.2f"),
+                "blood_sugar_rise": st.column_config.NumberColumn("升糖(mmol/L)", format="%.2f"),
+                "insulin_dose": st.column_config.NumberColumn("剂量(U)", format="%.2f")
+            },
+            hide_index=True,
+            use_container_width=True
+        )
+
+# 计算胰岛素剂量的核心逻辑（只计算当前选择的一种食物）
 if calculate_btn:
     if st.session_state.selected_food in ["未选择食物", "请先搜索食物"]:
         st.error("请先选择食物")
-    elif food_weight <= 0:
+    elif not food_weight or food_weight <= 0:
         st.error("请输入有效的食物重量")
     else:
         try:
-            # 重命名局部变量
-            calc_rsi_data = load_rsi_data()
-            calc_isf_data = load_isf_data()
-
-            if not calc_rsi_data:
-                st.error("未找到RSI校准数据，请先进行RSI校准")
-            elif not calc_isf_data:
-                st.error("未找到ISF校准数据，请先进行ISF校准")
+            # 按单种食物的一餐计算（校准数据只加载一次）
+            calc_result = calculate_meal([(st.session_state.selected_food, food_weight)], foods=all_foods,
+                                         iob=get_insulin_on_board(log=st.session_state.dose_log))
+
+            if not calc_result["success"]:
+                st.error(calc_result["error"])
             else:
-                selected_food_detail = next(
-                    (food for food in all_foods if food["name"] == st.session_state.selected_food),
-                    None
-                )
-
-                if not selected_food_detail:
-                    st.error("未找到选中食物的详细信息")
-                else:
-                    # 重命名局部变量
-                    calc_total_carb, calc_blood_sugar_rise, calc_insulin_dose = calculate_insulin_dose(
-                        food=selected_food_detail,
-                        weight=food_weight,
-                        rsi_value=calc_rsi_data["rsi_value"],
-                        isf_value=calc_isf_data["isf_value"]
-                    )
-
-                    # 保存计算结果到session_state
-                    st.session_state.calculation_result = {
-                        "food": st.session_state.selected_food,
-                        "weight": food_weight,
-                        "total_carb": calc_total_carb,
-                        "blood_sugar_rise": calc_blood_sugar_rise,
-                        "insulin_dose": calc_insulin_dose
-                    }
-
-                    st.success("计算完成！")
-                    with st.expander("查看计算结果", expanded=True):
-                        st.write(f"食物名称: {st.session_state.selected_food}")
-                        st.write(f"摄入重量: {food_weight} 克")
-                        st.write(f"总碳水化合物含量: {calc_total_carb:.2f} 克")
-                        st.write(f"预计血糖升高: {calc_blood_sugar_rise:.2f} mmol/L")
-                        st.write(f"推荐胰岛素剂量: {calc_insulin_dose:.2f} 单位")
-
-                    # 强制重新运行整个脚本以更新顶部的metric
-                    st.rerun()
+                # 保存计算结果到session_state
+                store_result(calc_result)
+
+                st.success("计算完成！")
+                with st.expander("查看计算结果", expanded=True):
+                    st.write(f"食物名称: {st.session_state.selected_food}")
+                    st.write(f"摄入重量: {food_weight} 克")
+                    st.write(f"总碳水化合物含量: {calc_result['total_carb']:.2f} 克")
+                    st.write(f"预计血糖升高: {calc_result['blood_sugar_rise']:.2f} mmol/L")
+                    st.write(f"本餐所需剂量: {calc_result['insulin_dose']:.2f} 单位")
+                    st.write(f"活性胰岛素(IOB): {calc_result['insulin_on_board']:.2f} 单位")
+                    st.write(f"推荐胰岛素剂量: {calc_result['net_dose']:.2f} 单位")
+
+                # 强制重新运行整个脚本以更新顶部的metric
+                st.rerun()
 
         except (FileNotFoundError, KeyError, ValueError, TypeError) as calc_error:
             # 重命名异常变量
             st.error(f"计算过程出错: {str(calc_error)}")
+
+# 记录注射：之后的计算会扣除这次注射仍在起作用的部分
+last_result = st.session_state.calculation_result
+if last_result and last_result["insulin_dose"] > 0 and not last_result["recorded"]:
+    if last_result["insulin_on_board"] > 0:
+        st.caption(f"已扣除活性胰岛素(IOB) {last_result['insulin_on_board']:.2f} U")
+    if st.button(f"记录注射 {last_result['insulin_dose']:.2f} U", use_container_width=True):
+        if record_dose(last_result["insulin_dose"], note=last_result["food"]):
+            last_result["recorded"] = True
+            st.session_state.dose_log = load_dose_log()
+            st.success("注射记录已保存")
+        else:
+            st.error("保存注射记录失败")
+
+# 血糖预测：同一餐的几个候选剂量在一次批量模拟中得到预测曲线
+if last_result and last_result["total_carb"] > 0:
+    with st.expander("血糖预测", expanded=False):
+        current_glucose = st.number_input("当前血糖(mmol/L)", min_value=1.0, max_value=30.0, value=6.0, step=0.1,
+                                          key="current_glucose")
+        # 已记录的注射已经计入之前的注射中，候选剂量从0开始
+        suggested = 0.0 if last_result["recorded"] else last_result["insulin_dose"]
+        options = sorted({round(suggested * factor, 1) for factor in (0, 0.5, 1, 1.25)})
+        glucose_times, glucose = simulate_glucose(
+            dose_scenarios(meal_carb_entries(last_result["items"], all_foods), options, logged_dose_entries(log=st.session_state.dose_log)),
+            current_glucose, last_result["rsi_value"], last_result["isf_value"]
+        )
+        chart = pd.DataFrame({f"注射 {dose:g} U": curve for dose, curve in zip(options, glucose)})
+        chart.insert(0, "分钟", glucose_times)
+        st.line_chart(chart, x="分钟", x_label="进食后时间(分钟)", y_label="血糖(mmol/L)")
+        for dose, curve in zip(options, glucose):
+            if min(curve) < HYPO_THRESHOLD:
+                st.warning(f"注射 {dose:g} U 时预计血糖最低 {min(curve):.1f} mmol/L，有低血糖风险")
+
+# 活性胰岛素：过去24小时到一个作用时间之后的IOB曲线（一次卷积计算）
+dose_log = st.session_state.dose_log
+if dose_log:
+    with st.expander(f"活性胰岛素(IOB) 当前 {get_insulin_on_board(log=dose_log):.2f} U", expanded=False):
+        iob_times, iob_values = get_iob_timeline(log=dose_log, step_minutes=5)
+        st.line_chart(pd.DataFrame({"时间": iob_times, "IOB(U)": iob_values}), x="时间", y="IOB(U)")
+        st.dataframe(
+            pd.DataFrame(dose_log[-10:][::-1]),
+            column_config={"timestamp": "注射时间", "units": "剂量(U)", "note": "备注"},
+            hide_index=True,
+            use_container_width=True
+        )
@@ -7,7 +7,7 @@ import streamlit as st
 sys.path.append(os.path.join(os.path.dirname(__file__), '../modules'))
 
 # 从food_input.py导入所需函数
-from modules.food_input import load_food_data, save_food_data, delete_food_data, check_duplicate_food
+from modules.food_input import load_food_data, update_food_data, delete_food_data, check_duplicate_food, add_food
 
 # 设置页面配置
 st.set_page_config(
@@ -78,8 +78,7 @@ with st.form("food_input_form", clear_on_submit=True):  # 添加这个参数
             st.error("请填写所有营养成分数值")
         else:
             try:
-                existing_data = load_food_data()
-                foods_list = existing_data.copy() if existing_data else []
+                foods_list = load_food_data()
 
                 if check_duplicate_food(foods_list, name):
                     st.error(f"警告：食物 '{name}' 已存在，请使用不同名称或修改已有食物")
@@ -90,8 +89,8 @@ with st.form("food_input_form", clear_on_submit=True):  # 添加这个参数
                         "protein_100g": float(protein_100g),
                         "fat_100g": float(fat_100g)
                     }
-                    foods_list.append(new_food)
-                    save_food_data(foods_list)
+                    if not add_food(new_food):
+                        raise IOError("写入食物数据失败")
 
                     st.success(f"食物 '{name}' 信息保存成功！")
 
@@ -125,10 +124,7 @@ try:
 
         # 根据搜索词过滤数据（无搜索时显示全部）
         if search_query:
-            filtered_foods = [
-                food for food in foods
-                if search_query.lower() in food["name"].lower()
-            ]
+            filtered_foods = foods.search(search_query)
         else:
             filtered_foods = foods  # 无搜索时显示全部
 
@@ -241,10 +237,7 @@ if foods:
 
     # 根据搜索词过滤可编辑的食物列表
     if edit_search:
-        filtered_edit_foods = [
-            food for food in foods
-            if edit_search.lower() in food["name"].lower()
-        ]
+        filtered_edit_foods = foods.search(edit_search)
     else:
         filtered_edit_foods = foods  # 无搜索时显示全部
 
@@ -275,8 +268,8 @@ if foods:
 
     if edit_food_name:
         # 找到选中的食物数据
-        edit_food = next(food for food in foods if food["name"] == edit_food_name)
-        edit_index = foods.index(edit_food)
+        edit_index = foods.find_index(edit_food_name)
+        edit_food = foods[edit_index]
 
         with st.form(f"edit_form_{edit_index}"):
             col1, col2, col3, col4 = st.columns(4)
@@ -326,14 +319,13 @@ if foods:
                     st.error("食物名称不能为空")
                 else:
                     try:
-                        # 更新食物数据
-                        foods[edit_index] = {
+                        # 更新食物数据（SQLite存储时只改写对应的一行）
+                        update_food_data(foods, edit_index, {
                             "name": updated_name,
                             "carb_100g": float(updated_carb),
                             "protein_100g": float(updated_protein),
                             "fat_100g": float(updated_fat)
-                        }
-                        save_food_data(foods)
+                        })
                         st.success(f"食物 '{updated_name}' 信息更新成功！")
                         st.rerun()
                     except Exception as e:
@@ -0,0 +1,47 @@
+import os
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'benchmarks'))
+
+from utils import file_utils, github_storage, storage_backends, sync_queue
+from modules import food_input
+from fake_github import FakeGitHubServer
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """每个测试使用独立的临时数据目录和本地JSON后端，结束后恢复全局状态"""
+    monkeypatch.setenv('INSULIN_DATA_DIR', str(tmp_path))
+    monkeypatch.setenv('INSULIN_STORAGE_BACKEND', 'local')
+    monkeypatch.delenv('INSULIN_GITHUB_TOKEN', raising=False)
+    monkeypatch.delenv('INSULIN_GITHUB_REPO', raising=False)
+    storage_backends.set_storage_backend(None)
+    file_utils.clear_json_cache()
+    food_input.clear_food_table_cache()
+    yield tmp_path
+    file_utils.flush_pending_writes()
+    storage_backends.set_storage_backend(None)
+    file_utils.clear_json_cache()
+    food_input.clear_food_table_cache()
+
+
+@pytest.fixture
+def github(data_dir, monkeypatch):
+    """本地JSON + 模拟GitHub的分层后端，写回队列不会自动推送"""
+    monkeypatch.setenv('INSULIN_GITHUB_TOKEN', 'token')
+    monkeypatch.setenv('INSULIN_GITHUB_REPO', 'owner/repo')
+    server = FakeGitHubServer().start()
+    github_storage.set_github_client(github_storage.GitHubClient(
+        'token', 'owner/repo', api_url=server.url, rate_limiter=github_storage.RateLimiter(rate=1e9, burst=1e9)))
+    monkeypatch.setattr(file_utils, '_bootstrap_futures', None)
+    monkeypatch.setattr(sync_queue, '_queue', sync_queue.SyncQueue(
+        lambda filenames: False, str(data_dir / sync_queue.OUTBOX_FILENAME), batch_window=3600))
+    storage_backends.set_storage_backend(storage_backends.TieredBackend(
+        storage_backends.LocalJsonBackend(), storage_backends.GitHubBackend(), write_behind=True))
+    yield server
+    github_storage.set_github_client(None)
+    server.stop()
@@ -0,0 +1,14 @@
+from modules.dose_table import get_dose_table
+from modules.food_table import FoodTable
+from modules.meal import calculate_meal
+
+
+def test_food_without_carb_returns_error_result(data_dir):
+    foods = FoodTable([{"name": "未知", "protein_100g": 3.0}, {"name": "米饭", "carb_100g": 25.9}])
+
+    assert get_dose_table(foods.find("未知"), 0.2, 2.5) is None
+    assert abs(get_dose_table(foods.find("米饭"), 0.2, 2.5).lookup(100)[0] - 25.9) < 1e-9
+
+    result = calculate_meal([("未知", 100)], foods=foods, rsi_value=0.2, isf_value=2.5, iob=0)
+    assert not result["success"]
+    assert "未知" in result["error"]
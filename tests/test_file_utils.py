@@ -0,0 +1,137 @@
+import json
+import os
+import threading
+
+from utils import file_utils, storage_backends, sync_queue
+
+
+def test_refresh_keeps_queued_local_edit(github):
+    github.put_file('data/rsi_data.json', {"rsi_value": 2.0})
+    assert file_utils.save_json({"rsi_value": 3.0}, 'rsi_data.json')
+    assert sync_queue.is_pending('rsi_data.json')
+
+    results = file_utils.refresh_from_remote(['rsi_data.json'])
+
+    assert results == {'rsi_data.json': 'pending'}
+    file_utils.clear_json_cache()
+    assert file_utils.load_json('rsi_data.json') == {"rsi_value": 3.0}
+
+
+def test_refresh_updates_file_without_local_edit(github):
+    # 只写本地文件，不登记到同步队列
+    assert storage_backends.LocalJsonBackend().put('rsi_data.json', {"rsi_value": 3.0})
+    github.put_file('data/rsi_data.json', {"rsi_value": 2.0})
+
+    assert file_utils.refresh_from_remote(['rsi_data.json']) == {'rsi_data.json': 'updated'}
+    assert file_utils.load_json('rsi_data.json') == {"rsi_value": 2.0}
+
+
+def test_cache_hit_returns_shared_data(data_dir):
+    assert file_utils.save_json([{"name": "米饭"}], 'foods_data.json')
+    file_utils.clear_json_cache()
+
+    first = file_utils.load_json('foods_data.json')
+    assert file_utils.load_json('foods_data.json') is first
+
+    # 需要修改时取独立副本，不影响缓存
+    copy = file_utils.load_json('foods_data.json', mutable=True)
+    copy[0]["name"] = "已修改"
+    assert file_utils.load_json('foods_data.json') == [{"name": "米饭"}]
+
+
+def test_cache_invalidated_when_file_replaced(data_dir):
+    assert file_utils.save_json({"rsi_value": 2.0}, 'rsi_data.json')
+    assert file_utils.load_json('rsi_data.json') == {"rsi_value": 2.0}
+
+    # 绕过save_json直接替换文件，stat签名改变后重新解析
+    with open(data_dir / 'rsi_data.json', 'w', encoding='utf-8') as f:
+        f.write('{"rsi_value": 3.5, "extra": 1}')
+    assert file_utils.load_json('rsi_data.json') == {"rsi_value": 3.5, "extra": 1}
+
+
+def _temp_files(data_dir):
+    return [name for name in os.listdir(data_dir) if name.endswith('.tmp')]
+
+
+def test_failed_save_keeps_previous_file(data_dir, monkeypatch):
+    assert file_utils.save_json({"rsi_value": 2.0}, 'rsi_data.json')
+
+    # 序列化失败和替换失败都不能留下被截断的文件或临时文件
+    assert not file_utils.save_json({"rsi_value": object()}, 'rsi_data.json')
+
+    def fail_replace(src, dst):
+        raise OSError("磁盘已满")
+    with monkeypatch.context() as patch:
+        patch.setattr(file_utils.os, 'replace', fail_replace)
+        assert not file_utils.save_json({"rsi_value": 3.0}, 'rsi_data.json')
+
+    with open(data_dir / 'rsi_data.json', encoding='utf-8') as f:
+        assert json.load(f) == {"rsi_value": 2.0}
+    assert _temp_files(data_dir) == []
+    file_utils.clear_json_cache()
+    assert file_utils.load_json('rsi_data.json') == {"rsi_value": 2.0}
+
+
+def test_coalesced_saves_write_once(data_dir):
+    file_utils.set_write_coalesce_window(60)
+    try:
+        before = file_utils.get_write_stats()
+        for value in range(5):
+            assert file_utils.save_json({"rsi_value": float(value)}, 'rsi_data.json')
+
+        # 窗口内只登记待写入的数据，读取时返回最新的一次
+        assert not (data_dir / 'rsi_data.json').exists()
+        assert file_utils.has_pending_write('rsi_data.json')
+        assert file_utils.load_json('rsi_data.json') == {"rsi_value": 4.0}
+
+        file_utils.flush_pending_writes()
+        stats = file_utils.get_write_stats()
+        assert stats['physical_writes'] - before['physical_writes'] == 1
+        assert stats['writes_avoided'] - before['writes_avoided'] == 4
+        assert stats['pending_files'] == 0
+        with open(data_dir / 'rsi_data.json', encoding='utf-8') as f:
+            assert json.load(f) == {"rsi_value": 4.0}
+    finally:
+        file_utils.set_write_coalesce_window(0)
+
+
+def test_save_if_match_rejects_stale_version(data_dir):
+    assert file_utils.save_json_if_match([1], 'dose_log.json', file_utils.MISSING_ETAG)[0]
+    # 文件已存在时"仅在不存在时创建"失败
+    assert not file_utils.save_json_if_match([2], 'dose_log.json', file_utils.MISSING_ETAG)[0]
+
+    data, etag = file_utils.load_json_versioned('dose_log.json')
+    assert data == [1]
+    success, new_etag = file_utils.save_json_if_match(data + [2], 'dose_log.json', etag)
+    assert success and new_etag != etag
+
+    # 基于旧版本的保存被拒绝，并返回当前版本
+    assert file_utils.save_json_if_match(data + [3], 'dose_log.json', etag) == (False, new_etag)
+    assert file_utils.load_json('dose_log.json') == [1, 2]
+
+
+def test_concurrent_appends_are_not_lost(data_dir):
+    def worker(n):
+        for i in range(20):
+            assert file_utils.append_json_items('dose_log.json', [{"id": f"{n}-{i}"}],
+                                                key=lambda item: item["id"], max_retries=100) is not None
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    ids = [item["id"] for item in file_utils.load_json('dose_log.json')]
+    assert sorted(ids) == sorted(f"{n}-{i}" for n in range(6) for i in range(20))
+    # 去重：重复追加不会产生新条目
+    assert file_utils.append_json_items('dose_log.json', [{"id": "0-0"}], key=lambda item: item["id"]) == []
+
+
+def test_memory_backend_compare_and_swap(data_dir):
+    storage_backends.set_storage_backend(storage_backends.MemoryBackend({'dose_log.json': [1]}))
+    data, etag = file_utils.load_json_versioned('dose_log.json')
+    assert file_utils.save_json_if_match(data + [2], 'dose_log.json', etag)[0]
+    assert not file_utils.save_json_if_match(data + [3], 'dose_log.json', etag)[0]
+    assert file_utils.load_json('dose_log.json') == [1, 2]
+    assert list(data_dir.iterdir()) == []
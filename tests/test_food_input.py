@@ -0,0 +1,140 @@
+from modules import food_input
+from utils import storage_backends
+
+
+def _food(name, carb=10.0):
+    return {"name": name, "carb_100g": carb, "protein_100g": 1.0, "fat_100g": 0.5}
+
+
+def test_memory_backend_leaves_data_dir_untouched(data_dir):
+    backend = storage_backends.set_storage_backend(storage_backends.MemoryBackend())
+
+    assert food_input.add_food(_food("米饭"))
+    assert food_input.add_food(_food("苹果"))
+    assert not food_input.add_food(_food("苹果"))
+    foods = food_input.load_food_data()
+    assert food_input.update_food_data(foods, 0, _food("米饭", 25.0))
+    assert food_input.delete_food_data(foods, 1)
+
+    from modules.insulin_on_board import record_dose
+    assert record_dose(2.0)
+
+    assert [food["name"] for food in food_input.load_food_data()] == ["米饭"]
+    assert backend.get("foods_data.json")[0]["carb_100g"] == 25.0
+    assert list(data_dir.iterdir()) == []
+
+
+def test_local_backend_appends_to_journal(data_dir):
+    assert food_input.save_food_data([_food("米饭")])
+    assert food_input.add_food(_food("苹果"))
+    assert (data_dir / "foods_data.journal").exists()
+    assert food_input.count_foods() == 2
+
+    assert food_input.compact_food_journal()
+    assert not (data_dir / "foods_data.journal").exists()
+    assert [food["name"] for food in food_input.load_food_data()] == ["米饭", "苹果"]
+
+
+def test_import_json_validates_and_deduplicates(data_dir):
+    import json
+    source = data_dir / "import.json"
+    source.write_text(json.dumps([
+        {"名称": "米饭", "碳水": 25.9, "蛋白质": 2.6},
+        {"name": "苹果", "carb": "13,5"},
+        {"name": "米饭", "carb_100g": 20},
+        {"name": "糖", "carb_100g": 120},
+        {"name": "盐"},
+        [1, 2],
+    ], ensure_ascii=False), encoding="utf-8")
+
+    report = food_input.import_foods(str(source))
+
+    assert report["success"] and report["imported"] == 2 and report["duplicates"] == 1
+    assert [line for line, _, _ in report["rejected"]] == [3, 4, 5, 6]
+    assert food_input.find_food("苹果")["carb_100g"] == 13.5
+
+
+def test_iter_foods_matches_load_food_data_for_random_journals(data_dir):
+    import random
+    from utils import journal
+
+    names = [f"F{i}" for i in range(6)]
+    for seed in range(200):
+        rng = random.Random(seed)
+        snapshot = [_food(rng.choice(names + ["f1", "f3"]), float(i)) for i in range(rng.randrange(0, 6))]
+        assert food_input.save_food_data(snapshot)
+        ops = []
+        for i in range(rng.randrange(1, 8)):
+            kind = rng.choice(["insert", "update", "delete"])
+            if kind == "insert":
+                ops.append({"op": "insert", "food": _food(rng.choice(names), 100.0 + i)})
+            elif kind == "update":
+                ops.append({"op": "update", "name": rng.choice(names),
+                            "food": _food(rng.choice(names), 200.0 + i)})
+            else:
+                ops.append({"op": "delete", "name": rng.choice(names)})
+        journal.append_ops("foods_data.json", ops)
+        food_input.clear_food_table_cache()
+
+        streamed = list(food_input.iter_foods())
+        loaded = [food.to_dict() for food in food_input.load_food_data()]
+        assert streamed == loaded, (seed, snapshot, ops)
+
+
+def _names(foods):
+    return [food["name"] for food in foods]
+
+
+def test_journal_replays_edits_on_snapshot(data_dir):
+    import json
+    from utils import journal
+    assert food_input.save_food_data([_food("米饭"), _food("面条"), _food("馒头")])
+    with open(data_dir / "foods_data.json", encoding="utf-8") as f:
+        snapshot = json.load(f)
+
+    foods = food_input.load_food_data()
+    assert food_input.add_food(_food("苹果"))
+    assert food_input.update_food_data(foods, 1, _food("拉面", 60.0))
+    assert food_input.delete_food_data(foods, 0)
+
+    # 快照不变，每次修改只向日志追加一条
+    with open(data_dir / "foods_data.json", encoding="utf-8") as f:
+        assert json.load(f) == snapshot
+    assert [op["op"] for op in journal.read_ops("foods_data.json")] == ["insert", "update", "delete"]
+    expected = ["拉面", "馒头", "苹果"]
+    assert _names(food_input.load_food_data()) == expected
+    assert _names(food_input.iter_foods()) == expected
+
+    # 其他进程追加的日志按stat签名发现
+    with journal.journal_lock("foods_data.json"):
+        journal.append_ops("foods_data.json", [{"op": "delete", "name": "馒头"}])
+    assert _names(food_input.load_food_data()) == ["拉面", "苹果"]
+
+    assert food_input.compact_food_journal()
+    assert not (data_dir / "foods_data.journal").exists()
+    with open(data_dir / "foods_data.json", encoding="utf-8") as f:
+        assert _names(json.load(f)) == ["拉面", "苹果"]
+    assert food_input.load_food_data()[0]["carb_100g"] == 60.0
+
+
+def test_journal_ignores_torn_last_line(data_dir):
+    assert food_input.save_food_data([_food("米饭")])
+    assert food_input.add_food(_food("苹果"))
+    # 模拟写到一半时进程崩溃
+    with open(data_dir / "foods_data.journal", "a", encoding="utf-8") as f:
+        f.write('{"op": "insert", "food": {"name": "香')
+    assert _names(food_input.load_food_data()) == ["米饭", "苹果"]
+
+
+def test_long_journal_is_compacted_in_background(data_dir, monkeypatch):
+    import time
+    monkeypatch.setattr(food_input, "JOURNAL_MAX_OPS", 3)
+    assert food_input.save_food_data([_food("米饭")])
+    for name in ["苹果", "香蕉", "橙子"]:
+        assert food_input.add_food(_food(name))
+
+    deadline = time.time() + 5
+    while (data_dir / "foods_data.journal").exists() and time.time() < deadline:
+        time.sleep(0.01)
+    assert not (data_dir / "foods_data.journal").exists()
+    assert _names(food_input.load_food_data()) == ["米饭", "苹果", "香蕉", "橙子"]
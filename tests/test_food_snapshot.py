@@ -0,0 +1,93 @@
+import os
+import threading
+
+from modules import food_input
+from modules.food_snapshot import (
+    get_snapshot_path, load_food_snapshot, read_snapshot_count, source_signature, write_food_snapshot
+)
+from modules.food_table import FoodTable
+
+
+FOODS = [
+    {"name": "米饭", "carb_100g": 25.9, "protein_100g": 2.6, "fat_100g": 0.3},
+    {"name": "Apple", "carb_100g": 13.5},
+]
+
+
+def _write_source(data_dir, foods):
+    assert food_input.save_food_data(foods)
+    return str(data_dir / "foods_data.json")
+
+
+def test_snapshot_round_trip(data_dir):
+    source = _write_source(data_dir, FOODS)
+    assert os.path.exists(get_snapshot_path())
+
+    table = load_food_snapshot(source)
+    assert [food.to_dict() for food in table] == [food.to_dict() for food in FoodTable(FOODS)]
+    assert table.find("apple")["carb_100g"] == 13.5
+    assert read_snapshot_count(source) == 2
+
+    # 只读快照在第一次修改时复制，不影响映射的文件
+    table.append({"name": "香蕉", "carb_100g": 22.0})
+    assert read_snapshot_count(source) == 2
+
+
+def test_snapshot_is_stale_after_source_replaced(data_dir):
+    source = _write_source(data_dir, FOODS)
+    signature = source_signature(source)
+
+    # 大小和mtime都相同、只有inode不同的替换也要能发现
+    replacement = source + ".new"
+    with open(source, "rb") as f:
+        content = f.read()
+    with open(replacement, "wb") as f:
+        f.write(content.replace("米饭".encode("utf-8"), "面条".encode("utf-8")))
+    os.utime(replacement, ns=(signature[0], signature[0]))
+    os.replace(replacement, source)
+    assert source_signature(source)[:2] == signature[:2]
+
+    assert load_food_snapshot(source) is None
+    assert read_snapshot_count(source) is None
+    food_input.clear_food_table_cache()
+    assert food_input.load_food_data()[0]["name"] == "面条"
+    assert load_food_snapshot(source) is not None
+
+
+def test_corrupt_snapshot_is_rebuilt(data_dir):
+    source = _write_source(data_dir, FOODS)
+    path = get_snapshot_path()
+    with open(path, "r+b") as f:
+        f.seek(-2, os.SEEK_END)
+        f.write(b"\xff\xff")
+    assert load_food_snapshot(source) is None
+
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 4)
+    assert load_food_snapshot(source) is None
+
+    food_input.clear_food_table_cache()
+    assert [food["name"] for food in food_input.load_food_data()] == ["米饭", "Apple"]
+    assert load_food_snapshot(source) is not None
+
+
+def test_write_requires_signature(data_dir):
+    assert not write_food_snapshot(FoodTable(FOODS), None)
+    assert not os.path.exists(get_snapshot_path())
+
+
+def test_concurrent_writers_use_separate_temp_files(data_dir):
+    source = _write_source(data_dir, FOODS)
+    signature = source_signature(source)
+    table = FoodTable(FOODS * 2000)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(write_food_snapshot(table, signature)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [True] * 8
+    assert len(load_food_snapshot(source, signature)) == 4000
+    assert not [name for name in os.listdir(data_dir) if name.endswith(".tmp")]
@@ -0,0 +1,92 @@
+import json
+import random
+import tracemalloc
+
+from modules import food_input
+from modules.food_snapshot import load_food_snapshot
+from modules.food_table import FoodTable
+
+
+# 包含整数、null、非数值和其他字段的食物数据，to_records()必须原样还原
+RAW_FOODS = [
+    {"name": "米饭", "carb_100g": 26, "protein_100g": 2.6, "fat_100g": 0},
+    {"name": "Apple", "carb_100g": 13.5, "brand": "红富士", "tags": ["水果"]},
+    {"name": "牛奶", "carb_100g": None, "protein_100g": "3.2", "fat_100g": True},
+    {"name": "Water"},
+]
+
+
+def test_to_records_round_trips_raw_json():
+    table = FoodTable(RAW_FOODS)
+    assert table.to_records() == RAW_FOODS
+    assert type(table.to_records()[0]["carb_100g"]) is int
+    assert dict(table[1]) == RAW_FOODS[1]
+    assert table[2]["carb_100g"] is None
+    assert "fat_100g" not in table[3]
+    assert table.copy().to_records() == RAW_FOODS
+
+    table.delete_rows([0])
+    assert table.to_records() == RAW_FOODS[1:]
+    table[0] = {"name": "Apple", "carb_100g": 14}
+    assert table.to_records()[0] == {"name": "Apple", "carb_100g": 14}
+
+
+def test_snapshot_keeps_ints_and_extra_fields(data_dir):
+    assert food_input.save_food_data(RAW_FOODS)
+    table = load_food_snapshot(str(data_dir / "foods_data.json"))
+    assert table is not None
+    assert table.to_records() == RAW_FOODS
+    food_input.clear_food_table_cache()
+    assert food_input.load_food_data().to_records() == RAW_FOODS
+    with open(data_dir / "foods_data.json", encoding="utf-8") as f:
+        assert json.load(f) == RAW_FOODS
+
+
+def test_index_matches_dict_semantics():
+    # 随机改名、追加后按名称查找的结果与字典索引（同名以后写入的为准）一致
+    rng = random.Random(7)
+    names = ["米饭", "Apple", "apple", "牛奶", "Bread", "面条", "ΟΔΟΣ", "Straße"]
+    table = FoodTable()
+    index = {}
+    current = []
+    for _ in range(2000):
+        name = rng.choice(names) + str(rng.randrange(20))
+        if current and rng.random() < 0.5:
+            row = rng.randrange(len(current))
+            old = current[row].lower()
+            if old != name.lower():
+                if index.get(old) == row:
+                    del index[old]
+                index[name.lower()] = row
+            table[row] = {"name": name, "carb_100g": 1.0}
+            current[row] = name
+        else:
+            table.append({"name": name})
+            index[name.lower()] = len(current)
+            current.append(name)
+        if rng.random() < 0.1:
+            probe = rng.choice(names).lower() + str(rng.randrange(20))
+            assert table.find_index(probe) == index.get(probe)
+    assert {key: table.find_index(key) for key in index} == index
+    assert list(table.names) == current
+
+
+def test_search_matches_case_insensitive_substring():
+    table = FoodTable([{"name": name} for name in ["Apple Pie", "苹果APPLE", "pineapple", "ΣΟΥΠΑ", "Éclair"]])
+    for query in ["apple", "APP", "苹果", "σουπα", "éc", "", "e p"]:
+        expected = [name for name in table.names if query.lower() in name.lower()]
+        assert [food["name"] for food in table.search(query)] == expected
+
+
+def test_100k_foods_fit_in_10mb():
+    foods = [{"name": f"测试食物Brand {i}", "carb_100g": 12.5, "protein_100g": 3.0, "fat_100g": 1.0}
+             for i in range(100000)]
+    tracemalloc.start()
+    try:
+        table = FoodTable(foods)
+        table.find_index("测试食物brand 1")
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert len(table) == 100000
+    assert size < 10 * 1024 * 1024
@@ -0,0 +1,244 @@
+import os
+import time
+
+import pytest
+
+from utils import file_utils, github_storage, storage_backends
+
+
+def _write_local(filename, data):
+    # 只写本地文件，不登记到同步队列
+    assert storage_backends.LocalJsonBackend().put(filename, data)
+
+
+def test_refresh_sends_conditional_request_after_local_copy_matches(github):
+    _write_local('rsi_data.json', {"rsi_value": 2.0})
+    github.put_file('data/rsi_data.json', {"rsi_value": 2.0})
+
+    # 第一次没有记录ETag，下载后内容相同，记录ETag
+    assert file_utils.refresh_from_remote(['rsi_data.json']) == {'rsi_data.json': 'unchanged'}
+    remaining = github.remaining
+    # 第二次远端未变化，得到不计入额度的304
+    assert file_utils.refresh_from_remote(['rsi_data.json']) == {'rsi_data.json': 'unchanged'}
+    assert github.remaining == remaining
+
+    github.put_file('data/rsi_data.json', {"rsi_value": 4.0})
+    assert file_utils.refresh_from_remote(['rsi_data.json']) == {'rsi_data.json': 'updated'}
+    assert file_utils.load_json('rsi_data.json') == {"rsi_value": 4.0}
+
+
+def test_sha_lookups_do_not_record_etag(github):
+    _write_local('rsi_data.json', {"rsi_value": 3.0})
+    github.put_file('data/rsi_data.json', {"rsi_value": 2.0})
+
+    # 检查存在、读取sha都不会更新本地副本，不能让之后的条件请求返回304
+    assert github_storage.github_file_exists('rsi_data.json')
+    assert github_storage.load_from_github('rsi_data.json') == {"rsi_value": 2.0}
+    assert github_storage.get_github_client().metadata.get('main', 'rsi_data.json') is None
+
+    assert file_utils.refresh_from_remote(['rsi_data.json']) == {'rsi_data.json': 'updated'}
+    assert file_utils.load_json('rsi_data.json') == {"rsi_value": 2.0}
+
+
+def test_requests_reuse_pooled_connection(github):
+    github.put_file('data/rsi_data.json', {"rsi_value": 2.0})
+    client = github_storage.get_github_client()
+    for _ in range(20):
+        assert github_storage.load_from_github('rsi_data.json') == {"rsi_value": 2.0}
+
+    stats = client.connection_stats()
+    assert stats["requests"] == 20
+    assert stats["connections_opened"] == 1
+    assert stats["connections_reused"] == 19
+
+
+def _methods(server, start=0):
+    return [method for method, _ in server.requests[start:]]
+
+
+def test_saves_reuse_cached_sha(github):
+    github.put_file('data/rsi_data.json', {"rsi_value": 1.0})
+    assert github_storage.save_to_github({"rsi_value": 2.0}, 'rsi_data.json')
+    # 第一次需要先取得sha
+    assert _methods(github) == ["GET", "PUT"]
+
+    start = len(github.requests)
+    for value in (3.0, 4.0, 5.0):
+        assert github_storage.save_to_github({"rsi_value": value}, 'rsi_data.json')
+    # 之后每次保存只需要一次PUT
+    assert _methods(github, start) == ["PUT"] * 3
+
+    # 其他设备修改后缓存的sha过期：409后重新获取sha再保存一次
+    github.put_file('data/rsi_data.json', {"rsi_value": 9.0})
+    start = len(github.requests)
+    assert github_storage.save_to_github({"rsi_value": 6.0}, 'rsi_data.json')
+    assert _methods(github, start) == ["PUT", "GET", "PUT"]
+    assert github_storage.load_from_github('rsi_data.json') == {"rsi_value": 6.0}
+
+
+def test_missing_file_is_created_without_extra_lookups(github):
+    assert github_storage.load_from_github('dose_log.json') is None
+    start = len(github.requests)
+    # 已确认不存在的文件不再请求
+    assert github_storage.load_from_github('dose_log.json') is None
+    assert not github_storage.github_file_exists('dose_log.json')
+    assert github_storage.save_to_github([{"units": 2.0}], 'dose_log.json')
+    assert _methods(github, start) == ["PUT"]
+
+
+def test_batch_save_is_one_commit(github):
+    github.put_file('data/rsi_data.json', {"rsi_value": 1.0})
+    commits = len(github.commits)
+    start = len(github.requests)
+    items = {"rsi_data.json": {"rsi_value": 2.0}, "isf_data.json": {"isf_value": 3.0},
+             "dose_log.json": [{"units": 1.0}]}
+
+    assert github_storage.save_batch_to_github(items, "校准")
+    assert _methods(github, start) == ["GET", "POST", "POST", "PATCH"]
+    assert len(github.commits) == commits + 1
+    for filename, data in items.items():
+        assert github_storage.load_from_github(filename) == data
+
+
+def test_batch_save_retries_when_branch_moved(github, monkeypatch):
+    github.put_file('data/rsi_data.json', {"rsi_value": 1.0})
+    update_ref = github._update_ref
+    moved = []
+
+    def concurrent_update(body):
+        # 第一次更新分支前，其他设备抢先提交（handle已持有服务器的锁）
+        if not moved:
+            files = dict(github.files)
+            files['data/foods_data.json'] = b'[]'
+            github._commit(files, "other device")
+            moved.append(True)
+        return update_ref(body)
+    monkeypatch.setattr(github, '_update_ref', concurrent_update)
+    start = len(github.requests)
+
+    assert github_storage.save_batch_to_github({"rsi_data.json": {"rsi_value": 2.0},
+                                                "isf_data.json": {"isf_value": 3.0}})
+    assert _methods(github, start).count("PATCH") == 2
+    # 基于最新提交重试，其他设备的修改保留
+    assert github_storage.load_from_github('foods_data.json') == []
+    assert github_storage.load_from_github('rsi_data.json') == {"rsi_value": 2.0}
+
+
+def test_batch_save_to_empty_repository_creates_files(github):
+    assert github_storage.save_batch_to_github({"rsi_data.json": {"rsi_value": 2.0},
+                                                "isf_data.json": {"isf_value": 3.0}})
+    assert _methods(github).count("PUT") == 2
+    assert github_storage.load_from_github('isf_data.json') == {"isf_value": 3.0}
+
+
+def test_unchanged_content_is_not_uploaded(github):
+    client = github_storage.get_github_client()
+    assert github_storage.save_to_github({"rsi_value": 2.0}, 'rsi_data.json')
+    start = len(github.requests)
+
+    # 内容相同：本地计算的blob sha与缓存的远端sha一致，不发送请求
+    assert github_storage.save_to_github({"rsi_value": 2.0}, 'rsi_data.json')
+    assert github.requests[start:] == []
+    assert client.connection_stats()["skipped_uploads"] == 1
+
+    # 批量保存时只提交有变化的文件
+    assert github_storage.save_batch_to_github({"rsi_data.json": {"rsi_value": 2.0},
+                                                "isf_data.json": {"isf_value": 3.0}})
+    assert _methods(github, start) == ["GET", "PUT"]
+    assert client.connection_stats()["skipped_uploads"] == 2
+
+
+def test_blob_sha_matches_remote(github):
+    assert github_storage.save_to_github({"rsi_value": 2.0}, 'rsi_data.json')
+    content = github.files['data/rsi_data.json']
+    client = github_storage.get_github_client()
+    assert github_storage.git_blob_sha(content) == client.cached_sha('rsi_data.json')
+    # 远端被其他设备修改后，刷新sha前不会误判为未变化
+    github.put_file('data/rsi_data.json', {"rsi_value": 9.0})
+    client.forget_sha('rsi_data.json')
+    assert not client.is_unchanged('rsi_data.json', content)
+
+
+class _Response:
+    def __init__(self, status_code=200, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+def test_rate_limiter_token_bucket():
+    limiter = github_storage.RateLimiter(rate=50, burst=2, max_wait=5)
+    started = time.monotonic()
+    for _ in range(5):
+        limiter.acquire()
+    # 前2个请求使用桶中的令牌，之后每个请求等待1/50秒
+    assert time.monotonic() - started >= 0.05
+    assert limiter.status()["throttled"] == 3
+
+
+def test_rate_limiter_slows_down_near_quota():
+    limiter = github_storage.RateLimiter(rate=100, burst=1, max_wait=5)
+    reset_at = time.time() + 100
+    limiter.update(_Response(headers={"X-RateLimit-Limit": "5000", "X-RateLimit-Remaining": "4000",
+                                      "X-RateLimit-Reset": str(reset_at)}))
+    assert limiter._current_rate(time.time()) == 100
+    # 剩余额度不足时按 剩余次数/距重置秒数 降速
+    limiter.update(_Response(headers={"X-RateLimit-Limit": "5000", "X-RateLimit-Remaining": "10",
+                                      "X-RateLimit-Reset": str(reset_at)}))
+    assert limiter._current_rate(time.time()) < 0.2
+    assert limiter.status()["remaining"] == 10
+
+
+def test_rate_limiter_honours_retry_after():
+    limiter = github_storage.RateLimiter(rate=1e9, burst=1e9, max_wait=5)
+    assert limiter.update(_Response(403, {"Retry-After": "60"})) == 60.0
+    assert limiter.status()["blocked_until"] > time.time() + 50
+    # 需要等待的时间超过max_wait时直接报错，而不是阻塞调用方
+    with pytest.raises(github_storage.RateLimitError):
+        limiter.acquire()
+
+    # 额度用完：等到重置时间
+    limiter = github_storage.RateLimiter(rate=1e9, burst=1e9, max_wait=5)
+    limiter.update(_Response(200, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(time.time() + 1000)}))
+    with pytest.raises(github_storage.RateLimitError):
+        limiter.acquire()
+
+
+def test_client_waits_out_short_throttle(github):
+    github.put_file('data/rsi_data.json', {"rsi_value": 2.0})
+    client = github_storage.get_github_client()
+    github.throttle_rate = 1.0
+    github.retry_after = 0
+    # 二级限速（403 + Retry-After）时等待后重试一次
+    response = client.get_contents('rsi_data.json')
+    assert response.status_code == 403
+    assert _methods(github)[-2:] == ["GET", "GET"]
+    github.throttle_rate = 0.0
+    assert client.get_contents('rsi_data.json').status_code == 200
+
+
+def test_bootstrap_downloads_missing_files_in_parallel(github):
+    for filename in file_utils.BOOTSTRAP_FILES:
+        github.put_file('data/' + filename, {"name": filename})
+    _write_local('rsi_data.json', {"rsi_value": 3.0})
+    github.latency = 0.3
+    started = time.monotonic()
+    futures = file_utils.start_bootstrap()
+    # 本地已有的文件不下载，其余文件并发下载，总耗时约为一次往返
+    assert sorted(futures) == sorted(set(file_utils.BOOTSTRAP_FILES) - {'rsi_data.json'})
+    assert file_utils.wait_for_bootstrap(timeout=5)
+    assert time.monotonic() - started < 0.3 * 2
+    assert file_utils.bootstrap_done()
+    for filename in futures:
+        assert os.path.exists(file_utils.get_data_path(filename))
+    # 每个进程只引导一次
+    assert file_utils.start_bootstrap() == futures
+    assert file_utils.load_json('rsi_data.json') == {"rsi_value": 3.0}
+
+
+def test_load_json_waits_for_bootstrap_download(github):
+    github.put_file('data/isf_data.json', {"isf_value": 40})
+    github.latency = 0.2
+    count = len(github.requests)
+    assert file_utils.load_json('isf_data.json') == {"isf_value": 40}
+    # load_json等待引导中的下载完成，不会重复请求同一个文件
+    assert github.requests[count:].count(('GET', '/repos/owner/repo/contents/data/isf_data.json')) == 1
@@ -0,0 +1,108 @@
+import datetime
+
+import pytest
+
+from modules import glucose_simulator as sim
+from modules.insulin_calculation import set_numpy_enabled
+from modules.insulin_on_board import iob_fraction
+
+
+@pytest.fixture(params=[True, False], ids=['numpy', 'python'])
+def backend(request):
+    """分别使用numpy和纯Python实现（切换时丢弃按实现类型缓存的曲线）"""
+    if request.param:
+        pytest.importorskip('numpy')
+    set_numpy_enabled(request.param)
+    sim.get_absorption_kernel.cache_clear()
+    sim.get_action_kernel.cache_clear()
+    yield request.param
+    set_numpy_enabled(True)
+    sim.get_absorption_kernel.cache_clear()
+    sim.get_action_kernel.cache_clear()
+
+
+def _curves(scenarios, **kwargs):
+    times, glucose = sim.simulate_glucose(scenarios, 6.0, 0.2, 2.0, **kwargs)
+    return [float(t) for t in times], [[float(value) for value in row] for row in glucose]
+
+
+def test_food_absorption():
+    assert sim.food_absorption({"carb_100g": 80, "protein_100g": 2, "fat_100g": 1}) == 'fast'
+    assert sim.food_absorption({"carb_100g": 20, "protein_100g": 5, "fat_100g": 1}) == 'medium'
+    assert sim.food_absorption({"carb_100g": 10, "protein_100g": 8, "fat_100g": 5}) == 'slow'
+    assert sim.food_absorption({"carb_100g": 10, "protein_100g": 20, "absorption": 'fast'}) == 'fast'
+    assert sim.food_absorption({"carb_100g": None}) == sim.DEFAULT_ABSORPTION
+    assert sim.food_absorption({"carb_100g": 0}) == sim.DEFAULT_ABSORPTION
+
+
+def test_absorbed_fraction_is_monotonic():
+    values = [sim.absorbed_fraction(minutes, 3.0) for minutes in range(-10, 200, 5)]
+    assert values[0] == 0.0 and values[-1] == 1.0
+    assert values == sorted(values)
+    assert sim.absorbed_fraction(90, 3.0) == pytest.approx(0.5)
+
+
+def test_steady_state_matches_rsi_and_isf(backend):
+    # 碳水完全吸收、胰岛素作用结束后，血糖变化为 碳水×RSI - 剂量×ISF
+    times, glucose = _curves([{"carbs": [(0, 50, 'medium')], "doses": [(0, 4)]},
+                              {"carbs": [(0, 50, 'fast')]},
+                              {}], hours=6)
+    assert times[0] == 0 and times[-1] == 360 and len(times) == 73
+    assert all(row[0] == pytest.approx(6.0) for row in glucose)
+    assert glucose[0][-1] == pytest.approx(6.0 + 50 * 0.2 - 4 * 2.0, abs=1e-6)
+    assert glucose[1][-1] == pytest.approx(16.0, abs=1e-6)
+    assert glucose[2] == pytest.approx([6.0] * len(times))
+    # 快速吸收的碳水更早升高血糖
+    _, slow = _curves([{"carbs": [(0, 50, 'slow')]}], hours=6)
+    assert max(glucose[1][:24]) > max(slow[0][:24])
+
+
+def test_past_dose_counts_remaining_effect(backend):
+    _, glucose = _curves([{"doses": [(-60, 3)]}, {"doses": [(-600, 3)]}, {"doses": [(30, 3)]}], hours=6)
+    remaining = iob_fraction(60, sim.DEFAULT_DIA_HOURS * 60, sim.DEFAULT_PEAK_MINUTES, sim.DEFAULT_CURVE)
+    assert glucose[0][-1] == pytest.approx(6.0 - 3 * 2.0 * remaining, abs=1e-6)
+    # 已经结束作用的注射没有影响，之后的注射从注射时间开始起作用
+    assert glucose[1] == pytest.approx([6.0] * len(glucose[1]))
+    assert glucose[2][:7] == pytest.approx([6.0] * 7)
+    assert glucose[2][-1] == pytest.approx(0.0, abs=1e-6)
+
+
+def test_numpy_and_python_agree():
+    pytest.importorskip('numpy')
+    scenarios = sim.dose_scenarios([(0, 40, 'fast'), (-30, 20, 2.5)], [0, 2, 4.5], past_doses=[(-90, 1.5)])
+    assert len(scenarios) == 3 and scenarios[0]["doses"] == [(-90, 1.5)]
+    results = []
+    for enabled in (True, False):
+        set_numpy_enabled(enabled)
+        sim.get_absorption_kernel.cache_clear()
+        sim.get_action_kernel.cache_clear()
+        try:
+            results.append(_curves(scenarios, hours=5, step_minutes=10))
+        finally:
+            set_numpy_enabled(True)
+    assert results[0][0] == results[1][0]
+    for fast_row, slow_row in zip(results[0][1], results[1][1]):
+        assert fast_row == pytest.approx(slow_row, abs=1e-9)
+
+
+def test_invalid_absorption():
+    with pytest.raises(ValueError):
+        sim.simulate_glucose([{"carbs": [(0, 10, 'instant')]}], 6.0, 0.2, 2.0)
+    with pytest.raises(ValueError):
+        sim.simulate_glucose([{"carbs": [(0, 10, 0)]}], 6.0, 0.2, 2.0)
+
+
+def test_meal_carb_entries_and_logged_doses():
+    foods = {"米饭": {"name": "米饭", "carb_100g": 26, "protein_100g": 2.6, "fat_100g": 0.3}}
+
+    class Foods:
+        def find(self, name):
+            return foods.get(name)
+
+    items = [{"name": "米饭", "total_carb": 39.0}, {"name": "未知", "total_carb": 5.0}]
+    assert sim.meal_carb_entries(items, Foods()) == [(0, 39.0, 'fast'), (0, 5.0, sim.DEFAULT_ABSORPTION)]
+
+    now = datetime.datetime(2024, 5, 1, 12, 0, 0)
+    log = [{"timestamp": "2024-05-01 02:00:00", "units": 5.0, "note": ""},
+           {"timestamp": "2024-05-01 11:00:00", "units": 2.0, "note": ""}]
+    assert sim.logged_dose_entries(now, log) == [(-60.0, 2.0)]
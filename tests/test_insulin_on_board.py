@@ -0,0 +1,17 @@
+from modules.insulin_on_board import load_dose_log, record_dose, get_insulin_on_board
+
+
+def _dose_log_gets(server):
+    return [request for request in server.requests
+            if request[0] == 'GET' and request[1].split('?')[0].endswith('/dose_log.json')]
+
+
+def test_missing_dose_log_is_requested_once(github):
+    for _ in range(5):
+        assert load_dose_log() == []
+        assert get_insulin_on_board() == 0
+    assert len(_dose_log_gets(github)) == 1
+
+    assert record_dose(2.0)
+    assert [entry["units"] for entry in load_dose_log()] == [2.0]
+    assert len(_dose_log_gets(github)) == 1
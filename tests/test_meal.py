@@ -0,0 +1,95 @@
+import math
+
+import pytest
+
+from modules import food_input
+from modules.insulin_calculation import calculate_insulin, calculate_insulin_dose
+from modules.meal import Meal, calculate_meal
+from utils.file_utils import save_json
+
+FOODS = [
+    {"name": "米饭", "carb_100g": 26.0, "protein_100g": 2.6, "fat_100g": 0.3},
+    {"name": "Apple", "carb_100g": 13.5, "protein_100g": 0.3, "fat_100g": 0.2},
+    {"name": "Water"},
+]
+
+
+@pytest.fixture
+def calibrated(data_dir):
+    assert food_input.save_food_data(FOODS)
+    assert save_json({"rsi_value": 0.2}, 'rsi_data.json')
+    assert save_json({"isf_value": 2.0}, 'isf_data.json')
+    return data_dir
+
+
+def test_meal_matches_single_food_calculation(calibrated):
+    result = Meal([("米饭", 150), ("apple", "100")]).calculate()
+    assert result["success"]
+    assert [item["name"] for item in result["items"]] == ["米饭", "Apple"]
+    for item, (food, weight) in zip(result["items"], [(FOODS[0], 150), (FOODS[1], 100)]):
+        assert (item["total_carb"], item["blood_sugar_rise"], item["insulin_dose"]) == pytest.approx(
+            calculate_insulin_dose(food, weight, 0.2, 2.0))
+    assert result["total_weight"] == 250
+    assert result["insulin_dose"] == pytest.approx(sum(item["insulin_dose"] for item in result["items"]))
+    # 没有注射记录时不扣除IOB
+    assert result["insulin_on_board"] == 0
+    assert result["net_dose"] == pytest.approx(result["insulin_dose"])
+
+    table = food_input.load_food_data()
+    assert calculate_meal([(table.find("米饭"), 150), ("Apple", 100)], foods=table)["items"] == result["items"]
+    assert calculate_meal([("米饭", 150)], iob=100)["net_dose"] == 0.0
+
+
+def test_meal_errors(calibrated):
+    assert not calculate_meal([])["success"]
+    assert calculate_meal([("面包", 100), ("米饭", 50)])["error"] == "未找到食物: 面包"
+    assert "Water" in calculate_meal([("Water", 100)])["error"]
+    with pytest.raises(ValueError):
+        Meal([("米饭", 0)])
+
+
+@pytest.mark.parametrize("isf_value", [0, -1.5, "abc", None, math.inf])
+def test_invalid_isf_is_an_error(calibrated, isf_value):
+    assert save_json({"isf_value": isf_value}, 'isf_data.json')
+    result = calculate_meal([("米饭", 100)])
+    assert not result["success"]
+    assert "ISF" in result["error"]
+    assert not calculate_meal([("米饭", 100)], rsi_value=0.2, isf_value=isf_value)["success"]
+
+
+def test_invalid_rsi_is_an_error(calibrated):
+    result = calculate_meal([("米饭", 100)], rsi_value=0, isf_value=2.0)
+    assert not result["success"]
+    assert "RSI" in result["error"]
+
+
+def test_missing_calibration(data_dir):
+    assert food_input.save_food_data(FOODS)
+    assert "RSI" in calculate_meal([("米饭", 100)])["error"]
+    assert save_json({"rsi_value": 0.2}, 'rsi_data.json')
+    assert "ISF" in calculate_meal([("米饭", 100)])["error"]
+
+
+def _run_cli(monkeypatch, answers):
+    answers = iter(answers)
+    monkeypatch.setattr('builtins.input', lambda prompt='': next(answers))
+    calculate_insulin()
+
+
+def test_cli_calculates_meal(calibrated, monkeypatch, capsys):
+    # 未找到食物或重量无效时重新输入食物名称，直接回车结束，不记录注射
+    _run_cli(monkeypatch, ["面包", "米饭", "abc", "米饭", "150", "apple", "100", "", "n"])
+    output = capsys.readouterr().out
+    assert "未找到食物: 面包" in output
+    assert "请输入有效的数字" in output
+    dose = calculate_meal([("米饭", 150), ("Apple", 100)])["net_dose"]
+    assert f"胰岛素注射剂量: {dose:.2f} U" in output
+    assert "合计 2 种食物 250g" in output
+
+
+def test_cli_reports_zero_isf(calibrated, monkeypatch, capsys):
+    assert save_json({"isf_value": 0}, 'isf_data.json')
+    _run_cli(monkeypatch, ["米饭", "100", ""])
+    output = capsys.readouterr().out
+    assert "ISF值无效" in output
+    assert "inf" not in output
@@ -0,0 +1,89 @@
+import subprocess
+import sys
+
+import pytest
+
+from conftest import PROJECT_ROOT
+from utils import settings
+
+
+@pytest.fixture
+def config_dirs(tmp_path, monkeypatch):
+    """用户主目录、项目目录和当前目录各自放一份secrets.toml，测试结束后丢弃缓存的配置"""
+    dirs = {}
+    for name in ('home', 'project', 'cwd'):
+        (tmp_path / name / '.streamlit').mkdir(parents=True)
+        dirs[name] = tmp_path / name
+    monkeypatch.setenv('HOME', str(dirs['home']))
+    monkeypatch.setattr(settings, 'PROJECT_ROOT', str(dirs['project']))
+    monkeypatch.chdir(dirs['cwd'])
+    monkeypatch.delenv('INSULIN_GITHUB_REPO', raising=False)
+    settings.reload_settings()
+    yield dirs
+    settings.reload_settings()
+
+
+def _write_secrets(directory, text):
+    (directory / '.streamlit' / 'secrets.toml').write_text(text, encoding='utf-8')
+
+
+def test_secrets_files_override_in_order(config_dirs):
+    _write_secrets(config_dirs['home'], 'GITHUB_REPO = "home/repo"\nGITHUB_BRANCH = "dev"\n')
+    _write_secrets(config_dirs['project'], 'GITHUB_REPO = "project/repo"\nMAX_WAIT = 2.5\n')
+    settings.reload_settings()
+    # 当前目录没有配置该项时使用项目目录的值，其他项合并
+    assert settings.get_setting('GITHUB_REPO') == 'project/repo'
+    assert settings.get_setting('GITHUB_BRANCH') == 'dev'
+    assert settings.get_setting('MAX_WAIT') == 2.5
+    assert settings.get_setting('MISSING', 'default') == 'default'
+
+    _write_secrets(config_dirs['cwd'], 'GITHUB_REPO = "cwd/repo"\n')
+    # 配置只解析一次，修改文件后需要reload_settings
+    assert settings.get_setting('GITHUB_REPO') == 'project/repo'
+    settings.reload_settings()
+    assert settings.get_setting('GITHUB_REPO') == 'cwd/repo'
+
+
+def test_env_overrides_secrets(config_dirs, monkeypatch):
+    _write_secrets(config_dirs['cwd'], 'GITHUB_REPO = "cwd/repo"\nMAX_WAIT = "slow"\n')
+    settings.reload_settings()
+    monkeypatch.setenv('INSULIN_GITHUB_REPO', 'env/repo')
+    assert settings.get_setting('GITHUB_REPO') == 'env/repo'
+    # 空的环境变量视为未配置
+    monkeypatch.setenv('INSULIN_GITHUB_REPO', '')
+    assert settings.get_setting('GITHUB_REPO') == 'cwd/repo'
+    # 无法转换为数字时使用默认值
+    assert settings.get_float_setting('MAX_WAIT', 1) == 1.0
+    monkeypatch.setenv('INSULIN_MAX_WAIT', '4')
+    assert settings.get_float_setting('MAX_WAIT', 1) == 4.0
+
+
+def test_st_secrets_used_only_under_streamlit(config_dirs, monkeypatch):
+    st = pytest.importorskip('streamlit')
+
+    class Secrets:
+        def to_dict(self):
+            return {"GITHUB_REPO": "cloud/repo"}
+
+    _write_secrets(config_dirs['cwd'], 'GITHUB_REPO = "cwd/repo"\nGITHUB_BRANCH = "dev"\n')
+    monkeypatch.setattr(st, 'secrets', Secrets())
+    settings.reload_settings()
+    assert settings.get_setting('GITHUB_REPO') == 'cwd/repo'
+
+    # 由Streamlit运行时st.secrets覆盖secrets.toml，环境变量仍然优先
+    monkeypatch.setattr(settings, 'running_in_streamlit', lambda: True)
+    settings.reload_settings()
+    assert settings.get_setting('GITHUB_REPO') == 'cloud/repo'
+    assert settings.get_setting('GITHUB_BRANCH') == 'dev'
+    monkeypatch.setenv('INSULIN_GITHUB_REPO', 'env/repo')
+    assert settings.get_setting('GITHUB_REPO') == 'env/repo'
+
+
+def test_reading_settings_does_not_import_streamlit():
+    code = ("import sys\n"
+            "from utils import file_utils\n"
+            "file_utils.is_github_configured()\n"
+            "assert 'streamlit' not in sys.modules, 'streamlit imported'\n"
+            "assert 'requests' not in sys.modules, 'requests imported'\n")
+    result = subprocess.run([sys.executable, '-c', code], cwd=PROJECT_ROOT, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,9 @@
+from utils import storage_backends
+
+
+def test_local_list_skips_hidden_files(data_dir):
+    backend = storage_backends.LocalJsonBackend()
+    assert backend.put("foods_data.json", [])
+    for name in (".sync_outbox.json", ".foods_data.json.lock", ".foods_data.json.123.tmp.json"):
+        (data_dir / name).write_text("[]", encoding="utf-8")
+    assert backend.list() == ["foods_data.json"]
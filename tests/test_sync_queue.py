@@ -0,0 +1,75 @@
+import json
+import threading
+import time
+
+from utils import sync_queue
+from utils.sync_queue import SyncQueue
+
+
+class Recorder:
+    """记录每次推送的文件名，前fail_times次推送失败"""
+
+    def __init__(self, fail_times=0):
+        self.fail_times = fail_times
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, filenames):
+        with self.lock:
+            self.calls.append((time.monotonic(), sorted(filenames)))
+            return len(self.calls) > self.fail_times
+
+
+def _wait_until(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+
+def test_saves_in_window_are_pushed_once(tmp_path):
+    push = Recorder()
+    queue = SyncQueue(push, str(tmp_path / sync_queue.OUTBOX_FILENAME), batch_window=0.2)
+    for filename in ["rsi_data.json", "isf_data.json", "rsi_data.json", "rsi_data.json"]:
+        queue.enqueue(filename)
+    assert queue.is_pending("rsi_data.json")
+
+    assert queue.flush(timeout=5)
+    # 同一文件的多次保存、窗口内的多个文件合并为一次推送
+    assert [files for _, files in push.calls] == [["isf_data.json", "rsi_data.json"]]
+    assert queue.stats()["depth"] == 0 and queue.stats()["pushed"] == 1
+    assert not queue.is_pending("rsi_data.json")
+
+
+def test_failed_pushes_back_off_exponentially(tmp_path, monkeypatch):
+    monkeypatch.setattr(sync_queue, "SYNC_BASE_BACKOFF", 0.05)
+    push = Recorder(fail_times=3)
+    queue = SyncQueue(push, None, batch_window=0)
+    queue.enqueue("dose_log.json")
+
+    assert _wait_until(lambda: queue.stats()["depth"] == 0)
+    stats = queue.stats()
+    assert len(push.calls) == 4
+    assert stats["failures"] == 3 and stats["pushed"] == 1
+    assert "dose_log.json" in stats["last_error"]
+    # 退避时间逐次加倍（带0.5~1倍的随机抖动）：0.025~0.05、0.05~0.1、0.1~0.2秒
+    gaps = [later - earlier for (earlier, _), (later, _) in zip(push.calls, push.calls[1:])]
+    assert gaps[0] >= 0.025 and gaps[2] >= 0.1 and gaps[2] > gaps[0]
+
+
+def test_outbox_survives_restart(tmp_path, monkeypatch):
+    monkeypatch.setattr(sync_queue, "SYNC_BASE_BACKOFF", 3600)
+    outbox = tmp_path / sync_queue.OUTBOX_FILENAME
+    offline = SyncQueue(Recorder(fail_times=10 ** 9), str(outbox), batch_window=0)
+    offline.enqueue("foods_data.json")
+    assert _wait_until(lambda: offline.stats()["failures"] == 1)
+    with open(outbox, encoding="utf-8") as f:
+        assert list(json.load(f)) == ["foods_data.json"]
+
+    # 重启后由磁盘上的待同步列表恢复，立即推送
+    push = Recorder()
+    restarted = SyncQueue(push, str(outbox), batch_window=3600)
+    assert _wait_until(lambda: restarted.stats()["depth"] == 0)
+    assert [files for _, files in push.calls] == [["foods_data.json"]]
+    with open(outbox, encoding="utf-8") as f:
+        assert json.load(f) == {}
@@ -1,29 +1,385 @@
+import atexit
+import contextlib
+import hashlib
 import json
+import marshal
 import os
-import streamlit as st
+import random
+import re
+import tempfile
+import threading
+import time
 from .path_utils import get_data_path
+from .settings import get_float_setting, get_setting
 
+try:
+    import fcntl
+except ImportError:  # Windows没有fcntl，退化为进程内锁
+    fcntl = None
 
-def save_json(data, filename):
-    """保存数据到JSON文件（同时保存到本地和GitHub）"""
+
+# 进程级JSON缓存：{文件路径: [stat签名, 解析后的数据（只读共享，按需还原）, etag, marshal快照]}
+# stat签名为 (mtime_ns, size, inode)，文件被替换或修改后签名改变，缓存自动失效；
+# 命中时直接返回共享的数据（只能读取），不做任何复制；
+# 只有调用方明确需要可修改的副本时才由marshal快照还原，比重新解析JSON或逐层复制快得多
+_json_cache = {}
+_json_cache_lock = threading.Lock()
+
+# 没有fcntl时使用的进程内锁：{锁文件路径: threading.Lock}
+_fallback_locks = {}
+
+# 非本地文件后端条件保存使用的进程内锁：{文件名: threading.Lock}，不在data目录中创建锁文件
+_backend_locks = {}
+
+# 每个线程最近一次原子写入的 {文件路径: 替换后立即获取的stat签名}
+_written = threading.local()
+
+# 文件不存在时的etag，用于"仅在文件不存在时创建"的条件保存
+MISSING_ETAG = ''
+
+
+def stat_key(filepath):
+    """通过一次os.stat获取文件签名，文件不存在时返回None"""
     try:
-        # 1. 先保存到本地（作为缓存）
-        filepath = get_data_path(filename)
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=4)
-
-        # 2. 如果配置了GitHub，同步到GitHub
-        if is_github_configured():
-            from .github_storage import save_to_github
-            success = save_to_github(data, filename)
-            if success:
-                print(f"数据已同步到GitHub: {filename}")
-            else:
-                print(f"GitHub同步失败，数据仅保存到本地: {filename}")
-        else:
-            print(f"数据保存到本地: {filepath}")
+        st_result = os.stat(filepath)
+    except FileNotFoundError:
+        return None
+    return st_result.st_mtime_ns, st_result.st_size, st_result.st_ino
+
+
+def copy_data(data):
+    """
+    复制JSON数据的容器结构（dict/list），标量值直接共享
+
+    JSON中的标量（str/int/float/bool/None）都是不可变对象，
+    只需复制容器即可保证调用方的修改不会污染缓存
+    """
+    if isinstance(data, dict):
+        return {key: copy_data(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [copy_data(value) for value in data]
+    return data
+
+
+def _encode_float(value):
+    """与json模块相同的浮点数编码（包括NaN和无穷大）"""
+    if value != value:
+        return 'NaN'
+    if value == _INFINITY:
+        return 'Infinity'
+    if value == -_INFINITY:
+        return '-Infinity'
+    return float.__repr__(value)
+
+
+_INFINITY = float('inf')
+_SCALAR_ENCODERS = {
+    str: json.encoder.encode_basestring,
+    int: int.__repr__,
+    float: _encode_float,
+    bool: lambda value: 'true' if value else 'false',
+    type(None): lambda value: 'null',
+}
+
+
+def _dumps_records(data):
+    """
+    "扁平字典列表"（如食物数据）的快速序列化，输出与
+    json.dumps(data, ensure_ascii=False, indent=4) 完全相同；
+    带缩进时json模块只能使用纯Python编码器，这里直接拼接字符串。
+    数据不是扁平字典列表时返回None
+    """
+    if type(data) is not list or not data:
+        return None
+    encode_key = json.encoder.encode_basestring
+    encoders = _SCALAR_ENCODERS
+    parts = []
+    for item in data:
+        if type(item) is not dict:
+            return None
+        fields = []
+        for key, value in item.items():
+            encode = encoders.get(type(value))
+            if encode is None or type(key) is not str:
+                return None
+            fields.append(f'{encode_key(key)}: {encode(value)}')
+        parts.append('{\n        ' + ',\n        '.join(fields) + '\n    }' if fields else '{}')
+    return '[\n    ' + ',\n    '.join(parts) + '\n]'
+
+
+def _dumps_json(data):
+    """序列化为保存到文件的JSON文本（4空格缩进、不转义中文）"""
+    text = _dumps_records(data)
+    if text is None:
+        text = json.dumps(data, ensure_ascii=False, indent=4)
+    return text
+
+
+def _content_etag(payload):
+    """根据文件内容计算etag（内容的SHA-1摘要），作为文档的版本号"""
+    return hashlib.sha1(payload).hexdigest()
+
+
+def _cache_get(filepath, key, copy=False):
+    """
+    从缓存读取 (数据, etag)，缓存未命中或文件签名不一致时返回None
+
+    copy为False时返回缓存中共享的数据（只能读取）；为True时返回由marshal快照还原的独立副本
+    """
+    if key is None:
+        return None
+    with _json_cache_lock:
+        entry = _json_cache.get(filepath)
+    if entry is None or entry[0] != key:
+        return None
+    if entry[3] is None:
+        # 无法生成快照的数据，逐层复制
+        return (copy_data(entry[1]) if copy else entry[1]), entry[2]
+    if copy:
+        return marshal.loads(entry[3]), entry[2]
+    if entry[1] is None:
+        # 第一次只读访问时才还原共享的数据
+        entry[1] = marshal.loads(entry[3])
+    return entry[1], entry[2]
+
+
+def _cache_put(filepath, data, key, etag, shared=False):
+    """
+    用文件的stat签名更新缓存（缓存中保存数据的marshal快照，与调用方的数据互不影响）
+
+    读取文件时应传入读取前获取的签名，避免读取期间文件被替换而缓存了旧内容；
+    shared为True表示调用方不会修改data，直接作为共享数据缓存，省去第一次命中时的还原
+    """
+    if key is None:
+        with _json_cache_lock:
+            _json_cache.pop(filepath, None)
+        return
+    try:
+        entry = [key, data if shared else None, etag, marshal.dumps(data)]
+    except ValueError:
+        # 数据中有marshal不支持的对象
+        entry = [key, copy_data(data), etag, None]
+    with _json_cache_lock:
+        _json_cache[filepath] = entry
+
+
+def read_local_json(filepath, use_cache=True, copy=False):
+    """
+    读取本地JSON文件，返回 (数据, etag)，文件不存在时返回None
+
+    copy为False时返回的数据可能是缓存本身，只能读取；copy为True时返回调用方可以自由修改的副本；
+    use_cache为False时直接解析文件，结果不进入缓存
+    """
+    key = stat_key(filepath)
+    entry = _cache_get(filepath, key, copy)
+    if entry is not None or key is None:
+        return entry
+    with open(filepath, 'rb') as f:
+        payload = f.read()
+    data = json.loads(payload.decode('utf-8'))
+    etag = _content_etag(payload)
+    if use_cache:
+        _cache_put(filepath, data, key, etag, shared=not copy)
+    return data, etag
+
+
+def _current_etag(filepath):
+    """获取本地文件当前的etag，文件不存在时返回MISSING_ETAG"""
+    entry = read_local_json(filepath)
+    return entry[1] if entry is not None else MISSING_ETAG
+
+
+@contextlib.contextmanager
+def file_lock(filepath):
+    """
+    跨进程的文件锁（fcntl建议锁，锁文件为同目录下的隐藏文件）
+
+    只在"比较版本 + 重命名"这一小段临界区内持有
+    """
+    lock_path = os.path.join(os.path.dirname(filepath), f'.{os.path.basename(filepath)}.lock')
+    if fcntl is None:
+        with _json_cache_lock:
+            fallback_lock = _fallback_locks.setdefault(lock_path, threading.Lock())
+    with fallback_lock if fcntl is None else open(lock_path, 'a') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def clear_json_cache():
+    """清空JSON缓存（主要用于测试或外部工具修改数据文件后）"""
+    with _json_cache_lock:
+        _json_cache.clear()
+
+
+# 写入统计：实际写盘次数、写入字节数、被合并掉的写入次数
+_write_stats = {'physical_writes': 0, 'bytes_written': 0, 'writes_avoided': 0}
+
+# 写入合并窗口（秒）：窗口内对同一文件的多次保存只落盘一次，0表示立即写入
+_coalesce_window = get_float_setting('WRITE_COALESCE_WINDOW', 0)
+
+# 等待落盘的数据：{文件名: 数据副本}
+_pending_writes = {}
+_pending_lock = threading.Lock()
+
+
+def atomic_write_json(filepath, data, if_match=None):
+    """
+    原子写入JSON文件
+
+    先序列化到同目录下的临时文件并fsync，再用os.replace替换目标文件，
+    进程崩溃或多个会话同时保存时不会留下被截断的文件
+
+    参数:
+        if_match: 不为None时进行条件写入，只有文件当前etag与之相同才替换
+
+    返回:
+        str: 写入后文件的etag；条件不满足时返回None
+    """
+    payload = _dumps_json(data).encode('utf-8')
+    directory = os.path.dirname(filepath)
+    fd, tmp_path = tempfile.mkstemp(prefix=f'.{os.path.basename(filepath)}.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp创建的文件权限为0600，沿用原文件权限（新文件使用0644）
+        try:
+            mode = os.stat(filepath).st_mode & 0o777
+        except FileNotFoundError:
+            mode = 0o644
+        os.chmod(tmp_path, mode)
+        with file_lock(filepath):
+            if if_match is not None and _current_etag(filepath) != if_match:
+                os.unlink(tmp_path)
+                return None
+            os.replace(tmp_path, filepath)
+            key = stat_key(filepath)
+        if not hasattr(_written, 'signatures'):
+            _written.signatures = {}
+        _written.signatures[filepath] = key
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+    # 同步目录项，确保重命名本身也已落盘（Windows不支持打开目录，直接跳过）
+    if hasattr(os, 'O_DIRECTORY'):
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+    with _pending_lock:
+        _write_stats['physical_writes'] += 1
+        _write_stats['bytes_written'] += len(payload)
+    # 写入后直接更新缓存，避免下次读取时重新解析
+    etag = _content_etag(payload)
+    _cache_put(filepath, data, key, etag)
+    return etag
+
+
+def written_signature(filename):
+    """
+    当前线程最近一次写入该本地文件时的stat签名（在文件锁内替换后立即获取）
+
+    用于给由这次写入的数据生成的派生文件（如二进制快照）打上签名：
+    之后文件再被其他会话替换时签名必然不同，派生文件会被视为过期。
+    当前线程没有写入过该文件时返回None
+    """
+    return getattr(_written, 'signatures', {}).get(get_data_path(filename))
+
 
+def set_write_coalesce_window(seconds):
+    """设置写入合并窗口（秒），设置为0时每次保存立即写入"""
+    global _coalesce_window
+    _coalesce_window = max(0.0, float(seconds))
+    if _coalesce_window == 0:
+        flush_pending_writes()
+
+
+def get_write_stats():
+    """获取写入统计信息（实际写盘次数、写入字节数、被合并掉的写入次数、待写入文件数）"""
+    with _pending_lock:
+        stats = dict(_write_stats)
+        stats['pending_files'] = len(_pending_writes)
+    return stats
+
+
+def _schedule_write(data, filename):
+    """登记一次延迟写入，窗口内同一文件的后续保存只替换待写入的数据"""
+    with _pending_lock:
+        if filename in _pending_writes:
+            _write_stats['writes_avoided'] += 1
+            _pending_writes[filename] = copy_data(data)
+            return
+        _pending_writes[filename] = copy_data(data)
+
+    timer = threading.Timer(_coalesce_window, _flush_one, args=(filename,))
+    timer.daemon = True
+    timer.start()
+
+
+def _flush_one(filename):
+    """将某个文件等待中的数据真正写入"""
+    with _pending_lock:
+        data = _pending_writes.pop(filename, None)
+    if data is not None:
+        _write_and_sync(data, filename)
+
+
+def flush_pending_writes():
+    """立即写入所有等待中的数据（程序退出或测试时调用）"""
+    with _pending_lock:
+        filenames = list(_pending_writes)
+    for filename in filenames:
+        _flush_one(filename)
+
+
+atexit.register(flush_pending_writes)
+
+
+def is_local_storage():
+    """当前存储后端是否把数据保存在本地data目录的JSON文件中"""
+    from .storage_backends import get_storage_backend
+    return get_storage_backend().local_files
+
+
+def _data_etag(data):
+    """非本地文件后端的etag：按规范化序列化结果计算"""
+    if data is None:
+        return MISSING_ETAG
+    return _content_etag(json.dumps(data, ensure_ascii=False, sort_keys=True).encode('utf-8'))
+
+
+def save_json(data, filename):
+    """
+    保存数据（通过当前存储后端，默认同时保存到本地和GitHub）
+
+    设置了写入合并窗口时，数据先登记为待写入并立即返回True，
+    窗口结束后统一写盘并同步
+    """
+    if _coalesce_window > 0:
+        _schedule_write(data, filename)
         return True
+    return _write_and_sync(data, filename)
+
+
+def _write_and_sync(data, filename):
+    """通过存储后端写入（本地原子写入，配置了GitHub时再同步到GitHub）"""
+    try:
+        from .storage_backends import get_storage_backend
+        backend = get_storage_backend()
+        success = backend.put(filename, data)
+        if success and backend.local_files and not hasattr(backend, 'remote'):
+            print(f"数据保存到本地: {get_data_path(filename)}")
+        return success
     except (IOError, OSError) as e:
         # 文件操作错误
         print(f'文件操作错误: {e}')
@@ -42,27 +398,163 @@ def save_json(data, filename):
         return False
 
 
-def load_json(filename):
-    """从JSON文件加载数据（优先从本地加载，失败则从GitHub加载）"""
+def _sync_remote(data, filename):
+    """本地条件写入完成后，同步到分层后端的远端层（如GitHub）"""
+    from .storage_backends import get_storage_backend
+    backend = get_storage_backend()
+    if hasattr(backend, 'push'):
+        backend.push(filename, data)
+
+
+def load_json_versioned(filename):
+    """
+    加载JSON数据及其版本号（etag）
+
+    etag是文件内容的SHA-1摘要，配合save_json_if_match实现乐观并发控制；
+    版本号不写入文档本身，保持数据文件格式和GitHub上的副本不变
+
+    返回:
+        tuple: (数据, etag)；文件不存在时返回 (None, MISSING_ETAG)，读取失败时返回 (None, None)
+    """
+    # 条件保存以存储中的版本为准，先把合并窗口中等待的数据写入
+    _flush_one(filename)
+    if not is_local_storage():
+        data = load_json(filename, mutable=True)
+        return data, _data_etag(data)
+    filepath = get_data_path(filename)
     try:
-        # 1. 先尝试从本地加载
-        filepath = get_data_path(filename)
-        if os.path.exists(filepath):
-            with open(filepath, 'r', encoding='utf-8') as f:
-                return json.load(f)
-
-        # 2. 本地文件不存在，尝试从GitHub加载
-        if is_github_configured():
-            from .github_storage import load_from_github
-            data = load_from_github(filename)
-            if data is not None:
-                # 将从GitHub加载的数据保存到本地缓存
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, ensure_ascii=False, indent=4)
-                print(f"从GitHub加载并缓存: {filename}")
-                return data
+        if not os.path.exists(filepath):
+            # 本地不存在时走普通加载流程（可能从GitHub拉取并写入本地）
+            load_json(filename)
+        entry = read_local_json(filepath, copy=True)
+        if entry is None:
+            return None, MISSING_ETAG
+        return entry
+    except (IOError, OSError, json.JSONDecodeError) as e:
+        print(f'读取文件失败: {e}')
+        return None, None
 
-        return None
+
+def save_json_if_match(data, filename, etag):
+    """
+    条件保存（compare-and-swap）：只有文件仍是etag对应的版本时才写入
+
+    序列化和写临时文件都在锁外完成，跨进程文件锁只在比较版本和重命名时持有
+
+    返回:
+        tuple: (是否保存成功, 文件当前的etag)
+    """
+    if not is_local_storage():
+        return _save_backend_if_match(data, filename, etag)
+    filepath = get_data_path(filename)
+    try:
+        new_etag = atomic_write_json(filepath, data, if_match=etag)
+        if new_etag is None:
+            return False, _current_etag(filepath)
+    except (IOError, OSError, TypeError, ValueError) as e:
+        print(f'条件保存文件失败: {e}')
+        return False, None
+
+    # 本地已保存成功，GitHub同步失败不影响返回结果
+    try:
+        _sync_remote(data, filename)
+    except Exception as e:
+        print(f'GitHub同步失败，数据仅保存到本地: {e}')
+    return True, new_etag
+
+
+def _save_backend_if_match(data, filename, etag):
+    """非本地文件后端的条件保存（比较和写入在进程内锁中完成）"""
+    from .storage_backends import get_storage_backend
+    backend = get_storage_backend()
+    with _json_cache_lock:
+        lock = _backend_locks.setdefault(filename, threading.Lock())
+    with lock:
+        current_etag = _data_etag(backend.get(filename, use_cache=False))
+        if current_etag != etag:
+            return False, current_etag
+        if not backend.put(filename, data):
+            return False, current_etag
+    return True, _data_etag(data)
+
+
+def append_json_items(filename, items, key=None, max_retries=10):
+    """
+    向JSON列表文件追加数据，遇到并发修改时自动基于最新版本重试
+
+    参数:
+        filename: 数据文件名（内容为列表）
+        items: 要追加的数据列表
+        key: 可选的去重函数，返回值与已有数据重复的条目不会被追加
+        max_retries: 最大重试次数
+
+    返回:
+        list: 实际追加的条目；保存失败时返回None
+    """
+    for attempt in range(max_retries):
+        if attempt:
+            # 冲突后随机退避，避免多个会话同步重试再次冲突
+            time.sleep(random.uniform(0, 0.02 * attempt))
+        data, etag = load_json_versioned(filename)
+        if etag is None:
+            return None
+        data = data if data is not None else []
+
+        new_items = list(items)
+        if key is not None:
+            existing_keys = {key(item) for item in data}
+            new_items = []
+            for item in items:
+                item_key = key(item)
+                if item_key not in existing_keys:
+                    existing_keys.add(item_key)
+                    new_items.append(item)
+        if not new_items:
+            return []
+
+        success, _ = save_json_if_match(data + new_items, filename, etag)
+        if success:
+            return new_items
+    print(f'追加数据失败，并发冲突次数过多: {filename}')
+    return None
+
+
+def has_pending_write(filename):
+    """检查文件是否有尚未落盘的合并写入"""
+    with _pending_lock:
+        return filename in _pending_writes
+
+
+def load_json(filename, use_cache=True, mutable=False):
+    """
+    通过当前存储后端加载数据（默认优先从本地加载，失败则从GitHub加载）
+
+    本地文件的解析结果会缓存在进程内，文件未变化时直接返回缓存中共享的数据，
+    返回值只能读取不能修改；需要修改返回值的调用方传入mutable=True，得到独立的副本；
+    自行缓存了转换结果的调用方（如食物表）可以传入use_cache=False，避免重复占用内存
+    """
+    try:
+        # 1. 先尝试从缓存/本地加载
+        with _pending_lock:
+            pending = _pending_writes.get(filename)
+        if pending is not None:
+            # 合并窗口内尚未落盘的数据是最新的
+            return copy_data(pending) if mutable else pending
+
+        # 冷启动时所有数据文件并发下载，正在下载的文件等待下载完成
+        start_bootstrap()
+        wait_for_bootstrap([filename])
+
+        # 2. 由存储后端读取（分层后端在本地不存在时从GitHub加载并缓存到本地）
+        from .storage_backends import get_storage_backend
+        backend = get_storage_backend()
+        if mutable and backend.local_files:
+            # 本地文件的副本由缓存中的marshal快照还原
+            entry = read_local_json(get_data_path(filename), use_cache, copy=True)
+            if entry is not None:
+                return entry[0]
+        data = backend.get(filename, use_cache)
+        return copy_data(data) if mutable else data
     except (IOError, OSError) as e:
         # 文件操作错误
         print(f'文件操作错误: {e}')
@@ -81,33 +573,274 @@ def load_json(filename):
         return None
 
 
-def is_github_configured():
-    """检查是否配置了GitHub"""
+_JSON_WS = re.compile(r'[ \t\n\r]*')
+
+
+def _iter_array_file(filepath, chunk_size):
+    """按块读取文件，用raw_decode逐个解析顶层数组中的元素"""
+    decoder = json.JSONDecoder()
+    with open(filepath, 'r', encoding='utf-8') as f:
+        buffer = f.read(chunk_size)
+        eof = not buffer
+        pos = 0
+        started = False
+        while True:
+            pos = _JSON_WS.match(buffer, pos).end()
+            if pos >= len(buffer):
+                if eof:
+                    if started:
+                        raise json.JSONDecodeError('数组未结束', buffer, pos)
+                    return
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                continue
+            char = buffer[pos]
+            if not started:
+                if char != '[':
+                    raise json.JSONDecodeError('顶层不是JSON数组', buffer, pos)
+                started = True
+                pos += 1
+                continue
+            if char == ']':
+                return
+            if char == ',':
+                pos += 1
+                continue
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                end = None
+            # 元素恰好停在缓冲区末尾时可能被截断（例如数字），读入更多内容后重新解析
+            if end is None or end >= len(buffer) and not eof:
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                continue
+            yield item
+            pos = end
+
+
+def iter_json_array(filename, chunk_size=64 * 1024):
+    """
+    逐个返回JSON数组文件中的元素（生成器）
+
+    本地文件按块增量解析，内存占用只与单个元素和块大小有关，不随文件总大小增长；
+    数据不在本地文件中（合并写入未落盘、非本地存储后端、需要从GitHub加载）时退回load_json
+    """
+    filepath = get_data_path(filename)
+    if has_pending_write(filename) or not is_local_storage() or not os.path.exists(filepath):
+        yield from load_json(filename, use_cache=False) or []
+        return
     try:
-        return (
-            "GITHUB_TOKEN" in st.secrets and
-            "GITHUB_REPO" in st.secrets and
-            st.secrets["GITHUB_TOKEN"] and
-            st.secrets["GITHUB_REPO"]
-        )
-    except (AttributeError, KeyError, TypeError) as e:
-        # st.secrets 可能不存在，或者格式不正确
-        print(f"检查GitHub配置时出错: {e}")
+        yield from _iter_array_file(filepath, chunk_size)
+    except FileNotFoundError:
+        return
+    except (IOError, OSError) as e:
+        print(f'文件操作错误: {e}')
+    except json.JSONDecodeError as e:
+        print(f'JSON解码错误: {e}')
+
+
+def refresh_from_remote(filenames=None):
+    """
+    从GitHub拉取其他设备更新过的数据文件
+
+    对本地已有的文件发送带ETag的条件请求，远端未变化时GitHub返回304（不下载内容、
+    不计入请求限额），只有变化的文件才会下载并覆盖本地副本
+
+    参数:
+        filenames: 要检查的文件名列表，默认为本地data目录中的JSON文件和记录过远端元数据的文件
+
+    返回:
+        dict: {文件名: 状态}，状态为 "updated"、"unchanged"、"missing"、
+              "pending"（本地有未落盘或未推送到GitHub的修改，不拉取，避免远端旧数据覆盖本地修改）或 "error"；
+              未配置GitHub时返回空字典
+    """
+    if not is_github_configured():
+        return {}
+    from .github_storage import fetch_if_modified, remember_remote_version, remote_metadata_files
+    from . import sync_queue
+    if filenames is None:
+        data_dir = get_data_path('')
+        local_files = [name for name in os.listdir(data_dir)
+                       if name.endswith('.json') and not name.startswith('.')]
+        filenames = sorted(set(local_files) | set(remote_metadata_files()))
+
+    results = {}
+    for filename in filenames:
+        if has_pending_write(filename) or sync_queue.is_pending(filename):
+            results[filename] = 'pending'
+            continue
+        filepath = get_data_path(filename)
+        status, data, version = fetch_if_modified(filename, conditional=os.path.exists(filepath))
+        if status == 'updated' and (has_pending_write(filename) or sync_queue.is_pending(filename)):
+            # 下载期间本地又保存过
+            results[filename] = 'pending'
+            continue
+        if status == 'updated':
+            local = read_local_json(filepath, use_cache=False)
+            if local is not None and local[0] == data:
+                # 没有记录ETag时（例如首次检查）内容可能并未变化
+                status = 'unchanged'
+            else:
+                try:
+                    atomic_write_json(filepath, data)
+                    print(f"已从GitHub更新: {filename}")
+                except (IOError, OSError, TypeError, ValueError) as e:
+                    print(f'保存GitHub数据到本地失败: {e}')
+                    status = 'error'
+            if status != 'error':
+                # 本地副本与这个远端版本一致之后才记录ETag，之后的条件请求才能安全地返回304
+                remember_remote_version(filename, version)
+        elif status == 'missing':
+            remember_remote_version(filename, None)
+        results[filename] = status
+    return results
+
+
+# 冷启动时并发从GitHub下载的数据文件（另外还有记录过远端元数据的文件）
+BOOTSTRAP_FILES = ('rsi_data.json', 'isf_data.json', 'foods_data.json', 'dose_log.json')
+BOOTSTRAP_MAX_WORKERS = 8
+# 读取正在下载的文件时最多等待的秒数
+BOOTSTRAP_TIMEOUT = 30.0
+
+_bootstrap_futures = None
+_bootstrap_lock = threading.Lock()
+
+
+def _bootstrap_one(remote, filename):
+    """下载一个文件并原子写入本地（下载期间本地已保存过该文件时保留本地数据）"""
+    data = remote.get(filename)
+    if data is None:
         return False
+    try:
+        if atomic_write_json(get_data_path(filename), data, if_match=MISSING_ETAG) is not None:
+            print(f"从GitHub加载并缓存: {filename}")
+    except (IOError, OSError, TypeError, ValueError) as e:
+        print(f'保存GitHub数据到本地失败: {e}')
+        return False
+    return True
+
+
+def start_bootstrap():
+    """
+    冷启动引导：在后台线程池中并发下载本地缺少的数据文件（每个进程只执行一次）
+
+    新容器首次运行时各文件不必依次等待GitHub请求，总耗时约为一次往返；
+    下载期间load_json读取这些文件会等待对应的下载完成，不会重复请求
+
+    返回:
+        dict: {文件名: Future}，不需要下载（未配置GitHub或文件都已在本地）时为空字典
+    """
+    global _bootstrap_futures
+    with _bootstrap_lock:
+        if _bootstrap_futures is not None:
+            return dict(_bootstrap_futures)
+        _bootstrap_futures = {}
+        try:
+            from .storage_backends import get_storage_backend
+            backend = get_storage_backend()
+            remote = getattr(backend, 'remote', None)
+            if remote is None or not backend.local_files:
+                return {}
+            from .github_storage import remote_metadata_files
+            candidates = set(BOOTSTRAP_FILES) | set(remote_metadata_files())
+        except Exception as e:
+            print(f'启动数据引导失败: {e}')
+            return {}
+        missing = sorted(name for name in candidates
+                         if not os.path.exists(get_data_path(name)) and not has_pending_write(name))
+        if not missing:
+            return {}
+        from concurrent.futures import ThreadPoolExecutor
+        executor = ThreadPoolExecutor(max_workers=min(len(missing), BOOTSTRAP_MAX_WORKERS),
+                                      thread_name_prefix='bootstrap')
+        for filename in missing:
+            _bootstrap_futures[filename] = executor.submit(_bootstrap_one, remote, filename)
+        # 不等待下载完成，线程在任务结束后自动退出
+        executor.shutdown(wait=False)
+        return dict(_bootstrap_futures)
+
+
+def bootstrap_done():
+    """冷启动引导是否已完成（未启动或不需要下载时为True）"""
+    with _bootstrap_lock:
+        futures = list((_bootstrap_futures or {}).values())
+    return all(future.done() for future in futures)
+
+
+def wait_for_bootstrap(filenames=None, timeout=BOOTSTRAP_TIMEOUT):
+    """
+    等待冷启动引导下载完成
+
+    参数:
+        filenames: 只等待这些文件，默认等待全部
+
+    返回:
+        bool: 在超时前全部完成返回True
+    """
+    with _bootstrap_lock:
+        futures = _bootstrap_futures or {}
+        pending = [future for name, future in futures.items()
+                   if (filenames is None or name in filenames) and not future.done()]
+    if not pending:
+        return True
+    from concurrent.futures import wait
+    return not wait(pending, timeout=timeout).not_done
+
+
+def is_github_configured():
+    """检查是否配置了GitHub（环境变量、secrets.toml或st.secrets，见utils.settings）"""
+    return bool(get_setting("GITHUB_TOKEN") and get_setting("GITHUB_REPO"))
 
 
 def file_exists(filename):
     """检查文件是否存在（本地或GitHub）"""
-    filepath = get_data_path(filename)
-    if os.path.exists(filepath):
-        return True
+    try:
+        from .storage_backends import get_storage_backend
+        return get_storage_backend().exists(filename)
+    except ImportError as e:
+        print(f"导入github_storage模块失败: {e}")
+        return False
+
 
-    if is_github_configured():
+def load_json_batch(filenames):
+    """
+    一次加载多个数据文件（由存储后端批量读取）
+
+    返回:
+        dict: {文件名: 数据}，不存在或读取失败的为None；数据与缓存共享，只能读取
+    """
+    result = {}
+    remaining = []
+    with _pending_lock:
+        for filename in filenames:
+            if filename in _pending_writes:
+                result[filename] = _pending_writes[filename]
+            else:
+                remaining.append(filename)
+    if remaining:
         try:
-            from .github_storage import github_file_exists
-            return github_file_exists(filename)
-        except ImportError as e:
-            print(f"导入github_storage模块失败: {e}")
-            return False
+            start_bootstrap()
+            wait_for_bootstrap(remaining)
+            from .storage_backends import get_storage_backend
+            result.update(get_storage_backend().batch_get(remaining))
+        except Exception as e:
+            print(f'批量读取文件失败: {e}')
+            result.update(dict.fromkeys(remaining))
+    return {filename: result.get(filename) for filename in filenames}
+
 
-    return False
\ No newline at end of file
+def save_json_batch(items):
+    """一次保存多个数据文件（items为 {文件名: 数据}），全部成功返回True"""
+    try:
+        from .storage_backends import get_storage_backend
+        return get_storage_backend().batch_put(items)
+    except Exception as e:
+        print(f'批量保存文件失败: {e}')
+        return False
\ No newline at end of file
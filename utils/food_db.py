@@ -0,0 +1,313 @@
+"""
+SQLite食物数据库
+提供与JSON存储相同的食物数据读写函数，并支持按行插入、修改和删除，
+单条食物的修改不再需要重写整个foods_data.json文件
+
+需要显式启用：配置项 FOOD_STORAGE 设为 "sqlite"（例如环境变量 INSULIN_FOOD_STORAGE=sqlite），
+并执行 python -m utils.food_db migrate 迁移现有数据。
+注意：数据库中的食物不会同步到GitHub，需要同步时执行 python -m utils.food_db export
+把数据库导出为foods_data.json（会按配置上传到GitHub）
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+from .path_utils import get_data_path
+from .file_utils import load_json, save_json, is_github_configured
+from .settings import get_setting
+
+
+DB_FILENAME = 'foods_data.db'
+JSON_FILENAME = 'foods_data.json'
+
+# 营养成分字段（name之外的列）
+NUTRIENT_FIELDS = ('carb_100g', 'protein_100g', 'fat_100g')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS foods (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    carb_100g REAL NOT NULL DEFAULT 0,
+    protein_100g REAL,
+    fat_100g REAL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_foods_name ON foods(name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_foods_carb ON foods(carb_100g);
+"""
+
+# sqlite3连接不能跨线程使用，Streamlit每个会话运行在不同线程中，因此每个线程单独持有连接
+_local = threading.local()
+
+
+def get_db_path():
+    """获取食物数据库文件路径"""
+    return get_data_path(DB_FILENAME)
+
+
+def db_exists():
+    """检查食物数据库是否已经创建（迁移后才会存在）"""
+    return os.path.exists(get_db_path())
+
+
+_sync_warning_shown = False
+
+
+def is_enabled():
+    """
+    是否使用SQLite存储食物数据（配置项FOOD_STORAGE为"sqlite"时启用）
+
+    配置了GitHub时只提示一次：数据库中的食物不会同步到GitHub
+    """
+    global _sync_warning_shown
+    if str(get_setting('FOOD_STORAGE', 'json')).lower() != 'sqlite':
+        return False
+    if not _sync_warning_shown and is_github_configured():
+        _sync_warning_shown = True
+        print("提示: 食物数据保存在SQLite数据库中，不会同步到GitHub；"
+              "需要同步时执行 python -m utils.food_db export")
+    return True
+
+
+def get_connection():
+    """获取当前线程的数据库连接（首次调用时创建并初始化表结构）"""
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        conn = sqlite3.connect(get_db_path())
+        conn.row_factory = sqlite3.Row
+        # WAL模式下读写互不阻塞，适合多个会话同时访问
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        _local.conn = conn
+    return conn
+
+
+def close_connection():
+    """关闭当前线程的数据库连接"""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+
+
+def _row_to_food(row):
+    """将数据库行转换为食物字典（为空的营养成分不输出，与JSON格式保持一致）"""
+    food = {"name": row["name"]}
+    for field in NUTRIENT_FIELDS:
+        if row[field] is not None:
+            food[field] = row[field]
+    return food
+
+
+def _food_values(food):
+    """从食物字典中提取写入数据库的列值"""
+    return (
+        food["name"],
+        float(food.get("carb_100g") or 0),
+        food.get("protein_100g"),
+        food.get("fat_100g"),
+    )
+
+
+def load_food_data():
+    """加载全部食物数据（按录入顺序）"""
+    try:
+        rows = get_connection().execute(
+            "SELECT name, carb_100g, protein_100g, fat_100g FROM foods ORDER BY id"
+        ).fetchall()
+        return [_row_to_food(row) for row in rows]
+    except sqlite3.Error as e:
+        print(f'读取食物数据库失败: {e}')
+        return []
+
+
+def iter_foods(batch_size=1000):
+    """按录入顺序逐个返回食物（分批从游标读取，不一次性加载全部行）"""
+    cursor = get_connection().execute(
+        "SELECT name, carb_100g, protein_100g, fat_100g FROM foods ORDER BY id"
+    )
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        for row in rows:
+            yield _row_to_food(row)
+
+
+def count_foods():
+    """食物总数"""
+    return get_connection().execute("SELECT COUNT(*) FROM foods").fetchone()[0]
+
+
+def tail_foods(n):
+    """最近录入的n个食物（按录入顺序）"""
+    rows = get_connection().execute(
+        "SELECT name, carb_100g, protein_100g, fat_100g FROM foods ORDER BY id DESC LIMIT ?", (n,)
+    ).fetchall()
+    return [_row_to_food(row) for row in reversed(rows)]
+
+
+def get_food(name):
+    """按名称（不区分大小写）查询单个食物，未找到时返回None"""
+    row = get_connection().execute(
+        "SELECT name, carb_100g, protein_100g, fat_100g FROM foods WHERE name = ? COLLATE NOCASE",
+        (name,)
+    ).fetchone()
+    return _row_to_food(row) if row is not None else None
+
+
+def check_duplicate_food(foods_list, new_name):
+    """
+    检查食物名称是否已存在（不区分大小写，走唯一索引）
+
+    参数与food_input.check_duplicate_food相同，foods_list不使用（以数据库中的数据为准）
+    """
+    return get_food(new_name) is not None
+
+
+def insert_food(food):
+    """
+    插入一条食物数据
+
+    返回:
+        bool: 插入成功返回True，名称重复或写入失败返回False
+    """
+    try:
+        conn = get_connection()
+        with conn:
+            conn.execute(
+                "INSERT INTO foods (name, carb_100g, protein_100g, fat_100g) VALUES (?, ?, ?, ?)",
+                _food_values(food)
+            )
+        return True
+    except sqlite3.IntegrityError:
+        print(f"食物 '{food['name']}' 已存在")
+        return False
+    except sqlite3.Error as e:
+        print(f'写入食物数据库失败: {e}')
+        return False
+
+
+def insert_foods(foods):
+    """
+    在一个事务内批量插入食物（调用方已去重）
+
+    返回:
+        bool: 全部插入成功返回True，有名称重复或写入失败时整体回滚并返回False
+    """
+    try:
+        conn = get_connection()
+        with conn:
+            conn.executemany(
+                "INSERT INTO foods (name, carb_100g, protein_100g, fat_100g) VALUES (?, ?, ?, ?)",
+                (_food_values(food) for food in foods)
+            )
+        return True
+    except sqlite3.Error as e:
+        print(f'批量写入食物数据库失败: {e}')
+        return False
+
+
+def update_food(name, food):
+    """
+    按名称更新一条食物数据（允许同时修改名称）
+
+    返回:
+        bool: 找到并更新返回True，否则返回False
+    """
+    try:
+        conn = get_connection()
+        with conn:
+            cursor = conn.execute(
+                "UPDATE foods SET name = ?, carb_100g = ?, protein_100g = ?, fat_100g = ? "
+                "WHERE name = ? COLLATE NOCASE",
+                _food_values(food) + (name,)
+            )
+        return cursor.rowcount > 0
+    except sqlite3.Error as e:
+        print(f'更新食物数据库失败: {e}')
+        return False
+
+
+def delete_food(name):
+    """按名称删除一条食物数据，找到并删除返回True"""
+    try:
+        conn = get_connection()
+        with conn:
+            cursor = conn.execute("DELETE FROM foods WHERE name = ? COLLATE NOCASE", (name,))
+        return cursor.rowcount > 0
+    except sqlite3.Error as e:
+        print(f'删除食物数据失败: {e}')
+        return False
+
+
+def save_food_data(foods_data):
+    """用给定列表整体替换数据库中的食物数据（单个事务内完成）"""
+    try:
+        conn = get_connection()
+        with conn:
+            conn.execute("DELETE FROM foods")
+            conn.executemany(
+                "INSERT OR REPLACE INTO foods (name, carb_100g, protein_100g, fat_100g) VALUES (?, ?, ?, ?)",
+                (_food_values(food) for food in foods_data)
+            )
+        return True
+    except sqlite3.Error as e:
+        print(f'保存食物数据库失败: {e}')
+        return False
+
+
+def update_food_data(foods_data, index, updated_data):
+    """更新指定索引的食物数据（只改写数据库中对应的一行）"""
+    if 0 <= index < len(foods_data):
+        old_name = foods_data[index]["name"]
+        foods_data[index] = updated_data
+        return update_food(old_name, updated_data)
+    return False
+
+
+def delete_food_data(foods_data, index):
+    """删除指定索引的食物数据（只删除数据库中对应的一行）"""
+    if 0 <= index < len(foods_data):
+        food = foods_data.pop(index)
+        return delete_food(food["name"])
+    return False
+
+
+def migrate_from_json(json_filename=JSON_FILENAME):
+    """
+    一次性将JSON食物数据迁移到SQLite数据库
+
+    名称重复（不区分大小写）的食物以后出现的为准
+
+    返回:
+        int: 迁移的食物条数，失败时返回-1
+    """
+    foods = load_json(json_filename)
+    if foods is None:
+        print(f"未找到 {json_filename}，无需迁移")
+        return 0
+    if not save_food_data(foods):
+        return -1
+    count = get_connection().execute("SELECT COUNT(*) FROM foods").fetchone()[0]
+    print(f"已将 {count} 条食物数据迁移到 {DB_FILENAME}")
+    if not is_enabled():
+        print("设置 INSULIN_FOOD_STORAGE=sqlite（或secrets.toml中的FOOD_STORAGE）后才会使用数据库")
+    return count
+
+
+def export_to_json(json_filename=JSON_FILENAME):
+    """将数据库中的食物数据导出为JSON文件（同时会按配置同步到GitHub）"""
+    return save_json(load_food_data(), json_filename)
+
+
+if __name__ == "__main__":
+    # 用法: python -m utils.food_db migrate|export
+    command = sys.argv[1] if len(sys.argv) > 1 else ''
+    if command == 'migrate':
+        migrate_from_json()
+    elif command == 'export':
+        export_to_json()
+    else:
+        print("用法: python -m utils.food_db migrate|export")
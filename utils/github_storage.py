@@ -1,99 +1,668 @@
 import requests
 import base64
+import hashlib
 import json
-import streamlit as st
-from utils.file_utils import save_json, load_json, file_exists
+import threading
+import time
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from utils.file_utils import save_json, load_json, file_exists, atomic_write_json
+from utils.path_utils import get_data_path
+from utils.settings import get_float_setting, get_setting, running_in_streamlit
 
 
-def get_github_file_path(filename):
-    """生成GitHub文件路径"""
-    return f"data/{filename}"
+# 连接和读取超时（秒），可以通过环境变量调整；没有超时的请求卡住时会一直占用Streamlit工作线程
+GITHUB_CONNECT_TIMEOUT = get_float_setting('GITHUB_CONNECT_TIMEOUT', 5)
+GITHUB_READ_TIMEOUT = get_float_setting('GITHUB_READ_TIMEOUT', 20)
+# 连接池中保持的长连接数量（Streamlit多个会话可能同时同步）
+GITHUB_POOL_SIZE = 10
 
+# 可以指向本地模拟服务器（benchmarks/fake_github.py）离线测试
+GITHUB_API_URL = get_setting('GITHUB_API_URL', "https://api.github.com")
 
-def github_file_exists(filename):
-    """检查GitHub上文件是否存在"""
-    try:
-        token = st.secrets["GITHUB_TOKEN"]
-        repo = st.secrets["GITHUB_REPO"]
-        branch = st.secrets.get("GITHUB_BRANCH", "main")
+# 主动限速（令牌桶）：平均每秒最多发送的请求数和允许的突发请求数，
+# 低于GitHub的二级限额（每分钟约80次写请求），避免连续保存时被临时封禁
+GITHUB_RATE_PER_SECOND = get_float_setting('GITHUB_RATE_PER_SECOND', 80 / 60)
+GITHUB_RATE_BURST = 20
+# 剩余额度低于总额度的这个比例时，按剩余次数平均分配到重置前的时间内
+GITHUB_RATE_RESERVE = 0.1
+# 因限额需要等待的时间超过这么多秒时不再等待，直接报错（不阻塞页面和同步线程太久）
+GITHUB_MAX_RATE_WAIT = 30.0
+
+# sha缓存中表示"已确认远端不存在该文件"的值
+_NO_FILE = ""
+
+# 记录各文件远端ETag/Last-Modified的本地元数据文件（只保存在本机，不同步）
+META_FILENAME = ".github_meta.json"
+
+
+class RemoteMetadata:
+    """
+    远端文件元数据（ETag、Last-Modified），按 "分支:文件名" 保存在data目录的小文件中，
+    进程重启后仍可以发送条件请求
+    """
+
+    def __init__(self, path=None):
+        self.path = path or get_data_path(META_FILENAME)
+        self._lock = threading.Lock()
+        self._entries = None
+
+    def _load(self):
+        """首次使用时读取元数据文件（调用方持有锁）"""
+        if self._entries is None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def get(self, branch, filename):
+        """获取文件的元数据字典，没有记录时返回None"""
+        with self._lock:
+            return self._load().get(f"{branch}:{filename}")
+
+    def filenames(self, branch):
+        """有元数据记录的文件名"""
+        prefix = f"{branch}:"
+        with self._lock:
+            return [key[len(prefix):] for key in self._load() if key.startswith(prefix)]
+
+    def update(self, branch, filename, entry):
+        """记录（entry为None时删除）文件的元数据并写回文件"""
+        key = f"{branch}:{filename}"
+        with self._lock:
+            entries = self._load()
+            if entries.get(key) == entry:
+                return
+            if entry is None:
+                entries.pop(key, None)
+            else:
+                entries[key] = entry
+            try:
+                atomic_write_json(self.path, entries)
+            except OSError as e:
+                print(f"保存GitHub元数据失败: {e}")
+
+
+def git_blob_sha(content):
+    """计算内容（bytes）的git blob SHA-1，与GitHub返回的文件sha相同"""
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+
+def _serialize(data):
+    """序列化为上传到GitHub的文件内容"""
+    return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+class RateLimitError(requests.RequestException):
+    """GitHub请求限额已用完，需要等待较长时间才能继续"""
+
+    def __init__(self, message, retry_at):
+        super().__init__(message)
+        self.retry_at = retry_at
+
+
+class RateLimiter:
+    """
+    GitHub请求限速器
+
+    发送前按令牌桶主动限速；根据响应中的X-RateLimit-*请求头记录剩余额度，
+    剩余额度低于GITHUB_RATE_RESERVE时按 剩余次数/距重置秒数 降低发送速率，额度用完或收到Retry-After时在到期前暂停发送
+    """
+
+    def __init__(self, rate=GITHUB_RATE_PER_SECOND, burst=GITHUB_RATE_BURST, max_wait=GITHUB_MAX_RATE_WAIT):
+        self.rate = rate
+        self.burst = burst
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self.limit = None
+        self.remaining = None
+        self.reset_at = None
+        self.blocked_until = 0.0
+        self.throttled = 0
+
+    def _current_rate(self, now):
+        """当前的令牌补充速率（调用方持有锁）"""
+        if (self.remaining is None or self.reset_at is None or self.reset_at <= now
+                or not self.limit or self.remaining >= self.limit * GITHUB_RATE_RESERVE):
+            return self.rate
+        return min(self.rate, max(self.remaining, 1) / (self.reset_at - now))
+
+    def acquire(self):
+        """
+        发送请求前调用：需要等待时在锁外等待（计入被限速的次数）
+
+        异常:
+            RateLimitError: 需要等待的时间超过max_wait
+        """
+        with self._lock:
+            wall = time.time()
+            now = time.monotonic()
+            rate = self._current_rate(wall)
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * rate)
+            self._updated = now
+            wait = max(0.0, self.blocked_until - wall, -(self._tokens - 1) / rate if self._tokens < 1 else 0.0)
+            if wait > self.max_wait:
+                raise RateLimitError(f"GitHub请求限额已用完，{wait:.0f} 秒后重试", wall + wait)
+            # 预留一个令牌（令牌数可以为负，后来的请求排在后面）
+            self._tokens -= 1
+            if wait > 0:
+                self.throttled += 1
+        if wait > 0:
+            time.sleep(wait)
+
+    def update(self, response):
+        """
+        根据响应更新额度信息
+
+        返回:
+            float或None: 被限速（403/429）时建议等待的秒数，否则为None
+        """
+        headers = response.headers
+        wall = time.time()
+        retry_after = None
+        with self._lock:
+            try:
+                if "X-RateLimit-Limit" in headers:
+                    self.limit = int(headers["X-RateLimit-Limit"])
+                if "X-RateLimit-Remaining" in headers:
+                    self.remaining = int(headers["X-RateLimit-Remaining"])
+                if "X-RateLimit-Reset" in headers:
+                    self.reset_at = float(headers["X-RateLimit-Reset"])
+            except ValueError:
+                pass
+            if response.status_code in (403, 429):
+                if headers.get("Retry-After"):
+                    # 二级限额（短时间内请求过多）
+                    try:
+                        retry_after = float(headers["Retry-After"])
+                    except ValueError:
+                        retry_after = 60.0
+                elif self.remaining == 0 and self.reset_at:
+                    retry_after = max(0.0, self.reset_at - wall)
+                if retry_after is not None:
+                    self.blocked_until = max(self.blocked_until, wall + retry_after)
+            elif self.remaining == 0 and self.reset_at:
+                # 本次请求用掉了最后的额度，重置前不再发送
+                self.blocked_until = max(self.blocked_until, self.reset_at)
+        return retry_after
+
+    def status(self):
+        """
+        限额状态
+
+        返回:
+            dict: limit/remaining为GitHub返回的额度和剩余次数（尚未收到时为None），
+                  reset_at为额度重置时间（Unix时间戳），blocked_until为暂停发送的截止时间（0表示未暂停），
+                  throttled为被主动限速而等待过的请求数
+        """
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "remaining": self.remaining,
+                "reset_at": self.reset_at,
+                "blocked_until": self.blocked_until if self.blocked_until > time.time() else 0.0,
+                "throttled": self.throttled,
+            }
 
-        url = f"https://api.github.com/repos/{repo}/contents/{get_github_file_path(filename)}?ref={branch}"
-        headers = {
+
+class _CountingAdapter(HTTPAdapter):
+    """统计新建连接次数的HTTPAdapter（连接池复用的连接不计入）"""
+
+    def __init__(self, *args, **kwargs):
+        self.connections_opened = 0
+        self._count_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        adapter = self
+
+        def counting(pool_class):
+            class CountingPool(pool_class):
+                def _new_conn(self):
+                    with adapter._count_lock:
+                        adapter.connections_opened += 1
+                    return super()._new_conn()
+            return CountingPool
+
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': counting(HTTPConnectionPool),
+            'https': counting(HTTPSConnectionPool),
+        }
+
+
+class GitHubClient:
+    """
+    GitHub Contents API客户端
+
+    所有请求共用一个requests.Session（连接池 + keep-alive），
+    认证请求头只在创建时生成一次，每个请求都带有超时；
+    每次GET/PUT返回的文件sha按 (文件名, 分支) 缓存，保存时直接使用，只在冲突时重新获取；
+    要保存的内容与缓存sha对应的内容相同时不上传；所有请求经过RateLimiter限速
+    """
+
+    def __init__(self, token, repo, branch="main", api_url=GITHUB_API_URL,
+                 timeout=(GITHUB_CONNECT_TIMEOUT, GITHUB_READ_TIMEOUT), pool_size=GITHUB_POOL_SIZE,
+                 metadata=None, rate_limiter=None):
+        self.repo = repo
+        self.branch = branch
+        self.timeout = timeout
+        self.base_url = f"{api_url.rstrip('/')}/repos/{repo}"
+        self.requests_sent = 0
+        self.skipped_uploads = 0
+        self._stats_lock = threading.Lock()
+        self._shas = {}
+        self._shas_lock = threading.Lock()
+        self.metadata = metadata if metadata is not None else RemoteMetadata()
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter()
+
+        self._adapter = _CountingAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session = requests.Session()
+        self.session.mount("https://", self._adapter)
+        self.session.mount("http://", self._adapter)
+        self.session.headers.update({
             "Authorization": f"token {token}",
             "Accept": "application/vnd.github.v3+json"
+        })
+
+    def contents_url(self, filename):
+        """data目录中文件的Contents API地址"""
+        return f"{self.base_url}/contents/{get_github_file_path(filename)}"
+
+    def request(self, method, url, **kwargs):
+        """
+        发送请求（使用连接池和默认超时，按限额限速）
+
+        被GitHub限速（403/429）且等待时间不超过max_wait时，等待后重试一次
+
+        异常:
+            RateLimitError: 额度已用完，需要等待的时间太长
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        for attempt in range(2):
+            self.rate_limiter.acquire()
+            with self._stats_lock:
+                self.requests_sent += 1
+            response = self.session.request(method, url, **kwargs)
+            retry_after = self.rate_limiter.update(response)
+            if retry_after is None or attempt:
+                break
+            if retry_after > self.rate_limiter.max_wait:
+                raise RateLimitError(f"GitHub请求限额已用完，{retry_after:.0f} 秒后重试",
+                                     time.time() + retry_after)
+            # 下一次acquire会等待到blocked_until
+        return response
+
+    def get_contents(self, filename, conditional=False):
+        """
+        读取文件的Contents API响应（同时缓存文件sha）
+
+        conditional为True时带上记录的ETag（If-None-Match）或Last-Modified（If-Modified-Since），
+        远端未变化时返回304，不下载内容，也不计入GitHub的请求限额；
+        ETag和Last-Modified不在这里记录：只查询sha或检查是否存在的请求并没有更新本地副本，
+        记录下来会让之后的条件请求误返回304，只有内容写入本地后才由remember_remote_version记录
+        """
+        headers = {}
+        if conditional:
+            entry = self.metadata.get(self.branch, filename) or {}
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            elif entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        response = self.request("GET", self.contents_url(filename), params={"ref": self.branch},
+                                headers=headers)
+        if response.status_code == 200:
+            self._remember_sha(filename, response.json().get("sha"))
+        elif response.status_code == 404:
+            self._remember_sha(filename, _NO_FILE)
+        return response
+
+    def _remember_sha(self, filename, sha):
+        with self._shas_lock:
+            self._shas[(filename, self.branch)] = sha
+
+    def cached_sha(self, filename):
+        """缓存的文件sha：未缓存时返回None，已确认远端不存在时返回空字符串"""
+        with self._shas_lock:
+            return self._shas.get((filename, self.branch))
+
+    def known_missing(self, filename):
+        """最近一次请求已确认远端不存在该文件（404），且之后没有保存过"""
+        return self.cached_sha(filename) == _NO_FILE
+
+    def forget_sha(self, filename):
+        """删除缓存的文件sha（下次保存前重新获取）"""
+        with self._shas_lock:
+            self._shas.pop((filename, self.branch), None)
+
+    def is_unchanged(self, filename, content, fetch=True):
+        """
+        要上传的内容与远端文件相同时返回True（并计入跳过的上传次数）
+
+        比较本地计算的git blob SHA-1和缓存的远端sha，不下载文件内容；
+        sha未缓存时fetch为True则先GET一次（反正保存前也需要sha），否则视为有变化
+        """
+        if self.cached_sha(filename) is None and fetch:
+            self.get_contents(filename)
+        sha = self.cached_sha(filename)
+        if not sha or sha != git_blob_sha(content):
+            return False
+        with self._stats_lock:
+            self.skipped_uploads += 1
+        return True
+
+    def put_contents(self, filename, content, message):
+        """
+        创建或更新文件
+
+        使用缓存的sha直接PUT（通常只需一次请求）；sha未知时先GET一次，
+        sha已过期（409/422冲突）时重新获取sha后再试一次
+
+        参数:
+            content: 文件内容（bytes）
+        """
+        payload = {
+            "message": message,
+            "content": base64.b64encode(content).decode('utf-8'),
+            "branch": self.branch
         }
+        if self.cached_sha(filename) is None:
+            self.get_contents(filename)
+        for attempt in range(2):
+            sha = self.cached_sha(filename)
+            if sha:
+                payload["sha"] = sha
+            else:
+                payload.pop("sha", None)
+            response = self.request("PUT", self.contents_url(filename), json=payload)
+            if response.status_code in (200, 201):
+                self._remember_sha(filename, response.json().get("content", {}).get("sha"))
+                return response
+            if response.status_code not in (409, 422) or attempt:
+                break
+            # 文件已被其他设备修改，重新获取sha
+            self.forget_sha(filename)
+            self.get_contents(filename)
+        self.forget_sha(filename)
+        return response
+
+    def commit_files(self, files, message):
+        """
+        用Git Data API把多个文件放进同一个提交
 
-        response = requests.get(url, headers=headers)
+        共4次请求：读取分支最新提交、创建树（内容直接内联，不单独创建blob）、创建提交、更新分支；
+        分支在此期间被其他设备更新（不是快进）时基于最新提交重试一次
+
+        参数:
+            files: {文件名: 内容bytes}
+
+        返回:
+            bool或None: 提交成功返回True，失败返回False；
+                        无法读取分支（例如空仓库）时返回None，调用方可以改为逐个文件保存
+        """
+        tree = [
+            {"path": get_github_file_path(filename), "mode": "100644", "type": "blob",
+             "content": content.decode('utf-8')}
+            for filename, content in files.items()
+        ]
+        for attempt in range(2):
+            response = self.request("GET", f"{self.base_url}/commits/{self.branch}")
+            if response.status_code in (404, 409, 422):
+                return None
+            if response.status_code != 200:
+                return False
+            head = response.json()
+
+            response = self.request("POST", f"{self.base_url}/git/trees",
+                                    json={"base_tree": head["commit"]["tree"]["sha"], "tree": tree})
+            if response.status_code != 201:
+                return False
+            response = self.request("POST", f"{self.base_url}/git/commits", json={
+                "message": message,
+                "tree": response.json()["sha"],
+                "parents": [head["sha"]],
+            })
+            if response.status_code != 201:
+                return False
+            response = self.request("PATCH", f"{self.base_url}/git/refs/heads/{self.branch}",
+                                    json={"sha": response.json()["sha"], "force": False})
+            if response.status_code == 200:
+                for filename, content in files.items():
+                    self._remember_sha(filename, git_blob_sha(content))
+                return True
+            if response.status_code != 422:
+                return False
+        return False
+
+    def connection_stats(self):
+        """
+        连接统计
+
+        返回:
+            dict: requests为发送的请求数，connections_opened为新建的连接数，
+                  connections_reused为复用已有连接的请求数，skipped_uploads为内容未变化而跳过的上传数
+        """
+        with self._stats_lock:
+            sent = self.requests_sent
+            skipped = self.skipped_uploads
+        opened = self._adapter.connections_opened
+        return {
+            "requests": sent,
+            "connections_opened": opened,
+            "connections_reused": max(0, sent - opened),
+            "skipped_uploads": skipped,
+        }
+
+    def close(self):
+        """关闭所有连接"""
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_github_client():
+    """获取共享的GitHub客户端（首次调用时读取GitHub配置，见utils.settings）"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = GitHubClient(
+                get_setting("GITHUB_TOKEN"),
+                get_setting("GITHUB_REPO"),
+                get_setting("GITHUB_BRANCH", "main"),
+            )
+        return _client
+
+
+def set_github_client(client):
+    """替换共享的GitHub客户端（传入None时关闭当前客户端，下次使用时按配置重新创建）"""
+    global _client
+    with _client_lock:
+        if _client is not None and _client is not client:
+            _client.close()
+        _client = client
+
+
+def get_connection_stats():
+    """共享客户端的连接统计（尚未创建客户端时全部为0）"""
+    with _client_lock:
+        client = _client
+    if client is None:
+        return {"requests": 0, "connections_opened": 0, "connections_reused": 0, "skipped_uploads": 0}
+    return client.connection_stats()
+
+
+def get_rate_limit_status():
+    """共享客户端的请求限额状态（尚未创建客户端时各项为None/0）"""
+    with _client_lock:
+        client = _client
+    if client is None:
+        return {"limit": None, "remaining": None, "reset_at": None, "blocked_until": 0.0, "throttled": 0}
+    return client.rate_limiter.status()
+
+
+def _report_error(message):
+    """打印错误信息；在Streamlit中运行时同时显示在页面上"""
+    print(message)
+    if running_in_streamlit():
+        import streamlit as st
+        st.error(message)
+
+
+def get_github_file_path(filename):
+    """生成GitHub文件路径"""
+    return f"data/{filename}"
+
+
+def github_file_exists(filename):
+    """检查GitHub上文件是否存在（已确认不存在的文件在下次保存前不再请求）"""
+    try:
+        client = get_github_client()
+        if client.known_missing(filename):
+            return False
+        response = client.get_contents(filename)
         return response.status_code == 200
     except Exception:
         return False
 
 
 def load_from_github(filename):
-    """从GitHub加载数据"""
-    try:
-        token = st.secrets["GITHUB_TOKEN"]
-        repo = st.secrets["GITHUB_REPO"]
-        branch = st.secrets.get("GITHUB_BRANCH", "main")
-
-        url = f"https://api.github.com/repos/{repo}/contents/{get_github_file_path(filename)}?ref={branch}"
-        headers = {
-            "Authorization": f"token {token}",
-            "Accept": "application/vnd.github.v3+json"
-        }
+    """
+    从GitHub加载数据
 
-        response = requests.get(url, headers=headers)
+    已确认远端不存在的文件（例如还没有注射记录时的dose_log.json）直接返回None，
+    在下次保存该文件之前不再发送请求、不消耗限速令牌；其他设备新建的文件由refresh_from_remote的条件请求发现
+    """
+    try:
+        client = get_github_client()
+        if client.known_missing(filename):
+            return None
+        response = client.get_contents(filename)
         if response.status_code == 200:
-            content = response.json()["content"]
-            # GitHub API返回的是base64编码的内容
-            decoded_content = base64.b64decode(content).decode('utf-8')
-            return json.loads(decoded_content)
+            return _decode_contents(response)
         else:
             return None
     except Exception as e:
-        st.error(f"从GitHub加载数据失败: {str(e)}")
+        _report_error(f"从GitHub加载数据失败: {str(e)}")
         return None
 
 
+def _decode_contents(response):
+    """解码Contents API响应中的JSON文件内容"""
+    # GitHub API返回的是base64编码的内容
+    return json.loads(base64.b64decode(response.json()["content"]).decode('utf-8'))
+
+
+def fetch_if_modified(filename, conditional=True):
+    """
+    按记录的ETag条件获取GitHub上的文件
+
+    返回:
+        tuple: (状态, 数据, 版本)；状态为 "unchanged"（304，本地副本就是最新的）、
+               "updated"（数据为远端最新内容）、"missing"（远端不存在）或 "error"；
+               版本为 "updated" 时响应的 {"etag", "last_modified"}（没有时为None），
+               调用方把数据写入本地副本后交给remember_remote_version记录
+    """
+    try:
+        response = get_github_client().get_contents(filename, conditional=conditional)
+        if response.status_code == 304:
+            return "unchanged", None, None
+        if response.status_code == 200:
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            version = {"etag": etag, "last_modified": last_modified} if etag or last_modified else None
+            return "updated", _decode_contents(response), version
+        if response.status_code == 404:
+            return "missing", None, None
+        print(f"从GitHub获取 {filename} 失败: HTTP {response.status_code}")
+        return "error", None, None
+    except Exception as e:
+        print(f"从GitHub获取 {filename} 失败: {e}")
+        return "error", None, None
+
+
+def remember_remote_version(filename, version):
+    """
+    本地副本已经与远端版本一致时记录其ETag/Last-Modified（version为None时删除记录）
+
+    之后对该文件的条件请求在远端未变化时返回304
+    """
+    client = get_github_client()
+    client.metadata.update(client.branch, filename, version)
+
+
+def remote_metadata_files():
+    """本机记录过远端元数据的文件名"""
+    client = get_github_client()
+    return client.metadata.filenames(client.branch)
+
+
 def save_to_github(data, filename, commit_message="Update data"):
     """保存数据到GitHub"""
     try:
-        token = st.secrets["GITHUB_TOKEN"]
-        repo = st.secrets["GITHUB_REPO"]
-        branch = st.secrets.get("GITHUB_BRANCH", "main")
-
-        # 检查文件是否存在以获取sha（用于更新）
-        file_sha = None
-        if github_file_exists(filename):
-            url = f"https://api.github.com/repos/{repo}/contents/{get_github_file_path(filename)}?ref={branch}"
-            headers = {
-                "Authorization": f"token {token}",
-                "Accept": "application/vnd.github.v3+json"
-            }
-            response = requests.get(url, headers=headers)
-            if response.status_code == 200:
-                file_sha = response.json()["sha"]
+        client = get_github_client()
+        content = _serialize(data)
+        # 内容与远端相同（例如重复点击保存）时不产生新的提交
+        if client.is_unchanged(filename, content):
+            return True
+        # 创建或更新文件（使用缓存的sha，通常只需一次请求）
+        response = client.put_contents(filename, content, commit_message)
+        return response.status_code in [200, 201]
+    except Exception as e:
+        _report_error(f"保存到GitHub失败: {str(e)}")
+        return False
 
-        # 准备文件内容
-        content = json.dumps(data, ensure_ascii=False, indent=2)
-        encoded_content = base64.b64encode(content.encode('utf-8')).decode('utf-8')
 
-        # 创建或更新文件
-        url = f"https://api.github.com/repos/{repo}/contents/{get_github_file_path(filename)}"
-        headers = {
-            "Authorization": f"token {token}",
-            "Accept": "application/vnd.github.v3+json"
-        }
-        payload = {
-            "message": commit_message,
-            "content": encoded_content,
-            "branch": branch
-        }
-        if file_sha:
-            payload["sha"] = file_sha
+def save_batch_to_github(items, commit_message="Update data"):
+    """
+    把多个文件放在一个提交中保存到GitHub（远端不会出现只更新了一部分文件的状态）
 
-        response = requests.put(url, headers=headers, json=payload)
-        return response.status_code in [200, 201]
+    参数:
+        items: {文件名: 数据}
+
+    返回:
+        bool: 保存成功返回True
+    """
+    if len(items) == 1:
+        filename, data = next(iter(items.items()))
+        return save_to_github(data, filename, commit_message)
+    try:
+        client = get_github_client()
+        # 只提交内容有变化的文件（只比较已缓存的sha，不为此额外发送请求）
+        files = {}
+        for filename, data in items.items():
+            content = _serialize(data)
+            if not client.is_unchanged(filename, content, fetch=False):
+                files[filename] = content
+        if not files:
+            return True
+        if len(files) == 1:
+            filename = next(iter(files))
+            return save_to_github(items[filename], filename, commit_message)
+        result = client.commit_files(files, commit_message)
+        if result is None:
+            # 仓库还没有提交时无法使用Git Data API，逐个文件创建
+            return all([save_to_github(items[filename], filename, commit_message) for filename in files])
+        return result
+    except Exception as e:
+        _report_error(f"批量保存到GitHub失败: {str(e)}")
+        return False
+
+
+def list_github_files():
+    """列出GitHub仓库data目录中的JSON文件名"""
+    try:
+        client = get_github_client()
+        response = client.request("GET", f"{client.base_url}/contents/data", params={"ref": client.branch})
+        if response.status_code == 200:
+            return sorted(item["name"] for item in response.json()
+                          if item.get("type") == "file" and item["name"].endswith(".json"))
+        return []
     except Exception as e:
-        st.error(f"保存到GitHub失败: {str(e)}")
-        return False
\ No newline at end of file
+        _report_error(f"列出GitHub文件失败: {str(e)}")
+        return []
@@ -0,0 +1,85 @@
+"""
+追加式修改日志（journal）
+每次修改只向日志文件追加一行JSON，读取时在最近一次快照上重放日志，
+日志过长时再合并（compact）进新的快照
+"""
+
+import json
+import os
+import threading
+from .path_utils import get_data_path
+from .file_utils import file_lock, stat_key
+
+
+# 日志读取缓存：{日志路径: (stat签名, 操作列表)}
+_ops_cache = {}
+_ops_cache_lock = threading.Lock()
+
+
+def get_journal_path(filename):
+    """根据快照文件名生成日志文件路径，例如 foods_data.json -> foods_data.journal"""
+    base = filename[:-5] if filename.endswith('.json') else filename
+    return get_data_path(f'{base}.journal')
+
+
+def journal_lock(filename):
+    """获取日志的跨进程锁，追加和合并日志时持有"""
+    return file_lock(get_journal_path(filename))
+
+
+def append_ops(filename, ops):
+    """
+    向日志追加若干操作记录（调用方需持有journal_lock）
+
+    每个操作写成一行JSON，写入后fsync，保证返回时已经落盘
+    """
+    lines = ''.join(json.dumps(op, ensure_ascii=False) + '\n' for op in ops)
+    with open(get_journal_path(filename), 'a', encoding='utf-8') as f:
+        f.write(lines)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def read_ops(filename):
+    """
+    读取日志中的全部操作记录（按stat签名缓存）
+
+    进程崩溃可能留下写了一半的最后一行，这样的行会被忽略
+    """
+    path = get_journal_path(filename)
+    key = stat_key(path)
+    if key is None:
+        return []
+    with _ops_cache_lock:
+        entry = _ops_cache.get(path)
+    if entry is not None and entry[0] == key:
+        return entry[1]
+
+    ops = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.endswith('\n'):
+                break
+            try:
+                ops.append(json.loads(line))
+            except json.JSONDecodeError:
+                print(f'忽略损坏的日志记录: {line.strip()}')
+    with _ops_cache_lock:
+        _ops_cache[path] = (key, ops)
+    return ops
+
+
+def journal_size(filename):
+    """获取日志的 (操作条数, 字节数)"""
+    path = get_journal_path(filename)
+    key = stat_key(path)
+    if key is None:
+        return 0, 0
+    return len(read_ops(filename)), key[1]
+
+
+def clear_journal(filename):
+    """清空日志（调用方需持有journal_lock，且日志内容已合并进快照）"""
+    path = get_journal_path(filename)
+    if os.path.exists(path):
+        os.remove(path)
@@ -1,4 +1,5 @@
 import os
+from .settings import get_setting
 
 
 def get_script_dir():
@@ -8,10 +9,13 @@ def get_script_dir():
 
 def get_data_path(filename):
     """生成数据文件的完整路径"""
-    script_dir = get_script_dir()
-    # 数据文件存放在项目根目录的data文件夹中
-    project_root = os.path.dirname(script_dir)  # 回到上一级目录（项目根目录）
-    data_dir = os.path.join(project_root, 'data')
+    # 可以通过配置项DATA_DIR（例如INSULIN_DATA_DIR环境变量）指定其他数据目录（例如性能基准使用临时目录）
+    data_dir = get_setting('DATA_DIR')
+    if not data_dir:
+        script_dir = get_script_dir()
+        # 数据文件存放在项目根目录的data文件夹中
+        project_root = os.path.dirname(script_dir)  # 回到上一级目录（项目根目录）
+        data_dir = os.path.join(project_root, 'data')
 
     # 如果data目录不存在，则创建
     if not os.path.exists(data_dir):
@@ -0,0 +1,121 @@
+"""
+应用配置
+
+按以下优先级（从高到低）查找配置项（例如 GITHUB_TOKEN）：
+1. 环境变量 INSULIN_<配置名>（例如 INSULIN_GITHUB_TOKEN）
+2. st.secrets（只在由Streamlit运行时读取，例如Streamlit Cloud网页上配置的secrets）
+3. .streamlit/secrets.toml（用户主目录、项目目录、当前目录，后面的覆盖前面的；与Streamlit读取相同的文件）
+
+配置文件在进程内只解析一次；命令行和Tk界面读取配置时不会导入streamlit
+"""
+
+import os
+import sys
+import threading
+
+ENV_PREFIX = 'INSULIN_'
+SECRETS_FILENAME = os.path.join('.streamlit', 'secrets.toml')
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_settings = None
+_settings_lock = threading.Lock()
+
+
+def _secrets_paths():
+    """可能存放secrets.toml的路径（按优先级从低到高，已去重）"""
+    paths = []
+    for base in (os.path.expanduser('~'), PROJECT_ROOT, os.getcwd()):
+        path = os.path.abspath(os.path.join(base, SECRETS_FILENAME))
+        if path not in paths:
+            paths.append(path)
+    return paths
+
+
+def _load_toml(path):
+    """解析TOML文件，文件不存在或格式错误时返回空字典"""
+    try:
+        import tomllib
+        with open(path, 'rb') as f:
+            return tomllib.load(f)
+    except ImportError:
+        # Python 3.11以下没有tomllib，使用streamlit依赖的toml包
+        import toml
+        with open(path, 'r', encoding='utf-8') as f:
+            return toml.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"读取配置文件 {path} 失败: {e}")
+        return {}
+
+
+def running_in_streamlit():
+    """当前进程是否由Streamlit运行（不会为了判断而导入streamlit）"""
+    if 'streamlit' not in sys.modules:
+        return False
+    try:
+        from streamlit.runtime import exists
+        return exists()
+    except Exception:
+        return False
+
+
+def _load_settings():
+    """合并各配置来源（环境变量除外，读取时单独查找）"""
+    settings = {}
+    for path in _secrets_paths():
+        if os.path.exists(path):
+            settings.update(_load_toml(path))
+    if running_in_streamlit():
+        try:
+            import streamlit as st
+            settings.update(st.secrets.to_dict())
+        except FileNotFoundError:
+            # 没有配置任何secrets
+            pass
+        except Exception as e:
+            print(f"读取st.secrets失败: {e}")
+    return settings
+
+
+def get_settings():
+    """文件和st.secrets中的全部配置（首次调用时解析，之后使用缓存）"""
+    global _settings
+    with _settings_lock:
+        if _settings is None:
+            _settings = _load_settings()
+        return _settings
+
+
+def get_setting(name, default=None):
+    """
+    读取配置项
+
+    参数:
+        name: 配置名（不带INSULIN_前缀），例如 "GITHUB_TOKEN"
+        default: 未配置时的默认值
+
+    返回:
+        环境变量中的值为字符串；配置文件中的值保持TOML中的类型
+    """
+    value = os.environ.get(ENV_PREFIX + name)
+    if value not in (None, ''):
+        return value
+    value = get_settings().get(name)
+    return default if value in (None, '') else value
+
+
+def get_float_setting(name, default):
+    """读取数值配置项，无法转换为数字时使用默认值"""
+    try:
+        return float(get_setting(name, default))
+    except (TypeError, ValueError):
+        print(f"配置项 {name} 不是有效的数字，使用默认值 {default}")
+        return float(default)
+
+
+def reload_settings():
+    """丢弃缓存的配置，下次读取时重新解析（修改secrets.toml后或测试中使用）"""
+    global _settings
+    with _settings_lock:
+        _settings = None
@@ -0,0 +1,321 @@
+"""
+存储后端模块
+定义统一的存储后端接口（get/put/exists/list/batch_get/batch_put），
+提供本地JSON、内存、SQLite、GitHub以及分层（读穿透）组合后端，按配置选择使用
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from .path_utils import get_data_path
+from .settings import get_setting
+
+
+class StorageBackend:
+    """
+    存储后端基类
+
+    数据以"文件名 -> JSON数据"的形式存取；get返回的数据可能与后端缓存共享，调用方只能读取
+    """
+
+    # 数据是否保存在本地data目录的JSON文件中（条件保存、修改日志等功能依赖本地文件）
+    local_files = False
+
+    def get(self, filename, use_cache=True):
+        """读取数据，不存在时返回None；返回值可能与后端缓存共享，只能读取；use_cache为False时不必保留缓存"""
+        raise NotImplementedError
+
+    def put(self, filename, data):
+        """写入数据，成功返回True"""
+        raise NotImplementedError
+
+    def exists(self, filename):
+        """检查数据是否存在"""
+        return self.get(filename) is not None
+
+    def list(self):
+        """列出所有数据文件名"""
+        raise NotImplementedError
+
+    def batch_get(self, filenames):
+        """一次读取多个文件，返回 {文件名: 数据}（不存在的为None）"""
+        return {filename: self.get(filename) for filename in filenames}
+
+    def batch_put(self, items):
+        """一次写入多个文件（items为 {文件名: 数据}），全部成功返回True"""
+        results = [self.put(filename, data) for filename, data in items.items()]
+        return all(results)
+
+
+class LocalJsonBackend(StorageBackend):
+    """本地data目录中的JSON文件（带stat校验缓存和原子写入）"""
+
+    local_files = True
+
+    def get(self, filename, use_cache=True):
+        from .file_utils import read_local_json
+        entry = read_local_json(get_data_path(filename), use_cache)
+        return entry[0] if entry is not None else None
+
+    def put(self, filename, data):
+        from .file_utils import atomic_write_json
+        atomic_write_json(get_data_path(filename), data)
+        return True
+
+    def exists(self, filename):
+        return os.path.exists(get_data_path(filename))
+
+    def list(self):
+        # 跳过隐藏文件（同步队列的outbox、锁文件、写入中的临时文件等）
+        return sorted(name for name in os.listdir(get_data_path(''))
+                      if name.endswith('.json') and not name.startswith('.'))
+
+
+class MemoryBackend(StorageBackend):
+    """进程内存中的存储，不产生任何磁盘或网络I/O，用于测试和性能基准"""
+
+    def __init__(self, initial=None):
+        from .file_utils import copy_data
+        self._copy = copy_data
+        self._lock = threading.Lock()
+        self._data = {name: copy_data(data) for name, data in (initial or {}).items()}
+
+    def get(self, filename, use_cache=True):
+        with self._lock:
+            return self._data.get(filename)
+
+    def put(self, filename, data):
+        data = self._copy(data)
+        with self._lock:
+            self._data[filename] = data
+        return True
+
+    def exists(self, filename):
+        with self._lock:
+            return filename in self._data
+
+    def list(self):
+        with self._lock:
+            return sorted(self._data)
+
+
+class SqliteBackend(StorageBackend):
+    """保存在SQLite数据库documents表中的JSON文档，批量读写在一次查询/事务内完成"""
+
+    def __init__(self, db_filename='storage.db'):
+        self.db_path = get_data_path(db_filename)
+        self._local = threading.local()
+
+    def _connection(self):
+        """获取当前线程的数据库连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS documents (name TEXT PRIMARY KEY, content TEXT NOT NULL)"
+            )
+            self._local.conn = conn
+        return conn
+
+    def get(self, filename, use_cache=True):
+        row = self._connection().execute(
+            "SELECT content FROM documents WHERE name = ?", (filename,)
+        ).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def put(self, filename, data):
+        return self.batch_put({filename: data})
+
+    def exists(self, filename):
+        return self._connection().execute(
+            "SELECT 1 FROM documents WHERE name = ?", (filename,)
+        ).fetchone() is not None
+
+    def list(self):
+        rows = self._connection().execute("SELECT name FROM documents ORDER BY name").fetchall()
+        return [row[0] for row in rows]
+
+    def batch_get(self, filenames):
+        filenames = list(filenames)
+        result = dict.fromkeys(filenames)
+        if not filenames:
+            return result
+        placeholders = ','.join('?' * len(filenames))
+        rows = self._connection().execute(
+            f"SELECT name, content FROM documents WHERE name IN ({placeholders})", filenames
+        ).fetchall()
+        for name, content in rows:
+            result[name] = json.loads(content)
+        return result
+
+    def batch_put(self, items):
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO documents (name, content) VALUES (?, ?)",
+                [(name, json.dumps(data, ensure_ascii=False)) for name, data in items.items()]
+            )
+        return True
+
+
+class GitHubBackend(StorageBackend):
+    """GitHub仓库data目录中的JSON文件（通过Contents API读写，批量写入时合并为一个提交）"""
+
+    def get(self, filename, use_cache=True):
+        from .github_storage import load_from_github
+        return load_from_github(filename)
+
+    def put(self, filename, data):
+        from .github_storage import save_to_github
+        return save_to_github(data, filename)
+
+    def exists(self, filename):
+        from .github_storage import github_file_exists
+        return github_file_exists(filename)
+
+    def list(self):
+        from .github_storage import list_github_files
+        return list_github_files()
+
+    def batch_put(self, items):
+        from .github_storage import save_batch_to_github
+        return save_batch_to_github(items)
+
+
+class TieredBackend(StorageBackend):
+    """
+    分层组合后端：读取时先查本地层，未命中再读远端层并回填本地（读穿透）；
+    写入时先写本地层，再同步到远端层（远端失败不影响本地结果）
+
+    write_behind为True时远端同步交给后台同步队列（utils.sync_queue），
+    写入本地后立即返回，不等待远端请求
+    """
+
+    def __init__(self, local, remote, write_behind=False):
+        self.local = local
+        self.remote = remote
+        self.local_files = local.local_files
+        self.write_behind = write_behind
+        if write_behind:
+            from .sync_queue import get_sync_queue
+            # 创建时即恢复上次未同步完的文件
+            self._queue = get_sync_queue(self._push_latest)
+
+    def _push_latest(self, filenames):
+        """同步队列的推送函数：把这些文件当前的本地内容一起推送到远端"""
+        items = {}
+        for filename in filenames:
+            data = self.local.get(filename, use_cache=False)
+            if data is not None:
+                items[filename] = data
+        return self.remote.batch_put(items) if items else True
+
+    def push(self, filename, data):
+        """把已写入本地层的数据同步到远端层（写回模式下只登记到同步队列）"""
+        if self.write_behind:
+            self._queue.enqueue(filename)
+            return
+        if self.remote.put(filename, data):
+            print(f"数据已同步到GitHub: {filename}")
+        else:
+            print(f"GitHub同步失败，数据仅保存到本地: {filename}")
+
+    def get(self, filename, use_cache=True):
+        data = self.local.get(filename, use_cache)
+        if data is not None:
+            return data
+        data = self.remote.get(filename)
+        if data is not None:
+            self.local.put(filename, data)
+            print(f"从GitHub加载并缓存: {filename}")
+        return data
+
+    def put(self, filename, data):
+        if not self.local.put(filename, data):
+            return False
+        self.push(filename, data)
+        return True
+
+    def exists(self, filename):
+        return self.local.exists(filename) or self.remote.exists(filename)
+
+    def list(self):
+        return sorted(set(self.local.list()) | set(self.remote.list()))
+
+    def batch_get(self, filenames):
+        result = self.local.batch_get(filenames)
+        missing = [name for name, data in result.items() if data is None]
+        if missing:
+            for name, data in self.remote.batch_get(missing).items():
+                if data is not None:
+                    self.local.put(name, data)
+                    result[name] = data
+        return result
+
+    def batch_put(self, items):
+        if not self.local.batch_put(items):
+            return False
+        if self.write_behind:
+            for filename in items:
+                self._queue.enqueue(filename)
+        elif not self.remote.batch_put(items):
+            print(f"GitHub同步失败，数据仅保存到本地: {', '.join(items)}")
+        return True
+
+
+# 后端注册表：名称 -> 无参数的构造函数
+BACKENDS = {
+    'local': LocalJsonBackend,
+    'memory': MemoryBackend,
+    'sqlite': SqliteBackend,
+    'github': GitHubBackend,
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def register_backend(name, factory):
+    """注册自定义存储后端"""
+    BACKENDS[name] = factory
+
+
+def create_backend(name):
+    """
+    按名称创建存储后端
+
+    'auto'（默认）: 配置了GitHub时为 本地JSON + GitHub 的分层后端，否则为本地JSON
+    'local+github': 强制使用分层后端
+
+    分层后端默认使用后台同步队列推送到GitHub，配置项GITHUB_WRITE_BEHIND为0时改为同步推送
+    """
+    if name == 'auto':
+        from .file_utils import is_github_configured
+        name = 'local+github' if is_github_configured() else 'local'
+    if name == 'local+github':
+        write_behind = str(get_setting('GITHUB_WRITE_BEHIND', '1')).lower() not in ('0', 'false')
+        return TieredBackend(LocalJsonBackend(), GitHubBackend(), write_behind=write_behind)
+    if name not in BACKENDS:
+        raise ValueError(f"未知的存储后端: {name}")
+    return BACKENDS[name]()
+
+
+def get_storage_backend():
+    """获取当前使用的存储后端（首次调用时按配置项STORAGE_BACKEND创建，例如环境变量INSULIN_STORAGE_BACKEND）"""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = create_backend(get_setting('STORAGE_BACKEND', 'auto'))
+        return _backend
+
+
+def set_storage_backend(backend):
+    """替换当前使用的存储后端（传入名称或后端对象；测试中可传入MemoryBackend()）"""
+    global _backend
+    if isinstance(backend, str):
+        backend = create_backend(backend)
+    with _backend_lock:
+        _backend = backend
+    return backend
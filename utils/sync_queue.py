@@ -0,0 +1,272 @@
+"""
+后台写回（write-behind）同步队列
+保存数据时只写本地文件并登记待同步的文件名，由后台线程推送到远端（GitHub）：
+同一文件的多次保存合并为一次推送（推送时读取最新的本地内容），短时间内保存的多个文件
+合并为一次批量推送（GitHub上为一个提交），失败按指数退避重试，
+待同步列表持久化在data/.sync_outbox.json中，程序重启后继续同步
+"""
+
+import atexit
+import json
+import os
+import random
+import threading
+import time
+from .path_utils import get_data_path
+
+
+OUTBOX_FILENAME = '.sync_outbox.json'
+
+# 重试退避：第n次失败后等待 min(SYNC_MAX_BACKOFF, SYNC_BASE_BACKOFF * 2**(n-1)) 秒（带随机抖动）
+SYNC_BASE_BACKOFF = 1.0
+SYNC_MAX_BACKOFF = 300.0
+# 登记后等待这么多秒再推送，让连续保存的多个文件（如先校准RSI再校准ISF）合并为一次推送
+SYNC_BATCH_WINDOW = 2.0
+# 程序退出时最多等待多少秒把队列推送完
+SYNC_EXIT_TIMEOUT = 10.0
+
+
+class SyncQueue:
+    """
+    写回同步队列
+
+    参数:
+        push: 推送函数 push(filenames) -> bool，读取这些文件当前的本地内容并一起推送到远端
+        outbox_path: 持久化待同步列表的文件路径，为None时不持久化
+    """
+
+    def __init__(self, push, outbox_path=None, batch_window=SYNC_BATCH_WINDOW):
+        self._push = push
+        self.batch_window = batch_window
+        self.outbox_path = outbox_path
+        self._cond = threading.Condition()
+        # {文件名: {"enqueued_at": 首次登记时间, "version": 登记次数, "attempts": 失败次数, "next_at": 下次尝试时间}}
+        self._pending = {}
+        self._worker = None
+        self.pushed = 0
+        self.failures = 0
+        self.last_error = None
+        for filename, enqueued_at in self._read_outbox().items():
+            self._pending[filename] = {"enqueued_at": enqueued_at, "version": 1, "attempts": 0, "next_at": 0.0}
+        if self._pending:
+            self._ensure_worker()
+
+    # ---------- 持久化 ----------
+
+    def _read_outbox(self):
+        """读取磁盘上的待同步列表 {文件名: 登记时间}"""
+        if not self.outbox_path:
+            return {}
+        try:
+            with open(self.outbox_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            return entries if isinstance(entries, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _update_outbox(self, add=None, remove=()):
+        """
+        在磁盘上的待同步列表中登记一个文件或移除若干文件
+
+        在文件锁内读取-修改-写入，其他进程登记的文件不会被覆盖
+        """
+        if not self.outbox_path:
+            return
+        from .file_utils import atomic_write_json, file_lock
+        try:
+            # atomic_write_json本身会持有目标文件的锁，读取-修改-写入使用另一个锁
+            with file_lock(os.path.splitext(self.outbox_path)[0]):
+                entries = self._read_outbox()
+                if add is not None:
+                    entries.setdefault(add[0], add[1])
+                for filename in remove:
+                    entries.pop(filename, None)
+                atomic_write_json(self.outbox_path, entries)
+        except (OSError, TypeError, ValueError) as e:
+            print(f'保存待同步列表失败: {e}')
+
+    # ---------- 入队与推送 ----------
+
+    def enqueue(self, filename):
+        """登记一个需要推送的文件（已登记的文件只更新版本，合并为一次推送）"""
+        with self._cond:
+            entry = self._pending.get(filename)
+            if entry is None:
+                now = time.time()
+                self._pending[filename] = {"enqueued_at": now, "version": 1, "attempts": 0,
+                                           "next_at": now + self.batch_window}
+                new_entry = True
+            else:
+                entry["version"] += 1
+                new_entry = False
+            self._ensure_worker()
+            self._cond.notify_all()
+        if new_entry:
+            self._update_outbox(add=(filename, now))
+
+    def _ensure_worker(self):
+        """后台线程未运行时启动（调用方持有锁）"""
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name='sync-queue', daemon=True)
+            self._worker.start()
+
+    def _next_batch(self):
+        """等待到期的文件，返回 {文件名: 版本}（调用方持有锁）"""
+        while True:
+            now = time.time()
+            ready = {name: entry["version"] for name, entry in self._pending.items()
+                     if entry["next_at"] <= now}
+            if ready:
+                return ready
+            if not self._pending:
+                self._cond.wait()
+            else:
+                wait = min(entry["next_at"] for entry in self._pending.values()) - now
+                self._cond.wait(timeout=max(wait, 0.01))
+
+    def _run(self):
+        """后台线程：把到期的文件一起推送"""
+        while True:
+            with self._cond:
+                batch = self._next_batch()
+            try:
+                success = self._push(list(batch))
+                error = None if success else '推送失败'
+            except Exception as e:
+                success, error = False, str(e)
+            removed = []
+            with self._cond:
+                if success:
+                    self.pushed += 1
+                else:
+                    self.failures += 1
+                    self.last_error = f"{', '.join(batch)}: {error}"
+                for filename, version in batch.items():
+                    entry = self._pending.get(filename)
+                    if entry is None:
+                        continue
+                    if success and entry["version"] == version:
+                        # 推送期间没有新的保存，可以移出队列
+                        del self._pending[filename]
+                        removed.append(filename)
+                    elif success:
+                        entry["attempts"] = 0
+                        entry["next_at"] = time.time() + self.batch_window
+                    else:
+                        entry["attempts"] += 1
+                        delay = min(SYNC_MAX_BACKOFF, SYNC_BASE_BACKOFF * 2 ** (entry["attempts"] - 1))
+                        entry["next_at"] = time.time() + delay * random.uniform(0.5, 1.0)
+                if removed:
+                    # 在锁内更新磁盘上的列表：flush返回时列表已经是最新的，
+                    # 同时推送后立即再次登记的文件不会被这次移除覆盖
+                    self._update_outbox(remove=removed)
+                self._cond.notify_all()
+            if removed:
+                print(f"数据已同步到GitHub: {', '.join(removed)}")
+            if not success:
+                print(f"GitHub同步失败，稍后重试: {', '.join(batch)}")
+
+    def is_pending(self, filename):
+        """文件是否还在等待推送（本进程登记的，或其他进程登记在磁盘待同步列表中的）"""
+        with self._cond:
+            if filename in self._pending:
+                return True
+        return filename in self._read_outbox()
+
+    # ---------- 状态与关闭 ----------
+
+    def stats(self):
+        """
+        队列状态
+
+        返回:
+            dict: depth为待同步文件数，lag_seconds为最早登记的待同步文件已等待的秒数，
+                  pushed/failures为累计推送（批次）成功/失败次数，last_error为最近一次失败信息
+        """
+        with self._cond:
+            oldest = min((entry["enqueued_at"] for entry in self._pending.values()), default=None)
+            return {
+                "depth": len(self._pending),
+                "lag_seconds": time.time() - oldest if oldest is not None else 0.0,
+                "pushed": self.pushed,
+                "failures": self.failures,
+                "last_error": self.last_error,
+            }
+
+    def flush(self, timeout=None):
+        """
+        立即推送所有待同步文件（忽略退避等待）并等待完成
+
+        返回:
+            bool: 队列已清空返回True，超时（例如远端一直失败）返回False
+        """
+        deadline = time.time() + timeout if timeout is not None else None
+        with self._cond:
+            for entry in self._pending.values():
+                entry["next_at"] = 0.0
+            if self._pending:
+                self._ensure_worker()
+            self._cond.notify_all()
+            while self._pending:
+                remaining = deadline - time.time() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(timeout=remaining)
+            return True
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_sync_queue(push=None):
+    """
+    获取进程内共享的同步队列
+
+    首次调用时需要传入推送函数（由分层存储后端创建），之后的调用可以省略
+    """
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            if push is None:
+                return None
+            _queue = SyncQueue(push, get_data_path(OUTBOX_FILENAME))
+        return _queue
+
+
+def get_sync_stats():
+    """共享同步队列的状态（未使用写回同步时队列深度为0）"""
+    queue = get_sync_queue()
+    if queue is None:
+        return {"depth": 0, "lag_seconds": 0.0, "pushed": 0, "failures": 0, "last_error": None}
+    return queue.stats()
+
+
+def is_pending(filename):
+    """文件是否有尚未推送到远端的本地修改（本进程还没有创建队列时检查磁盘上的待同步列表）"""
+    queue = get_sync_queue()
+    if queue is not None:
+        return queue.is_pending(filename)
+    try:
+        with open(get_data_path(OUTBOX_FILENAME), 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return isinstance(entries, dict) and filename in entries
+
+
+def flush(timeout=None):
+    """推送所有待同步文件并等待完成（用于退出前和测试）"""
+    queue = get_sync_queue()
+    return queue.flush(timeout) if queue is not None else True
+
+
+@atexit.register
+def _flush_at_exit():
+    # 先把合并写入窗口中的数据落盘（落盘时才会登记到队列）
+    from .file_utils import flush_pending_writes
+    flush_pending_writes()
+    queue = get_sync_queue()
+    if queue is not None and queue.stats()["depth"]:
+        if not queue.flush(SYNC_EXIT_TIMEOUT):
+            print("仍有文件未同步到GitHub，下次启动时继续同步")